@@ -0,0 +1,521 @@
+"""
+Acquisition in a separate process.
+
+With one process, the serial reader, the physics integration and DearPyGui
+rendering share the GIL: a heavy frame delays samples, and a burst of
+samples delays frames. In this architecture SerialHandler, PhysicsEngine and
+the crash journal run in a dedicated acquisition process:
+
+    acquisition process                         GUI process
+    SerialHandler -> PhysicsEngine
+        samples  -> shared-memory ring  ---->   RemotePhysics.get_buffer_view...
+        results  -> event queue         ---->   serial.on_jump_callback
+        state    -> event queue (on change)     physics.state, jumper_mass_kg, ...
+    command loop <- command queue       <----   tare, calibrate, set_mode, set_mass,
+                                                connect, journal commits, ...
+
+RemoteAcquisition hands the GUI two proxies, .physics and .serial, with the
+attributes and methods the UI already uses on PhysicsEngine and SerialHandler,
+so the callbacks and controllers work unchanged.
+
+Jitter benchmark (synthetic 1288 Hz feed plus a GUI-like frame load, run
+threaded in one process and then split across two). The frame load is a
+fixed amount of work, so "frame work time" shows how much the reader slows
+the GUI. On a single core both processes still share the CPU and the split
+can only move that cost around; run it on a multi-core machine to see the
+GUI side improve:
+
+    python acquisition_process.py --benchmark --seconds 10
+"""
+import argparse
+import itertools
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from shm_ring import H_WRITE, RingReader
+
+STATUS_INTERVAL = 0.05    # s; state is pushed at most this often, and only on change
+HEALTH_INTERVAL = 1.0     # s between link health snapshots
+REPLY_TIMEOUT = 10.0      # s for synchronous commands (connect, list_ports)
+# Mode methods the GUI may call through physics.active_mode
+MODE_METHODS = ("set_mass", "set_start_velocity")
+
+
+# --- acquisition process ---
+def run_acquisition(commands, events, options):
+    """Entry point of the acquisition process."""
+    from journal import AcquisitionJournal
+    from physics import PhysicsEngine
+    from profiler import SamplingProfiler
+    from serial_handler import SerialHandler
+
+    physics = PhysicsEngine(options.get("config"), options.get("params"))
+    physics.share_buffer(options["ring"])
+    serial = SerialHandler(physics)
+    serial.archive_root = options.get("archive_root")
+    journal = None
+    if options.get("journal_path"):
+        journal = AcquisitionJournal(options["journal_path"], physics)
+        physics.journal = journal
+        serial.journal = journal
+    metrics_server = None
+    if options.get("metrics"):
+        import metrics
+        registry = metrics.Registry()
+        metrics.instrument(registry, physics=physics, serial=serial)
+        metrics_server = metrics.serve(options["metrics"], registry)
+    serial.on_jump_callback = lambda result: events.put(("jump", result))
+    physics.on_calib_callback = lambda raw_per_kg: events.put(("calibrated", raw_per_kg))
+    profiler = SamplingProfiler()
+
+    handlers = {
+        "list_ports": serial.list_ports,
+        "connect": serial.connect,
+        "disconnect": serial.disconnect,
+        "tare": physics.start_tare,
+        "calibrate": physics.start_calibrate,
+        "set_mode": physics.set_mode,
+        "set_params": physics.set_params,
+        "mode_call": lambda method, *args: getattr(physics.active_mode, method)(*args),
+        "journal_commit": journal.commit if journal else lambda index: None,
+        "journal_context": (lambda ctx: journal.set_context(**ctx)) if journal else lambda ctx: None,
+        "profile_start": profiler.start,
+        "profile_stop": profiler.stop,
+    }
+    events.put(("ready", {
+        "modes": {name: [m for m in MODE_METHODS if hasattr(mode, m)]
+                  for name, mode in physics.modes.items()},
+        "config": dict(physics.config),
+        "pid": os.getpid(),
+    }))
+
+    last_status = None
+    next_health = 0.0
+    try:
+        while True:
+            try:
+                name, request_id, args = commands.get(timeout=STATUS_INTERVAL)
+            except queue.Empty:
+                name = None
+            if name == "quit":
+                break
+            if name:
+                try:
+                    reply = (True, handlers[name](*args))
+                except Exception as e:
+                    print(f"Acquisition command {name} failed: {e}")
+                    reply = (False, repr(e))
+                if request_id is not None:
+                    events.put(("reply", request_id, reply))
+            status = (physics.active_mode_name, physics.state, physics.jumper_mass_kg,
+                      serial.connected, serial.port_name,
+                      physics.config["raw_per_kg"], physics.config["frequency"])
+            if status != last_status:
+                events.put(("status", status))
+                last_status = status
+            now = time.monotonic()
+            if now >= next_health:
+                events.put(("health", serial.health.snapshot(), serial.health.summary()))
+                next_health = now + HEALTH_INTERVAL
+    finally:
+        profiler.stop()
+        serial.disconnect()
+        if journal:
+            journal.close()
+        physics.unshare_buffer()
+        if metrics_server:
+            metrics_server.stop()
+        events.put(("stopped", None))
+
+
+# --- GUI-side proxies ---
+class _RemoteMode:
+    """physics.active_mode stand-in exposing only the methods the mode has."""
+
+    def __init__(self, owner, methods):
+        self._owner = owner
+        self._methods = methods
+
+    def __getattr__(self, name):
+        if name not in self._methods:
+            raise AttributeError(name)
+        return lambda *args: self._owner.send("mode_call", name, *args)
+
+
+class RemotePhysics:
+    """The PhysicsEngine surface used by the GUI, backed by the acquisition process."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self.on_calib_callback = None
+        self.config = {}
+        self.mode_methods = {}
+        self.active_mode_name = "Single Jump"
+        self.state = ""
+        self.jumper_mass_kg = 0.0
+        self.ring = None
+
+    @property
+    def modes(self):
+        return self.mode_methods
+
+    @property
+    def active_mode(self):
+        return _RemoteMode(self._owner, self.mode_methods.get(self.active_mode_name, ()))
+
+    # Ring access (also what stream_server reads)
+    @property
+    def buffer(self):
+        return self.ring.data
+
+    @property
+    def buf_idx(self):
+        return self.ring.header[H_WRITE]
+
+    @property
+    def logic_time(self):
+        older, newer = self.ring.latest_views(1)
+        row = newer if len(newer) else older
+        return float(row[-1, 0]) if len(row) else 0.0
+
+    def get_buffer_view_time_window(self, end_time, duration_ms):
+        rate = self.ring.sample_rate or 1288
+        rows = self.ring.latest(int(duration_ms * rate / 1000 * 1.25) + 64)
+        return rows[rows[:, 0] >= end_time - duration_ms]
+
+    # Commands
+    def set_mode(self, mode_name):
+        # active_mode_name follows with the status pushed right after the switch
+        self._owner.send("set_mode", mode_name)
+
+    def set_params(self, params):
+        self._owner.send("set_params", params)
+
+    def start_tare(self):
+        self._owner.send("tare")
+
+    def start_calibrate(self, weight_kg):
+        self._owner.send("calibrate", weight_kg)
+
+    def unshare_buffer(self):
+        pass
+
+
+class RemoteJournal:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def commit(self, index):
+        self._owner.send("journal_commit", index)
+
+    def set_context(self, **context):
+        self._owner.send("journal_context", context)
+
+    def close(self):
+        pass   # closed by the acquisition process on stop()
+
+
+class RemoteHealth:
+    """Last link health snapshot received from the acquisition process."""
+
+    def __init__(self):
+        self.last = {"status": "ok", "totals": {}, "rates": None}
+        self.line = "Link: --"
+
+    @property
+    def status(self):
+        return self.last["status"]
+
+    def snapshot(self):
+        return self.last
+
+    def summary(self):
+        return self.line
+
+
+class RemoteProfiler:
+    """profiler.SamplingProfiler running in the acquisition process (reader thread)."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self.running = False
+
+    def start(self, path=None):
+        path = self._owner.call("profile_start", path)
+        self.running = path is not None
+        return path
+
+    def stop(self):
+        self.running = False
+        return self._owner.call("profile_stop")
+
+
+class RemoteSerial:
+    """The SerialHandler surface used by the GUI."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self.on_jump_callback = None
+        self.journal = RemoteJournal(owner)
+        self.health = RemoteHealth()
+        self.connected = False
+        self.port_name = ""
+
+    def list_ports(self):
+        return self._owner.call("list_ports")
+
+    def connect(self, port_name, baud_rate=921600):
+        self.connected = bool(self._owner.call("connect", port_name, baud_rate))
+        return self.connected
+
+    def disconnect(self):
+        self._owner.call("disconnect")
+        self.connected = False
+
+
+class RemoteAcquisition:
+    """
+    Starts the acquisition process and routes its events.
+    Results and calibration callbacks run on the event thread, as they ran
+    on the serial thread before.
+    """
+    def __init__(self, config=None, params=None, journal_path=None, archive_root=None, ring_name=None,
+                 metrics_address=None):
+        self.options = {
+            "config": config,
+            "params": params,
+            "journal_path": journal_path,
+            "archive_root": archive_root,
+            "ring": ring_name or f"force_plate_{os.getpid()}",
+            "metrics": metrics_address,   # the process serves its own /metrics (metrics.py)
+        }
+        ctx = mp.get_context("spawn")
+        self.commands = ctx.Queue()
+        self.events = ctx.Queue()
+        self.process = ctx.Process(target=run_acquisition, name="acquisition",
+                                   args=(self.commands, self.events, self.options), daemon=True)
+        self.physics = RemotePhysics(self)
+        self.serial = RemoteSerial(self)
+        self.journal = self.serial.journal
+        self.profiler = RemoteProfiler(self)
+        self.pending = {}
+        self.request_ids = itertools.count()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, timeout=30.0):
+        self.process.start()
+        self.thread = threading.Thread(target=self._event_loop, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.ready.wait(0.1):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Acquisition process did not start")
+        return self
+
+    def stop(self, timeout=5.0):
+        """Quit after every queued command (e.g. journal commits) has run."""
+        if self.process.is_alive():
+            self.commands.put(("quit", None, ()))
+            self.stopped.wait(timeout)
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.physics.ring:
+            self.physics.ring.close()
+            self.physics.ring = None
+
+    def send(self, name, *args):
+        self.commands.put((name, None, args))
+
+    def call(self, name, *args):
+        request_id = next(self.request_ids)
+        future = Future()
+        self.pending[request_id] = future
+        self.commands.put((name, request_id, args))
+        ok, value = future.result(REPLY_TIMEOUT)
+        if not ok:
+            print(f"Acquisition {name} failed: {value}")
+            return None
+        return value
+
+    def _event_loop(self):
+        physics = self.physics
+        serial = self.serial
+        while True:
+            kind, *payload = self.events.get()
+            if kind == "jump":
+                if serial.on_jump_callback:
+                    serial.on_jump_callback(payload[0])
+            elif kind == "status":
+                (physics.active_mode_name, physics.state, physics.jumper_mass_kg,
+                 serial.connected, serial.port_name,
+                 physics.config["raw_per_kg"], physics.config["frequency"]) = payload[0]
+            elif kind == "reply":
+                request_id, reply = payload
+                future = self.pending.pop(request_id, None)
+                if future:
+                    future.set_result(reply)
+            elif kind == "health":
+                serial.health.last, serial.health.line = payload
+            elif kind == "calibrated":
+                physics.config["raw_per_kg"] = payload[0]
+                if physics.on_calib_callback:
+                    physics.on_calib_callback(payload[0])
+            elif kind == "ready":
+                info = payload[0]
+                physics.mode_methods = info["modes"]
+                physics.config = info["config"]
+                physics.ring = RingReader(self.options["ring"])
+                self.ready.set()
+            elif kind == "stopped":
+                self.stopped.set()
+                return
+
+
+# --- jitter benchmark ---
+BENCH_HZ = 1288
+FRAME_S = 1 / 60
+FRAME_WORK_S = 0.008     # pure-Python work per frame (widget updates, history, ...)
+
+
+def _feed(physics, seconds, hz=BENCH_HZ):
+    """
+    Serial-reader stand-in: every ~1 ms, process the samples that would have
+    arrived by now. Returns the per-sample lag (processed - due) in ms.
+    """
+    raw_per_kg = physics.config["raw_per_kg"]
+    n_total = int(seconds * hz)
+    lags = np.zeros(n_total)
+    start = time.perf_counter()
+    i = 0
+    while i < n_total:
+        due = min(n_total, int((time.perf_counter() - start) * hz))
+        while i < due:
+            kg = 75 + 40 * math.sin(i / 200)
+            physics.process_sample(int(kg * raw_per_kg), time.time() * 1000, 1 + i * 776)
+            lags[i] = (time.perf_counter() - start - i / hz) * 1000
+            i += 1
+        time.sleep(0.001)
+    return lags
+
+
+def _calibrate_work(seconds=FRAME_WORK_S):
+    """Iterations of the frame busy work that take `seconds` with the CPU to ourselves."""
+    n = 0
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        sum(range(200))
+        n += 1
+    return max(1, int(n * seconds / 0.2))
+
+
+def _frames(get_window, logic_time, seconds, work):
+    """
+    GUI stand-in: 60 Hz frames with a live-plot read and a fixed amount of
+    Python work. Returns (frame periods, frame work times) in ms; the work
+    takes longer whenever the reader holds the GIL or the CPU meanwhile.
+    """
+    periods = []
+    work_ms = []
+    end = time.perf_counter() + seconds
+    last = time.perf_counter()
+    next_frame = last + FRAME_S
+    while last < end:
+        t0 = time.perf_counter()
+        get_window(logic_time(), 5000)
+        for _ in range(work):
+            sum(range(200))
+        work_ms.append((time.perf_counter() - t0) * 1000)
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        next_frame = max(next_frame + FRAME_S, time.perf_counter())
+        now = time.perf_counter()
+        periods.append((now - last) * 1000)
+        last = now
+    return np.array(periods), np.array(work_ms)
+
+
+def _bench_child(ring_name, seconds, results):
+    from physics import PhysicsEngine
+    physics = PhysicsEngine()
+    physics.share_buffer(ring_name)
+    results.put("ready")
+    lags = _feed(physics, seconds)
+    physics.unshare_buffer()
+    results.put(lags)
+
+
+def _summary(name, values, target=None):
+    jitter = np.abs(values - target) if target is not None else values
+    return (f"  {name:<22s} p50 {np.percentile(jitter, 50):6.2f}  p99 {np.percentile(jitter, 99):6.2f}"
+            f"  max {jitter.max():7.2f} ms")
+
+
+def benchmark(seconds=10.0):
+    from physics import PhysicsEngine
+    cpus = os.cpu_count() or 1
+    work = _calibrate_work()
+    print(f"{cpus} CPU(s); frame work {work} iterations (~{FRAME_WORK_S * 1000:.0f} ms alone)")
+    if cpus < 2:
+        print("  single core: both processes share one CPU, so the split cannot shorten frames here")
+
+    print(f"Threaded (one process), {seconds:.0f} s:")
+    physics = PhysicsEngine()
+    out = {}
+    feeder = threading.Thread(target=lambda: out.setdefault("lags", _feed(physics, seconds)))
+    feeder.start()
+    periods, work_ms = _frames(lambda end, dur: physics.get_buffer_view_time_window(end, dur),
+                               lambda: physics.logic_time, seconds, work)
+    feeder.join()
+    print(_summary("sample lag", out["lags"]))
+    print(_summary("frame period jitter", periods, FRAME_S * 1000))
+    print(_summary("frame work time", work_ms))
+
+    print(f"Split (acquisition process + shared ring), {seconds:.0f} s:")
+    ring_name = f"force_plate_bench_{os.getpid()}"
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    child = ctx.Process(target=_bench_child, args=(ring_name, seconds, results))
+    child.start()
+    results.get()
+    ring = RingReader(ring_name)
+
+    def window(end_time, duration_ms):
+        rows = ring.latest(int(duration_ms * BENCH_HZ / 1000 * 1.25) + 64)
+        return rows[rows[:, 0] >= end_time - duration_ms]
+
+    def logic_time():
+        rows = ring.latest(1)
+        return rows[-1, 0] if len(rows) else 0.0
+
+    periods, work_ms = _frames(window, logic_time, seconds, work)
+    ring.close()
+    lags = results.get()
+    child.join()
+    print(_summary("sample lag", lags))
+    print(_summary("frame period jitter", periods, FRAME_S * 1000))
+    print(_summary("frame work time", work_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition process tools")
+    parser.add_argument("--benchmark", action="store_true", help="compare threaded vs split jitter")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    if not args.benchmark:
+        parser.error("nothing to do; the GUI starts this process itself (setting acquisition_process=1)")
+    benchmark(args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Device clock tracking.
+
+RateEstimator follows the plate's true sample period from its micros stamps:
+recursive least squares over (sample index, device micros) gives the period
+(and so the rate), the timestamp jitter, and the number of samples lost in
+gaps. Its dt - the estimated period times the samples a step covers - is what
+the physics integration uses.
+
+ClockSync maps a plate's micros counter onto the host clock. It fits
+
+    host_ms - device_ms = offset + drift * (device_ms - d0)
+
+online with recursive least squares and a forgetting factor, so slow crystal
+drift (tens of ppm, i.e. several ms per minute between two plates) is
+followed continuously without a re-sync. Host arrival times carry USB and
+batching latency; a latency common to all plates cancels when their clocks
+are compared, and single late batches are clipped before they reach the fit.
+"""
+import math
+
+MICROS_WRAP = 1 << 32
+RELOCK_MS = 1000.0     # a residual this large means the device restarted
+RESYNC_US = 1000000    # a micros step this large is a restart, not a gap
+WARMUP_SAMPLES = 64    # fit samples before gaps are counted as drops
+DRIFT_EVERY = 8        # samples between host clock (ClockSync) updates
+
+
+class RateEstimator:
+    def __init__(self, nominal_hz, forgetting=0.99995):
+        self.forgetting = forgetting
+        self.dropped = 0          # samples lost in gaps, total
+        self.gaps = 0             # gap events
+        self.duplicates = 0       # repeated micros stamps
+        self.resyncs = 0
+        self.host = ClockSync()
+        self.reset(nominal_hz)
+
+    def reset(self, nominal_hz=None):
+        if nominal_hz:
+            self.nominal_hz = nominal_hz
+        self.p0 = 1e6 / self.nominal_hz   # reference period (us)
+        self.period_us = self.p0
+        self.last_micros = None
+        self.last_gap = 0
+        self._restart_fit()
+        self.host.reset()
+        self.host_count = 0
+
+    def _restart_fit(self):
+        self.k = 0                # sample index (counting dropped samples)
+        self.u = 0.0              # unwrapped micros since the fit origin
+        self.a = 0.0
+        self.c = self.period_us - self.p0
+        self.p00, self.p01, self.p11 = 1e6, 0.0, 1.0
+        self.var = 0.0            # residual variance (us^2)
+        self.samples = 0
+
+    @property
+    def rate_hz(self):
+        return 1e6 / self.period_us
+
+    @property
+    def jitter_us(self):
+        return math.sqrt(self.var)
+
+    @property
+    def rate_error_ppm(self):
+        """Measured rate vs the nominal (firmware) rate."""
+        return (self.rate_hz / self.nominal_hz - 1) * 1e6
+
+    @property
+    def drift_ppm(self):
+        """Device clock vs host clock."""
+        return self.host.drift_ppm
+
+    def state(self):
+        return {"period_us": self.period_us, "jitter_us": self.jitter_us}
+
+    def restore(self, state):
+        """Continue from a saved estimate (journal replay) instead of the nominal rate."""
+        self.period_us = state["period_us"]
+        self._restart_fit()
+        self.samples = WARMUP_SAMPLES
+
+    def update(self, micros, host_ms=None):
+        """
+        Account for one sample; returns its dt in seconds. last_gap holds the
+        samples dropped right before it.
+        """
+        self.last_gap = 0
+        if micros <= 0:
+            return self.period_us / 1e6
+        if self.last_micros is None:
+            self.last_micros = micros
+            return self.period_us / 1e6
+
+        diff = micros - self.last_micros
+        if diff < 0:
+            diff += MICROS_WRAP
+        self.last_micros = micros
+        if host_ms is not None:
+            self.host_count += 1
+            if self.host_count % DRIFT_EVERY == 0:
+                self.host.update(micros, host_ms)
+        if diff == 0:
+            self.duplicates += 1
+            return self.period_us / 1e6
+        if diff > RESYNC_US:
+            # Device restart or a long stall: keep the period, restart the fit
+            self.resyncs += 1
+            self._restart_fit()
+            self.samples = WARMUP_SAMPLES
+            return self.period_us / 1e6
+
+        steps = 1
+        if self.samples >= WARMUP_SAMPLES:
+            steps = max(1, int(diff / self.period_us + 0.5))
+            if steps > 1:
+                self.last_gap = steps - 1
+                self.dropped += steps - 1
+                self.gaps += 1
+        self.k += steps
+        self.u += diff
+
+        # Fit u = a + (p0 + c) * k, i.e. y = u - p0 * k = a + c * k (RLS, 2x2)
+        x = self.k
+        e = (self.u - self.p0 * x) - (self.a + self.c * x)
+        if self.samples >= WARMUP_SAMPLES:
+            # Late interrupt stamps are clipped before they reach the fit
+            limit = 4.0 * math.sqrt(self.var) + 0.5 * self.p0
+            self.var += 0.001 * (e * e - self.var)
+            e = max(-limit, min(limit, e))
+        lam = self.forgetting
+        q0 = self.p00 + self.p01 * x
+        q1 = self.p01 + self.p11 * x
+        denom = lam + q0 + q1 * x
+        k0 = q0 / denom
+        k1 = q1 / denom
+        self.a += k0 * e
+        self.c += k1 * e
+        self.p00 = (self.p00 - k0 * q0) / lam
+        self.p01 = (self.p01 - k0 * q1) / lam
+        self.p11 = (self.p11 - k1 * q1) / lam
+        self.samples += 1
+        if self.samples >= WARMUP_SAMPLES // 2:
+            self.period_us = self.p0 + self.c
+        return steps * self.period_us / 1e6
+
+
+class ClockSync:
+    def __init__(self, forgetting=0.99999):
+        self.forgetting = forgetting
+        self.reset()
+
+    def reset(self):
+        self.last_micros = None
+        self.device_ms = 0.0      # unwrapped device time
+        self.d0 = None
+        self.y0 = 0.0
+        self.offset = 0.0         # ms, relative to y0
+        self.drift = 0.0          # ms per s
+        self.p00, self.p01, self.p11 = 1e4, 0.0, 1.0
+        self.var = 1.0            # running residual variance (ms^2)
+        self.last_out = -math.inf
+        self.samples = 0
+
+    @property
+    def drift_ppm(self):
+        """Device clock rate error; positive when the device clock runs fast."""
+        return -self.drift * 1000.0
+
+    @property
+    def jitter_ms(self):
+        return math.sqrt(self.var)
+
+    def to_host(self, device_ms):
+        """Host time (ms) of an unwrapped device time, with the current fit."""
+        x = (device_ms - self.d0) / 1000.0
+        return device_ms + self.y0 + self.offset + self.drift * x
+
+    def update(self, micros, host_ms):
+        """Add one (micros, host arrival) pair; returns the sample's time on the host clock."""
+        if self.last_micros is None:
+            self.last_micros = micros
+            self.device_ms = micros / 1000.0
+            self.d0 = self.device_ms
+            self.y0 = host_ms - self.device_ms
+            self.samples = 1
+            self.last_out = host_ms
+            return host_ms
+
+        diff = micros - self.last_micros
+        if diff < 0:
+            diff += MICROS_WRAP
+        self.last_micros = micros
+        self.device_ms += diff / 1000.0
+        device_ms = self.device_ms
+
+        x = (device_ms - self.d0) / 1000.0
+        e = (host_ms - device_ms - self.y0) - (self.offset + self.drift * x)
+        if abs(e) > RELOCK_MS:
+            self.reset()
+            return self.update(micros, host_ms)
+
+        # Late batches only ever push host times up: clip the innovation
+        limit = 4.0 * math.sqrt(self.var) + 0.25
+        self.var += 0.001 * (e * e - self.var)
+        e = max(-limit, min(limit, e))
+
+        # RLS with phi = (1, x), written out for the 2x2 case
+        lam = self.forgetting
+        q0 = self.p00 + self.p01 * x
+        q1 = self.p01 + self.p11 * x
+        denom = lam + q0 + q1 * x
+        k0 = q0 / denom
+        k1 = q1 / denom
+        self.offset += k0 * e
+        self.drift += k1 * e
+        self.p00 = (self.p00 - k0 * q0) / lam
+        self.p01 = (self.p01 - k0 * q1) / lam
+        self.p11 = (self.p11 - k1 * q1) / lam
+        self.samples += 1
+
+        # Keep mapped times increasing while the fit moves
+        out = self.to_host(device_ms)
+        if out <= self.last_out:
+            out = self.last_out + 1e-6
+        self.last_out = out
+        return out
@@ -0,0 +1,110 @@
+"""
+Compact binary encoding for stored force curves.
+
+Layout (little endian):
+    header  : magic b"FPC", version u8, flags u8, sample count u32, t0 f64
+    payload : float32 columns dt, v, f, [p], [vel]  (optionally zlib-compressed)
+
+Times are stored as a float64 start time plus float32 deltas (dt[0] == 0).
+Power and velocity columns are omitted when a mode does not produce them.
+"""
+import json
+import struct
+import zlib
+import numpy as np
+
+MAGIC = b"FPC"
+VERSION = 1
+HEADER = struct.Struct("<3sBBId")
+
+FLAG_ZLIB = 1
+FLAG_POWER = 2
+FLAG_VEL = 4
+
+
+def curve_columns(curve):
+    """
+    Normalize a curve to columns: {"t": f64, "v", "f", "p", "vel"} arrays.
+    Accepts the list-of-dicts produced by PhysicsEngine.generate_power_curve
+    or an already decoded columnar curve. Missing p/vel columns are None.
+    """
+    if isinstance(curve, dict):
+        return curve
+    if not curve:
+        return {"t": np.zeros(0), "v": np.zeros(0, dtype=np.float32),
+                "f": np.zeros(0, dtype=np.float32), "p": None, "vel": None}
+
+    has_power = all(p.get('p') is not None for p in curve)
+    has_vel = all(p.get('vel') is not None for p in curve)
+    return {
+        "t": np.array([p['t'] for p in curve], dtype=np.float64),
+        "v": np.array([p.get('v', 0) for p in curve], dtype=np.float32),
+        "f": np.array([p.get('f', 0) for p in curve], dtype=np.float32),
+        "p": np.array([p['p'] for p in curve], dtype=np.float32) if has_power else None,
+        "vel": np.array([p['vel'] for p in curve], dtype=np.float32) if has_vel else None,
+    }
+
+
+def curve_length(curve):
+    if isinstance(curve, dict):
+        return len(curve["t"])
+    return len(curve) if curve else 0
+
+
+def encode_curve(curve, compress=True):
+    """Encode a curve (list of dicts or columns) to bytes."""
+    cols = curve_columns(curve)
+    t = np.asarray(cols["t"], dtype=np.float64)
+    n = len(t)
+    t0 = float(t[0]) if n else 0.0
+
+    dt = np.zeros(n, dtype=np.float32)
+    if n > 1:
+        dt[1:] = np.diff(t)
+
+    flags = 0
+    parts = [dt, np.asarray(cols["v"], dtype=np.float32), np.asarray(cols["f"], dtype=np.float32)]
+    if cols["p"] is not None:
+        flags |= FLAG_POWER
+        parts.append(np.asarray(cols["p"], dtype=np.float32))
+    if cols["vel"] is not None:
+        flags |= FLAG_VEL
+        parts.append(np.asarray(cols["vel"], dtype=np.float32))
+
+    payload = b"".join(p.tobytes() for p in parts)
+    if compress:
+        flags |= FLAG_ZLIB
+        payload = zlib.compress(payload, 1)
+
+    return HEADER.pack(MAGIC, VERSION, flags, n, t0) + payload
+
+
+def decode_curve(blob):
+    """Decode bytes produced by encode_curve into columns (views via np.frombuffer)."""
+    magic, version, flags, n, t0 = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported curve format {magic!r} v{version}")
+
+    payload = memoryview(blob)[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    cols = np.frombuffer(payload, dtype=np.float32, count=-1).reshape(-1, n) if n else np.zeros((5, 0), dtype=np.float32)
+    row = 3
+    t = t0 + np.cumsum(cols[0], dtype=np.float64)
+    p = vel = None
+    if flags & FLAG_POWER:
+        p = cols[row]
+        row += 1
+    if flags & FLAG_VEL:
+        vel = cols[row]
+    return {"t": t, "v": cols[1], "f": cols[2], "p": p, "vel": vel}
+
+
+def load_stored_curve(value):
+    """Decode a force_curve column value: binary blob or legacy JSON text."""
+    if not value:
+        return []
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return decode_curve(bytes(value))
+    return json.loads(value)
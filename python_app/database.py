@@ -1,76 +1,146 @@
 import sqlite3
 import json
+import pathlib
+import queue
+import threading
 import time
+from concurrent.futures import Future
+
+from curve_codec import encode_curve, load_stored_curve
+from migrations import META_COLUMNS, migrate
+import summaries
+
+# History list families and the modes whose results they show
+MODE_FAMILIES = {
+    "single": ["Single Jump", "Box Drop", "Box Drop Jump", "Push Up", "Squat", "Deadlift", "Power Clean"],
+    "contact": ["Contact Time"],
+    "estimation": ["Jump Estimation"],
+}
+
+# Scalar columns that may be used as metric thresholds in history queries
+HISTORY_METRICS = [
+    "height_flight",
+    "height_impulse",
+    "flight_time",
+    "peak_power",
+    "avg_power",
+    "max_force",
+    "velocity_takeoff",
+    "contact_time",
+]
+
+# No index hint: history pages read idx_jumps_history (mode, timestamp, id) per mode
+META_SELECT = "SELECT " + ", ".join(META_COLUMNS) + " FROM jumps"
+# History pages run newest first on (timestamp, id); NULL timestamps sort last
+HISTORY_ORDER = " ORDER BY timestamp DESC, id DESC"
+
+WRITE_QUEUE_SIZE = 1024
+MAX_GROUP_COMMIT = 256
+
 
 class DatabaseHandler:
+    """
+    SQLite storage. All writes go through one writer thread (WAL mode, group
+    commits) and return Futures; every reading thread gets its own read-only
+    connection, so reads never wait behind a commit. db_path must be a file.
+    """
     def __init__(self, db_path="jumps.db"):
         self.db_path = db_path
-        self.conn = None
+        self._local = threading.local()
+        self.write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        # Pre-bound metrics.Histogram timers, set by metrics.instrument()
+        self.write_latency = None
+        self.commit_time = None
         self.init_db()
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+
+    @property
+    def conn(self):
+        """Per-thread read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = pathlib.Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _writer_loop(self):
+        # Transactions are explicit: one per batch, one SAVEPOINT per op
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        running = True
+        while running:
+            batch = [self.write_queue.get()]
+            while len(batch) < MAX_GROUP_COMMIT:
+                try:
+                    batch.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = time.perf_counter()
+            done = []
+            submitted = []
+            conn.execute("BEGIN")
+            for item in batch:
+                if item is None:
+                    running = False
+                    continue
+                op, future, queued_at = item
+                submitted.append(queued_at)
+                # A failing op leaves nothing behind, the rest of the batch still commits
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = op(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    done.append((future, None, e))
+                else:
+                    conn.execute("RELEASE op")
+                    done.append((future, result, None))
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                done = [(f, None, e) for f, _, _ in done]
+
+            end = time.perf_counter()
+            if self.commit_time and submitted:
+                self.commit_time.observe(end - start)
+            if self.write_latency:
+                for queued_at in submitted:
+                    self.write_latency.observe(end - queued_at)
+
+            for future, result, error in done:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        conn.close()
+
+    def _submit(self, op):
+        """Queue op(conn) on the writer thread; returns a Future of its result."""
+        future = Future()
+        self.write_queue.put((op, future, time.perf_counter()))
+        return future
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        self.write_queue.put(None)
+        self.writer_thread.join(timeout=5.0)
 
     def init_db(self):
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        c = self.conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS jumps (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp REAL,
-            height_flight REAL,
-            height_impulse REAL,
-            peak_power REAL,
-            avg_power REAL,
-            flight_time REAL,
-            jumper_weight REAL,
-            velocity_takeoff REAL,
-            max_force REAL,
-            force_curve TEXT,
-            formula_peak_power REAL,
-            formula_avg_power REAL,
-            velocity_flight REAL,
-            contact_time REAL,
-            contact_start_time REAL,
-            contact_end_time REAL,
-            curve_start_time REAL
-        )''')
-        
-        c.execute('''CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT
-        )''')
-        
-        # Add missing columns if upgrading from older schema
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN formula_peak_power REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN formula_avg_power REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN velocity_flight REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN contact_time REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN contact_start_time REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN contact_end_time REAL")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE jumps ADD COLUMN curve_start_time REAL")
-        except sqlite3.OperationalError:
-            pass
-            
-        self.conn.commit()
+        migrate(self.db_path)
 
     def save_jump(self, jump_data):
-        curve_json = json.dumps(jump_data.get("force_curve", []))
+        """Blocking save; returns the new row id."""
+        return self.save_jump_async(jump_data).result()
+
+    def save_jump_async(self, jump_data):
+        """Queue a jump for the writer thread; returns a Future of the row id."""
+        curve = jump_data.get("force_curve", [])
         
         args = (
             jump_data.get("timestamp", time.time() * 1000),
@@ -82,85 +152,361 @@ class DatabaseHandler:
             jump_data.get("jumper_weight", 0),
             jump_data.get("velocity_takeoff", 0),
             jump_data.get("max_force", 0),
-            curve_json,
+            None,  # force_curve, encoded on the writer thread
             jump_data.get("formula_peak_power"),
             jump_data.get("formula_avg_power"),
             jump_data.get("velocity_flight"),
             jump_data.get("contact_time"),
             jump_data.get("contact_start_time"),
             jump_data.get("contact_end_time"),
-            jump_data.get("curve_start_time")
+            jump_data.get("curve_start_time"),
+            jump_data.get("mode"),
+            jump_data.get("athlete_id"),
+            jump_data.get("session_id"),
+            jump_data.get("archive_path"),
+            jump_data.get("sample_start"),
+            jump_data.get("sample_end"),
+            jump_data.get("source")
         )
         
-        c = self.conn.cursor()
-        c.execute('''INSERT INTO jumps 
-                  (timestamp, height_flight, height_impulse, peak_power, avg_power, 
-                   flight_time, jumper_weight, velocity_takeoff, max_force, force_curve,
-                   formula_peak_power, formula_avg_power, velocity_flight, contact_time,
-                   contact_start_time, contact_end_time, curve_start_time)
-                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', args)
-        self.conn.commit()
-        return c.lastrowid
+        def op(conn):
+            row = list(args)
+            row[9] = sqlite3.Binary(encode_curve(curve))
+            c = conn.cursor()
+            c.execute('''INSERT INTO jumps 
+                      (timestamp, height_flight, height_impulse, peak_power, avg_power, 
+                       flight_time, jumper_weight, velocity_takeoff, max_force, force_curve,
+                       formula_peak_power, formula_avg_power, velocity_flight, contact_time,
+                       contact_start_time, contact_end_time, curve_start_time,
+                       mode, athlete_id, session_id, archive_path, sample_start, sample_end, source)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', row)
+            summaries.add_jump(conn, {
+                "athlete_id": jump_data.get("athlete_id"),
+                "session_id": jump_data.get("session_id"),
+                "height_flight": row[1],
+                "peak_power": row[3],
+                "contact_time": row[13],
+            })
+            return c.lastrowid
+        return self._submit(op)
 
     def load_history(self, limit=50):
+        """Newest jumps, scalar metrics only - curves come from load_curve()."""
+        return self.query_history(0, limit)
+
+    def load_curve(self, jump_id):
+        """Load and decode the force curve of a single jump."""
         c = self.conn.cursor()
-        c.execute("SELECT * FROM jumps ORDER BY id DESC LIMIT ?", (limit,))
-        rows = c.fetchall()
+        c.execute("SELECT force_curve FROM jumps WHERE id = ?", (jump_id,))
+        row = c.fetchone()
+        if row is None:
+            return []
+        try:
+            return load_stored_curve(row[0])
+        except ValueError:
+            return []
+
+    def _row_to_jump(self, r, col_idx):
+        def get_val(name, default=None):
+            idx = col_idx.get(name)
+            return r[idx] if idx is not None and idx < len(r) else default
+
+        j = {
+            "_id": get_val("id"),
+            "mode": get_val("mode"),
+            "athlete_id": get_val("athlete_id"),
+            "session_id": get_val("session_id"),
+            "timestamp": get_val("timestamp"),
+            "height_flight": get_val("height_flight"),
+            "height_impulse": get_val("height_impulse"),
+            "peak_power": get_val("peak_power"),
+            "avg_power": get_val("avg_power"),
+            "flight_time": get_val("flight_time"),
+            "jumper_weight": get_val("jumper_weight"),
+            "velocity_takeoff": get_val("velocity_takeoff"),
+            "max_force": get_val("max_force"),
+            "formula_peak_power": get_val("formula_peak_power"),
+            "formula_avg_power": get_val("formula_avg_power"),
+            "velocity_flight": get_val("velocity_flight"),
+            "contact_time": get_val("contact_time"),
+            "contact_start_time": get_val("contact_start_time"),
+            "contact_end_time": get_val("contact_end_time"),
+            "curve_start_time": get_val("curve_start_time")
+        }
         
-        # Get column names to handle schema variations gracefully
-        col_names = [description[0] for description in c.description]
-        col_idx = {name: i for i, name in enumerate(col_names)}
+        # Remove None values to avoid 'contact_time' in j being true for None
+        if j["contact_time"] is None:
+            del j["contact_time"]
         
-        history = []
-        for r in rows:
-            def get_val(name, default=None):
-                idx = col_idx.get(name)
-                return r[idx] if idx is not None and idx < len(r) else default
-
-            j = {
-                "_id": get_val("id"),
-                "timestamp": get_val("timestamp"),
-                "height_flight": get_val("height_flight"),
-                "height_impulse": get_val("height_impulse"),
-                "peak_power": get_val("peak_power"),
-                "avg_power": get_val("avg_power"),
-                "flight_time": get_val("flight_time"),
-                "jumper_weight": get_val("jumper_weight"),
-                "velocity_takeoff": get_val("velocity_takeoff"),
-                "max_force": get_val("max_force"),
-                "force_curve": [],
-                "formula_peak_power": get_val("formula_peak_power"),
-                "formula_avg_power": get_val("formula_avg_power"),
-                "velocity_flight": get_val("velocity_flight"),
-                "contact_time": get_val("contact_time"),
-                "contact_start_time": get_val("contact_start_time"),
-                "contact_end_time": get_val("contact_end_time"),
-                "curve_start_time": get_val("curve_start_time")
-            }
-            
-            # Remove None values to avoid 'contact_time' in j being true for None
-            if j["contact_time"] is None:
-                del j["contact_time"]
-            
-            curve_str = get_val("force_curve")
-            if curve_str:
+        # Curves are only present when the query selected them
+        if "force_curve" in col_idx:
+            try:
+                j["force_curve"] = load_stored_curve(get_val("force_curve"))
+            except:
+                j["force_curve"] = []
+                
+        return j
+
+    @staticmethod
+    def _history_modes(family=None, mode=None):
+        """Modes the history filters allow, or None for any mode."""
+        modes = MODE_FAMILIES.get(family)
+        if mode is not None:
+            modes = [mode] if modes is None or mode in modes else []
+        return modes
+
+    def _history_filter(self, family=None, start_ts=None, end_ts=None, metric=None, min_value=None, max_value=None,
+                        athlete_id=None, session_id=None, mode=None):
+        """Build the WHERE clause shared by the paged history queries."""
+        clauses = []
+        params = []
+        if athlete_id is not None:
+            clauses.append("athlete_id = ?")
+            params.append(athlete_id)
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        modes = self._history_modes(family, mode)
+        if modes is not None:
+            clauses.append("mode IN (" + ", ".join("?" * len(modes)) + ")")
+            params.extend(modes)
+        if start_ts is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            clauses.append("timestamp < ?")
+            params.append(end_ts)
+        if metric in HISTORY_METRICS:
+            if min_value is not None:
+                clauses.append(f"{metric} >= ?")
+                params.append(min_value)
+            if max_value is not None:
+                clauses.append(f"{metric} <= ?")
+                params.append(max_value)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    def count_history(self, **filters):
+        """Number of jumps matching the history filters."""
+        where, params = self._history_filter(**filters)
+        c = self.conn.cursor()
+        c.execute("SELECT COUNT(*) FROM jumps" + where, params)
+        return c.fetchone()[0]
+
+    @staticmethod
+    def history_key(jump):
+        """The (timestamp, id) position of a jump in the history order."""
+        return (jump["timestamp"], jump["_id"])
+
+    @staticmethod
+    def _keyset(key, older, inclusive=False):
+        """
+        Rows after (older) or before key in the history order, as clauses that
+        each seek the (mode, timestamp, id) index; NULL timestamps are a separate range.
+        """
+        timestamp, jump_id = key
+        if older:
+            op = "<=" if inclusive else "<"
+            if timestamp is None:
+                return [(f"timestamp IS NULL AND id {op} ?", [jump_id])]
+            return [(f"timestamp <= ? AND (timestamp < ? OR id {op} ?)", [timestamp, timestamp, jump_id]),
+                    ("timestamp IS NULL", [])]
+        op = ">=" if inclusive else ">"
+        if timestamp is None:
+            return [(f"timestamp IS NULL AND id {op} ?", [jump_id]), ("timestamp IS NOT NULL", [])]
+        return [(f"timestamp >= ? AND (timestamp > ? OR id {op} ?)", [timestamp, timestamp, jump_id])]
+
+    def _history_sql(self, select, legs, parts, order):
+        """
+        select over every (leg, keyset part) pair, merged on (timestamp, id).
+        Each branch reads one index range in order, so SQLite merges them
+        instead of sorting the matching rows.
+        """
+        queries = []
+        args = []
+        for where, params in legs:
+            for clause, key_params in parts:
+                queries.append(select + (self._and(where, clause) if clause else where))
+                args.extend(params + key_params)
+        sql = queries[0] if len(queries) == 1 else "SELECT * FROM (" + " UNION ALL ".join(queries) + ")"
+        return sql + order + " LIMIT ? OFFSET ?", args
+
+    def _history_legs(self, filters):
+        """One (where, params) per allowed mode - mode IN (...) cannot be read in timestamp order."""
+        modes = self._history_modes(filters.get("family"), filters.get("mode"))
+        where, params = self._history_filter(**dict(filters, family=None, mode=None))
+        if modes is None:
+            return [(where, params)]
+        return [(self._and(where, "mode = ?"), params + [mode]) for mode in modes]
+
+    def query_history(self, offset=0, limit=50, start=None, **filters):
+        """
+        One newest-first page of jumps matching the history filters.
+        Without start the page begins offset rows from the newest. With start,
+        the history_key() of a row already fetched, it begins offset rows
+        below that row (above it if offset is negative): pages are keyed on
+        (timestamp, id) like iter_jumps, so OFFSET only walks the rows
+        scrolled over, not everything from the top.
+        """
+        legs = self._history_legs(filters)
+        if not legs:
+            return []
+        c = self.conn.cursor()
+        if start is not None and offset < 0:
+            # Step up to the row -offset above start (or the newest), then page down from it
+            sql, args = self._history_sql("SELECT timestamp, id FROM jumps", legs,
+                                          self._keyset(start, older=False), " ORDER BY timestamp ASC, id ASC")
+            above = c.execute(sql, args + [-offset, 0]).fetchall()
+            if above:
+                start = tuple(above[-1])
+            offset = 0
+        parts = [(None, [])] if start is None else self._keyset(start, older=True, inclusive=True)
+        sql, args = self._history_sql(META_SELECT, legs, parts, HISTORY_ORDER)
+        c.execute(sql, args + [limit, offset])
+        rows = c.fetchall()
+        col_idx = {d[0]: i for i, d in enumerate(c.description)}
+        return [self._row_to_jump(r, col_idx) for r in rows]
+
+    @staticmethod
+    def _and(where, clause):
+        return where + (" AND " if where else " WHERE ") + clause
+
+    def iter_jumps(self, batch_size=1000, with_curves=False, **filters):
+        """
+        Yield pages of jumps matching the history filters, oldest first.
+        Pages are keyed on id (not OFFSET), so every page costs the same and
+        only one page is in memory at a time. Curves are decoded only when
+        with_curves is set.
+        """
+        where, params = self._history_filter(**filters)
+        where += (" AND " if where else " WHERE ") + "id > ?"
+        c = self.conn.cursor()
+        last_id = 0
+        while True:
+            c.execute(META_SELECT + where + " ORDER BY id LIMIT ?", params + [last_id, batch_size])
+            rows = c.fetchall()
+            if not rows:
+                return
+            col_idx = {d[0]: i for i, d in enumerate(c.description)}
+            page = [self._row_to_jump(r, col_idx) for r in rows]
+            last_id = page[-1]["_id"]
+            if with_curves:
+                ids = [jump["_id"] for jump in page]
+                c.execute("SELECT id, force_curve FROM jumps WHERE id IN (" + ", ".join("?" * len(ids)) + ")", ids)
+                blobs = dict(c.fetchall())
+                for jump in page:
+                    try:
+                        jump["force_curve"] = load_stored_curve(blobs.get(jump["_id"]))
+                    except ValueError:
+                        jump["force_curve"] = []
+            yield page
+
+    def get_archive_range(self, jump_id):
+        """(archive_path, sample_start, sample_end) of a jump, or None if not archived."""
+        c = self.conn.cursor()
+        c.execute("SELECT archive_path, sample_start, sample_end FROM jumps WHERE id = ?", (jump_id,))
+        row = c.fetchone()
+        return row if row and row[0] else None
+
+    def has_source(self, source):
+        """True if jumps imported from this source file are already stored."""
+        c = self.conn.cursor()
+        c.execute("SELECT 1 FROM jumps WHERE source = ? LIMIT 1", (source,))
+        return c.fetchone() is not None
+
+    def get_jump(self, jump_id):
+        """Scalar metrics of one jump (without its curve)."""
+        c = self.conn.cursor()
+        c.execute(META_SELECT + " WHERE id = ?", (jump_id,))
+        row = c.fetchone()
+        if row is None:
+            return None
+        col_idx = {d[0]: i for i, d in enumerate(c.description)}
+        return self._row_to_jump(row, col_idx)
+
+    def delete_jump(self, jump_id):
+        """Queue a delete; returns a Future."""
+        def op(conn):
+            summaries.remove_jump(conn, jump_id)
+            return conn.execute("DELETE FROM jumps WHERE id = ?", (jump_id,)).rowcount
+        return self._submit(op)
+
+    def migrate_curves(self, batch_size=200, pause=0.01):
+        """
+        Re-encode legacy JSON text curves as binary blobs, in small batches
+        through the writer thread so the app stays responsive.
+        Returns the number of rows converted.
+        """
+        conn = self.conn
+        converted = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, force_curve FROM jumps WHERE id > ? AND typeof(force_curve) = 'text' "
+                "ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            updates = []
+            for jump_id, curve_str in rows:
+                last_id = jump_id
                 try:
-                    j["force_curve"] = json.loads(curve_str)
-                except:
-                    pass
-                    
-            history.append(j)
-        return history
+                    curve = json.loads(curve_str)
+                except ValueError:
+                    continue
+                updates.append((sqlite3.Binary(encode_curve(curve)), jump_id))
+            self._submit(lambda wc, u=updates: wc.executemany(
+                "UPDATE jumps SET force_curve = ? WHERE id = ?", u)).result()
+            converted += len(updates)
+            time.sleep(pause)
+        if converted:
+            print(f"Migrated {converted} force curves to binary format")
+        return converted
+
+    def migrate_curves_async(self):
+        """Run migrate_curves on a background daemon thread."""
+        thread = threading.Thread(target=self.migrate_curves, daemon=True)
+        thread.start()
+        return thread
 
     def clear(self):
+        """Queue deletion of all jumps; returns a Future."""
+        def op(conn):
+            conn.execute("DELETE FROM athlete_summaries")
+            conn.execute("DELETE FROM session_summaries")
+            return conn.execute("DELETE FROM jumps").rowcount
+        return self._submit(op)
+
+    def create_athlete(self, name):
+        """Queue creation of an athlete (or reuse one with that name); Future of its id."""
+        def op(conn):
+            conn.execute("INSERT OR IGNORE INTO athletes (name, created) VALUES (?, ?)", (name, time.time() * 1000))
+            return conn.execute("SELECT id FROM athletes WHERE name = ?", (name,)).fetchone()[0]
+        return self._submit(op)
+
+    def list_athletes(self):
+        """[(id, name)] sorted by name."""
         c = self.conn.cursor()
-        c.execute("DELETE FROM jumps")
-        self.conn.commit()
+        c.execute("SELECT id, name FROM athletes ORDER BY name")
+        return c.fetchall()
+
+    def start_session(self, athlete_id=None):
+        """Queue a new session row; Future of its id."""
+        return self._submit(lambda conn: conn.execute(
+            "INSERT INTO sessions (athlete_id, started) VALUES (?, ?)",
+            (athlete_id, time.time() * 1000)).lastrowid)
+
+    def end_session(self, session_id):
+        return self._submit(lambda conn: conn.execute(
+            "UPDATE sessions SET ended = ? WHERE id = ?", (time.time() * 1000, session_id)).rowcount)
+
+    def get_summary(self, scope, scope_id):
+        """Precomputed summary for scope "athlete" or "session" (see summaries.read_summary)."""
+        return summaries.read_summary(self.conn, scope, scope_id)
 
     def save_setting(self, key, value):
-        c = self.conn.cursor()
-        c.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
-        self.conn.commit()
+        """Queue a settings write; returns a Future."""
+        return self._submit(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value))).rowcount)
 
     def load_setting(self, key, default=None):
         c = self.conn.cursor()
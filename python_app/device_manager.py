@@ -0,0 +1,346 @@
+"""
+Multi-plate acquisition - N plates on one common timebase.
+
+Each plate keeps its own SerialHandler and PhysicsEngine (so per-plate
+detection, tare and calibration work as before). In addition every sample is
+mapped from the plate's micros clock onto the host clock by a
+clock.ClockSync, which tracks each crystal's drift online. A merge thread
+resamples all plates onto one grid at the plate rate and writes the merged
+ring:
+
+    column 0        common time (ms)
+    columns 1..N    force per plate (kg)
+    column N+1      summed force (kg)
+
+The summed force drives a combined PhysicsEngine, so every existing mode
+(jumps, contact time, ...) works on the total. Combined results carry
+per-plate asymmetry metrics computed over the jump window.
+
+The merged stream advances with the slowest plate; a disconnected plate
+stalls it until it is back.
+
+The manager runs from this module's command line for now; the GUI
+(main.py) and headless.py stay single-plate until their journal, archive,
+link health and status paths handle more than one handler.
+
+    manager = DeviceManager(2)
+    manager.on_jump_callback = print
+    manager.connect(["/dev/ttyUSB0", "/dev/ttyUSB1"])
+
+Simulated dual-plate run (1288 Hz each, drifting clocks, 55/45 split):
+
+    python device_manager.py --simulate --seconds 60
+"""
+import argparse
+import math
+import threading
+import time
+
+import numpy as np
+
+from clock import ClockSync
+from curve_codec import curve_columns
+from physics import BUFFER_SIZE, PhysicsEngine
+from serial_handler import SerialHandler
+
+STAGE_SIZE = 8192        # per-plate staging ring (~6 s)
+MERGE_INTERVAL = 0.01    # s
+
+
+class PlateEngine(PhysicsEngine):
+    """A plate's engine; also reports each sample to the device manager."""
+
+    def __init__(self, manager, index, config=None, params=None):
+        super().__init__(config, params)
+        self.manager = manager
+        self.index = index
+
+    def process_sample(self, raw, timestamp, micros=0):
+        res = super().process_sample(raw, timestamp, micros)
+        self.manager.on_plate_sample(self.index, res["display_kg"], timestamp, micros)
+        return res
+
+
+class _Stage:
+    """Single-writer ring of (common time, kg); count is published after the row."""
+
+    def __init__(self):
+        self.t = np.zeros(STAGE_SIZE)
+        self.kg = np.zeros(STAGE_SIZE)
+        self.count = 0
+
+    def append(self, t, kg):
+        i = self.count % STAGE_SIZE
+        self.t[i] = t
+        self.kg[i] = kg
+        self.count += 1
+
+    def last(self, n, count):
+        """Newest n rows before count, oldest first."""
+        n = min(n, count, STAGE_SIZE)
+        idx = np.arange(count - n, count) % STAGE_SIZE
+        return self.t[idx], self.kg[idx]
+
+
+def asymmetry_metrics(t, forces, gravity=9.80665):
+    """
+    Per-plate metrics over one jump window, vectorized over plates.
+    t: (n,) ms, forces: (n, plates) kg. Returns lists indexed by plate and,
+    for two plates, symmetry indices (a - b) / (a + b) * 100.
+    """
+    forces = np.asarray(forces, dtype=np.float64)
+    if len(t) < 2:
+        return {}
+    dt = np.diff(t) / 1000.0
+    newtons = forces * gravity
+    # Trapezoidal impulse per plate
+    impulse = ((newtons[1:] + newtons[:-1]) * 0.5 * dt[:, None]).sum(axis=0)
+    peak = newtons.max(axis=0)
+    mean = newtons.mean(axis=0)
+    total = impulse.sum()
+    metrics = {
+        "plate_impulse_ns": impulse.tolist(),
+        "plate_peak_force_n": peak.tolist(),
+        "plate_mean_force_n": mean.tolist(),
+        "plate_impulse_share_pct": (impulse / total * 100).tolist() if total > 0 else None,
+    }
+    if forces.shape[1] == 2:
+        def index(a):
+            s = a[0] + a[1]
+            return float((a[0] - a[1]) / s * 100) if s else 0.0
+        metrics["asymmetry_impulse_pct"] = index(impulse)
+        metrics["asymmetry_peak_force_pct"] = index(peak)
+    return metrics
+
+
+class DeviceManager:
+    def __init__(self, n_plates=2, config=None, params=None):
+        self.n = n_plates
+        self.clocks = [ClockSync() for _ in range(n_plates)]
+        self.stages = [_Stage() for _ in range(n_plates)]
+        self.plates = [PlateEngine(self, i, config, params) for i in range(n_plates)]
+        self.handlers = [SerialHandler(engine) for engine in self.plates]
+        for i, handler in enumerate(self.handlers):
+            handler.on_jump_callback = lambda result, i=i: self._on_plate_result(i, result)
+
+        # Summed force is fed back as raw counts on the default scale with no
+        # zero offset, so the modes' raw-unit thresholds keep their meaning
+        self.combined = PhysicsEngine(config, params)
+        self.dt_ms = 1000.0 / self.combined.config["frequency"]
+
+        self.merged = np.zeros((BUFFER_SIZE, n_plates + 2))
+        self.merged_idx = 0
+        self.merged_count = 0
+        self.next_t = None
+
+        self.on_jump_callback = None          # combined results
+        self.on_plate_jump_callback = None    # (plate index, result)
+        self.running = False
+        self.thread = None
+
+    # --- per-plate path (serial threads) ---
+    def on_plate_sample(self, index, kg, host_ms, micros):
+        t = self.clocks[index].update(micros, host_ms) if micros > 0 else host_ms
+        self.stages[index].append(t, kg)
+
+    def _on_plate_result(self, index, result):
+        result["plate"] = index
+        if self.on_plate_jump_callback:
+            self.on_plate_jump_callback(index, result)
+
+    # --- merge ---
+    def merge(self):
+        """Resample new data of all plates onto the common grid. Returns rows added."""
+        counts = [stage.count for stage in self.stages]
+        if min(counts) < 2:
+            return 0
+        latest = [stage.t[(c - 1) % STAGE_SIZE] for stage, c in zip(self.stages, counts)]
+        t_end = min(latest)
+        if self.next_t is None:
+            earliest = [stage.last(STAGE_SIZE, c)[0][0] for stage, c in zip(self.stages, counts)]
+            self.next_t = max(earliest)
+        n = int((t_end - self.next_t) / self.dt_ms) + 1
+        if n <= 0:
+            return 0
+        n = min(n, BUFFER_SIZE)
+        grid = self.next_t + self.dt_ms * np.arange(n)
+        self.next_t = grid[-1] + self.dt_ms
+
+        rows = np.empty((n, self.n + 2))
+        rows[:, 0] = grid
+        # Rows since the last merge plus margin; plates may run slightly faster than the grid
+        lookback = min(2 * n + 64, STAGE_SIZE)
+        for i, (stage, c) in enumerate(zip(self.stages, counts)):
+            t, kg = stage.last(lookback, c)
+            rows[:, 1 + i] = np.interp(grid, t, kg)
+        rows[:, -1] = rows[:, 1:-1].sum(axis=1)
+        self._write_rows(rows)
+
+        combined = self.combined
+        raw_per_kg = combined.config["raw_per_kg"]
+        for t, total in zip(grid.tolist(), rows[:, -1].tolist()):
+            micros = int(t * 1000) % 2**32 or 1
+            res = combined.process_sample(total * raw_per_kg, t, micros)
+            if res["result"]:
+                self._on_combined_result(res["result"])
+        return n
+
+    def _write_rows(self, rows):
+        n = len(rows)
+        i = self.merged_idx
+        first = min(n, BUFFER_SIZE - i)
+        self.merged[i:i + first] = rows[:first]
+        self.merged[:n - first] = rows[first:]
+        self.merged_idx = (i + n) % BUFFER_SIZE
+        self.merged_count += n
+
+    def merged_window(self, duration_ms):
+        """Merged rows of the last duration_ms, oldest first."""
+        n = min(self.merged_count, BUFFER_SIZE)
+        idx = np.arange(self.merged_idx - n, self.merged_idx) % BUFFER_SIZE
+        rows = self.merged[idx]
+        if not len(rows):
+            return rows
+        return rows[rows[:, 0] >= rows[-1, 0] - duration_ms]
+
+    def _on_combined_result(self, result):
+        curve = curve_columns(result.get("force_curve"))
+        if len(curve["t"]) > 1:
+            t0, t1 = curve["t"][0], curve["t"][-1]
+            rows = self.merged_window(self.merged[(self.merged_idx - 1) % BUFFER_SIZE, 0] - t0 + self.dt_ms)
+            rows = rows[rows[:, 0] <= t1]
+            result.update(asymmetry_metrics(rows[:, 0], rows[:, 1:-1], self.combined.config["gravity"]))
+        result["plates"] = self.n
+        result["clock_drift_ppm"] = [clock.drift_ppm for clock in self.clocks]
+        if self.on_jump_callback:
+            self.on_jump_callback(result)
+
+    def _merge_loop(self):
+        while self.running:
+            self.merge()
+            time.sleep(MERGE_INTERVAL)
+
+    # --- lifecycle and commands ---
+    def connect(self, ports, baud_rate=921600):
+        ok = all(handler.connect(port, baud_rate) for handler, port in zip(self.handlers, ports))
+        if not ok:
+            self.disconnect()
+            return False
+        self.start()
+        return True
+
+    def start(self):
+        for clock in self.clocks:
+            clock.reset()
+        self.combined.reset()
+        self.next_t = None
+        self.running = True
+        self.thread = threading.Thread(target=self._merge_loop, daemon=True)
+        self.thread.start()
+
+    def disconnect(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        for handler in self.handlers:
+            if handler.connected:
+                handler.disconnect()
+
+    def tare(self):
+        for engine in self.plates:
+            engine.start_tare()
+
+    def set_mode(self, mode_name):
+        self.combined.set_mode(mode_name)
+        for engine in self.plates:
+            engine.set_mode(mode_name)
+
+
+# --- simulation ---
+def simulate(seconds=60.0, hz=1288, drifts_ppm=(60.0, -40.0), split=(0.55, 0.45), seed=1):
+    """
+    Two (or more) simulated plates at hz each with drifting clocks and USB-like
+    batched arrival times, one jump every 10 s with the given force split.
+    Runs faster than real time through the same engine and merge paths.
+    """
+    rng = np.random.default_rng(seed)
+    n_plates = len(drifts_ppm)
+    manager = DeviceManager(n_plates)
+    results = []
+    manager.on_jump_callback = results.append
+
+    body = 75.0
+    cycle = [body] * 9000 + [body * 0.55] * 150 + [body * 2.0] * 250 + [0.0] * 500 + [body * 2.2] * 200
+    n = int(seconds * hz)
+    profile = np.resize(np.array(cycle), n)
+
+    t_true = np.arange(n) / hz * 1000.0
+    streams = []
+    for i, ppm in enumerate(drifts_ppm):
+        # Each plate samples on its own clock; the sampling instants drift vs the host
+        dev_ms = t_true * (1 + ppm * 1e-6) + rng.uniform(0, 1e6)
+        sample_true = t_true + rng.uniform(0, 1000.0 / hz)
+        micros = (dev_ms * 1000).astype(np.int64) % (1 << 32)
+        arrival = np.ceil(sample_true) + rng.exponential(0.4, n)
+        arrival[rng.random(n) < 0.001] += 15.0           # occasional late USB batch
+        arrival = np.maximum.accumulate(arrival)
+        kg = profile * split[i] + rng.normal(0, 0.2, n)
+        raw = (kg * manager.plates[i].config["raw_per_kg"]).astype(np.int64)
+        streams.append((arrival, raw, micros, sample_true))
+
+    merge_every = int(MERGE_INTERVAL * hz)
+    for k in range(n):
+        for i, (arrival, raw, micros, _) in enumerate(streams):
+            manager.plates[i].process_sample(int(raw[k]), float(arrival[k]), int(micros[k]) or 1)
+        if k % merge_every == 0:
+            manager.merge()
+    manager.merge()
+
+    # Alignment error: mapped time vs the true sampling instant (after 10 s of lock-in)
+    errors = []
+    for i, (_, _, _, sample_true) in enumerate(streams):
+        stage = manager.stages[i]
+        t, _ = stage.last(STAGE_SIZE, stage.count)
+        errors.append(t - sample_true[n - len(t):])
+    return manager, results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-plate acquisition")
+    parser.add_argument("--simulate", action="store_true", help="run a simulated dual-plate session")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--ports", nargs="+", help="serial ports, one per plate")
+    args = parser.parse_args()
+
+    if args.simulate:
+        start = time.perf_counter()
+        manager, results, errors = simulate(args.seconds)
+        print(f"Simulated {args.seconds:.0f} s x {manager.n} plates in {time.perf_counter() - start:.1f} s")
+        for i, (clock, err) in enumerate(zip(manager.clocks, errors)):
+            print(f"  plate {i}: drift {clock.drift_ppm:+.1f} ppm, "
+                  f"alignment bias {err.mean():.3f} ms, spread {err.std():.3f} ms")
+        rel = errors[0] - errors[1]
+        print(f"  relative alignment plate 0 vs 1: {rel.mean():+.3f} ms +- {rel.std():.3f} ms")
+        for r in results:
+            print(f"  jump {r['height_flight']:.1f} cm, impulse asymmetry "
+                  f"{r.get('asymmetry_impulse_pct', math.nan):+.1f} %, peak asymmetry "
+                  f"{r.get('asymmetry_peak_force_pct', math.nan):+.1f} %")
+        return
+    if not args.ports:
+        parser.error("give --ports or --simulate")
+
+    manager = DeviceManager(len(args.ports))
+    manager.on_jump_callback = lambda r: print({k: v for k, v in r.items()
+                                                if k not in ("force_curve", "phase_times")})
+    if not manager.connect(args.ports):
+        return
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        manager.disconnect()
+
+
+if __name__ == "__main__":
+    main()
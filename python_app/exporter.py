@@ -0,0 +1,272 @@
+"""
+Streaming bulk export of jumps and curves.
+
+Jumps are read from DatabaseHandler.iter_jumps() one page at a time, so
+memory stays flat however large the history is. Formats:
+
+    csv      scalar metrics, one row per jump
+    npz      columnar curves: ids, offsets (n + 1) and concatenated
+             t / v / f / p / vel columns; jump i is offsets[i]:offsets[i + 1]
+    chunked  directory with meta.json, scalars.csv and one curves_NNNNN.npz
+             (same layout as npz) per page - readers can load any chunk alone
+
+    python exporter.py out.csv --athlete 3 --from 2026-01-01
+    python exporter.py --benchmark 50000
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from curve_codec import curve_columns
+from migrations import META_COLUMNS
+
+EXPORT_FORMATS = ("csv", "npz", "chunked")
+CURVE_COLUMNS = {
+    "t": np.dtype("<f8"),
+    "v": np.dtype("<f4"),
+    "f": np.dtype("<f4"),
+    "p": np.dtype("<f4"),     # NaN where the mode has no power column
+    "vel": np.dtype("<f4"),
+}
+PAGE_SIZE = 1000
+
+
+def _csv_row(jump):
+    return [jump.get("_id") if name == "id" else jump.get(name) for name in META_COLUMNS]
+
+
+def _curve_arrays(jump):
+    """Curve columns of one jump with every CURVE_COLUMNS entry present."""
+    cols = curve_columns(jump.get("force_curve") or [])
+    n = len(cols["t"])
+    return {name: np.full(n, np.nan, dtype=dt) if cols.get(name) is None else np.asarray(cols[name], dtype=dt)
+            for name, dt in CURVE_COLUMNS.items()}
+
+
+def _page_arrays(page):
+    """Columnar arrays (ids, offsets, curve columns) for one page of jumps."""
+    curves = [_curve_arrays(j) for j in page]
+    lengths = np.array([len(c["t"]) for c in curves], dtype=np.int64)
+    arrays = {
+        "ids": np.array([j["_id"] for j in page], dtype=np.int64),
+        "offsets": np.concatenate(([0], np.cumsum(lengths))),
+    }
+    for name, dt in CURVE_COLUMNS.items():
+        arrays[name] = np.concatenate([c[name] for c in curves]) if curves else np.zeros(0, dtype=dt)
+    return arrays
+
+
+def _write_npy_member(zf, name, dtype, shape, source):
+    """Stream a .npy member into zf; source is a file of raw array bytes."""
+    with zf.open(name + ".npy", "w", force_zip64=True) as out:
+        np.lib.format.write_array_header_1_0(out, {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": shape,
+        })
+        shutil.copyfileobj(source, out, 1 << 20)
+
+
+def export_csv(db, path, batch_size=PAGE_SIZE, on_progress=None, **filters):
+    """Write scalar metrics of all matching jumps to path. Returns the row count."""
+    total = db.count_history(**filters)
+    done = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(META_COLUMNS)
+        for page in db.iter_jumps(batch_size, **filters):
+            writer.writerows(_csv_row(j) for j in page)
+            done += len(page)
+            if on_progress:
+                on_progress(done, total)
+    return done
+
+
+def export_npz(db, path, batch_size=PAGE_SIZE, compress=False, on_progress=None, **filters):
+    """
+    Write curves of all matching jumps to one columnar .npz. Columns are
+    spooled to temp files page by page and then streamed into the archive,
+    since a .npy header needs the final length. Returns the jump count.
+    """
+    total = db.count_history(**filters)
+    done = 0
+    n_samples = 0
+    spool = tempfile.mkdtemp(prefix="export_", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        files = {name: open(os.path.join(spool, name), "w+b") for name in ["ids", "offsets", *CURVE_COLUMNS]}
+        files["offsets"].write(np.zeros(1, dtype=np.int64).tobytes())
+        for page in db.iter_jumps(batch_size, with_curves=True, **filters):
+            arrays = _page_arrays(page)
+            arrays["offsets"] = arrays["offsets"][1:] + n_samples
+            n_samples = int(arrays["offsets"][-1])
+            for name, arr in arrays.items():
+                files[name].write(arr.tobytes())
+            done += len(page)
+            if on_progress:
+                on_progress(done, total)
+
+        shapes = {"ids": (done,), "offsets": (done + 1,)}
+        dtypes = {"ids": np.dtype("<i8"), "offsets": np.dtype("<i8")}
+        for name, dt in CURVE_COLUMNS.items():
+            shapes[name] = (n_samples,)
+            dtypes[name] = dt
+        method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(path, "w", compression=method, allowZip64=True) as zf:
+            for name, f in files.items():
+                f.seek(0)
+                _write_npy_member(zf, name, dtypes[name], shapes[name], f)
+                f.close()
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
+    return done
+
+
+def export_chunked(db, path, batch_size=PAGE_SIZE, compress=False, on_progress=None, **filters):
+    """Write scalars.csv and one curve chunk per page into directory path. Returns the jump count."""
+    os.makedirs(path, exist_ok=True)
+    total = db.count_history(**filters)
+    done = 0
+    chunks = []
+    save = np.savez_compressed if compress else np.savez
+    with open(os.path.join(path, "scalars.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(META_COLUMNS)
+        for page in db.iter_jumps(batch_size, with_curves=True, **filters):
+            writer.writerows(_csv_row(j) for j in page)
+            name = f"curves_{len(chunks):05d}.npz"
+            save(os.path.join(path, name), **_page_arrays(page))
+            chunks.append({"file": name, "first_id": page[0]["_id"], "last_id": page[-1]["_id"],
+                           "count": len(page)})
+            done += len(page)
+            if on_progress:
+                on_progress(done, total)
+
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"count": done, "filters": filters, "exported": time.time() * 1000,
+                   "curve_columns": {name: dt.str for name, dt in CURVE_COLUMNS.items()},
+                   "chunks": chunks}, f, indent=1)
+    return done
+
+
+def export(db, path, fmt=None, **kwargs):
+    """Export in the format given, or inferred from the path (.csv, .npz, else chunked)."""
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = {".csv": "csv", ".npz": "npz"}.get(ext, "chunked")
+    if fmt == "csv":
+        return export_csv(db, path, **kwargs)
+    if fmt == "npz":
+        return export_npz(db, path, **kwargs)
+    if fmt == "chunked":
+        return export_chunked(db, path, **kwargs)
+    raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+
+
+def _synthetic_jump(rng, i, n_samples):
+    t0 = 1.7e12 + i * 5000.0
+    t = t0 + np.arange(n_samples) * (1000.0 / 1288)
+    kg = 75 + 60 * np.sin(np.linspace(0, np.pi, n_samples)) + rng.normal(0, 0.5, n_samples)
+    return {
+        "timestamp": t[-1],
+        "mode": "Single Jump",
+        "height_flight": rng.uniform(20, 50),
+        "height_impulse": rng.uniform(20, 50),
+        "peak_power": rng.uniform(2000, 5000),
+        "avg_power": rng.uniform(1000, 2500),
+        "flight_time": rng.uniform(400, 650),
+        "jumper_weight": 75.0,
+        "velocity_takeoff": rng.uniform(2, 3),
+        "max_force": float(kg.max() * 9.80665),
+        "force_curve": {"t": t, "v": kg.astype(np.float32), "f": (kg * 9.80665).astype(np.float32),
+                        "p": (kg * 20).astype(np.float32), "vel": np.linspace(0, 2.5, n_samples, dtype=np.float32)},
+    }
+
+
+def benchmark(n_jumps=50000, curve_samples=1288, workdir=None):
+    """Build an n_jumps database of synthetic jumps and time every export format."""
+    import resource
+    from database import DatabaseHandler
+
+    workdir = workdir or tempfile.mkdtemp(prefix="export_bench_")
+    db_path = os.path.join(workdir, "bench.db")
+    db = DatabaseHandler(db_path)
+    if db.count_history() < n_jumps:
+        rng = np.random.default_rng(0)
+        t0 = time.perf_counter()
+        pending = []
+        for i in range(db.count_history(), n_jumps):
+            pending.append(db.save_jump_async(_synthetic_jump(rng, i, curve_samples)))
+            if len(pending) >= 512:
+                for f in pending:
+                    f.result()
+                pending = []
+        for f in pending:
+            f.result()
+        print(f"Built {n_jumps} jumps ({os.path.getsize(db_path) / 1e6:.0f} MB) "
+              f"in {time.perf_counter() - t0:.1f} s")
+
+    for fmt, name in [("csv", "jumps.csv"), ("npz", "curves.npz"), ("chunked", "chunked")]:
+        out = os.path.join(workdir, name)
+        t0 = time.perf_counter()
+        count = export(db, out, fmt)
+        elapsed = time.perf_counter() - t0
+        size = os.path.getsize(out) if os.path.isfile(out) else \
+            sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out))
+        print(f"{fmt:8s} {count} jumps in {elapsed:6.2f} s ({count / elapsed:8.0f} jumps/s), "
+              f"{size / 1e6:7.1f} MB")
+    # ru_maxrss is in KiB on Linux
+    print(f"Peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    db.close()
+    return workdir
+
+
+def _parse_date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").timestamp() * 1000 if text else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export jumps and curves from the jump database")
+    parser.add_argument("output", nargs="?", help=".csv, .npz or a directory (chunked)")
+    parser.add_argument("--db", default="jumps_data.db")
+    parser.add_argument("--format", choices=EXPORT_FORMATS)
+    parser.add_argument("--athlete", type=int, help="athlete id")
+    parser.add_argument("--session", type=int, help="session id")
+    parser.add_argument("--mode", help="mode name, e.g. 'Single Jump'")
+    parser.add_argument("--from", dest="start", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--to", dest="end", help="YYYY-MM-DD (exclusive)")
+    parser.add_argument("--compress", action="store_true", help="deflate curve files")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="time all formats on an N-jump database")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if not args.output:
+        parser.error("output is required")
+
+    from database import DatabaseHandler
+
+    db = DatabaseHandler(args.db)
+    filters = {"athlete_id": args.athlete, "session_id": args.session, "mode": args.mode,
+               "start_ts": _parse_date(args.start), "end_ts": _parse_date(args.end)}
+    kwargs = {"compress": args.compress} if args.format != "csv" and not args.output.endswith(".csv") else {}
+
+    def progress(done, total):
+        print(f"\rExported {done}/{total}", end="", flush=True)
+
+    t0 = time.perf_counter()
+    count = export(db, args.output, args.format, on_progress=progress, **kwargs, **filters)
+    print(f"\nExported {count} jump(s) to {args.output} in {time.perf_counter() - t0:.2f} s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
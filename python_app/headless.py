@@ -0,0 +1,382 @@
+"""
+Force Plate PRO - headless daemon.
+
+Runs acquisition, detection and storage without DearPyGui, for unattended
+lab machines and small single-board computers. Results are written as JSON
+lines to stdout (or to every client of a TCP socket); commands are read as
+lines on stdin:
+
+    tare                 zero the plate
+    calibrate <kg>       calibrate with a known weight on the plate
+    mode <name>          switch mode, e.g. "mode Contact Time"
+    mass <kg>            body mass for Jump Estimation
+    status               print the current state
+    profile start [path] start the sampling profiler (see profiler.py)
+    profile stop         stop it and write the collapsed-stack file
+    quit
+
+Commands may also be JSON: {"cmd": "calibrate", "kg": 20}.
+
+    python headless.py --port /dev/ttyUSB0 --socket 0.0.0.0:9100
+
+With --stream, live samples are also published in binary form (see
+stream_server.py), optionally over WebSocket with --ws-port. With
+--shared-ring NAME the sample ring lives in shared memory for local readers
+(see shm_ring.py). --metrics HOST:PORT serves Prometheus metrics at /metrics
+(see metrics.py).
+
+Commands are read from the start. The database (migrations), crash recovery
+and the engine modules are opened on a startup thread, as in main.py;
+commands given meanwhile are held and run in order once the engine is up
+("status" answers with "ready": false until then), and the plate is
+connected after that. Startup timings go to stderr (FPP_STARTUP_TIMING=0 to
+silence).
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from startup_timing import StartupTimer
+
+_timer = StartupTimer()
+
+# Scalar result fields that are emitted (curves are large, only sent with --curves)
+EMIT_SKIP = {"force_curve", "phase_times"}
+
+
+class LineSink:
+    """Writes JSON lines to stdout, or broadcasts them to TCP clients."""
+
+    def __init__(self, address=None, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+        self.clients = []
+        self.server = None
+        if address:
+            host, _, port = address.rpartition(":")
+            self.server = socket.create_server((host or "127.0.0.1", int(port)))
+            threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.clients.append(conn)
+
+    def emit(self, record):
+        line = json.dumps(record, default=float) + "\n"
+        with self.lock:
+            if self.server is None:
+                self.stream.write(line)
+                self.stream.flush()
+                return
+            data = line.encode()
+            for conn in list(self.clients):
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    self.clients.remove(conn)
+                    conn.close()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+            with self.lock:
+                for conn in self.clients:
+                    conn.close()
+                self.clients = []
+
+
+class HeadlessApp:
+    def __init__(self, args, out=None):
+        self.args = args
+        self.sink = LineSink(args.socket, out)
+        self.running = True
+
+        # Commands that arrive before the engine exists; run in order once it does
+        self.ready = False
+        self.held = []
+        self.held_lock = threading.Lock()
+        self.backend = Future()
+        threading.Thread(target=self._start_backend, name="startup", daemon=True).start()
+
+    def _start_backend(self):
+        try:
+            self._open_backend()
+        except BaseException as e:
+            self.backend.set_exception(e)
+            return
+        _timer.mark("backend")
+        _timer.print_report("Headless startup")
+        with self.held_lock:
+            self.ready = True
+            for cmd, arg in self.held:
+                self._run_command(cmd, arg)
+            self.held = []
+        self.sink.emit(self.status())
+        self.backend.set_result(True)
+
+    def _open_backend(self):
+        """Database, crash recovery, engine and publishers. Runs on the startup thread."""
+        from database import DatabaseHandler
+        from journal import AcquisitionJournal, recover
+        from physics import PhysicsEngine
+        from profiler import SamplingProfiler
+        from serial_handler import SerialHandler
+        args = self.args
+
+        self.db = DatabaseHandler(args.db)
+        self.db.migrate_curves_async()
+        recover(args.journal, self.db)
+
+        config = {"gravity": 9.80665, "frequency": 1288}
+        saved_raw_per_kg = self.db.load_setting("raw_per_kg")
+        if saved_raw_per_kg:
+            config["raw_per_kg"] = float(saved_raw_per_kg)
+        saved_profile = self.db.load_setting("detection_profile")
+        params = json.loads(saved_profile) if saved_profile else None
+
+        self.physics = PhysicsEngine(config, params)
+        self.physics.on_calib_callback = self._on_calibrated
+        if args.mode:
+            self.physics.set_mode(args.mode)
+
+        self.serial = SerialHandler(self.physics)
+        self.serial.archive_root = None if args.no_archive else args.archive
+        self.journal = AcquisitionJournal(args.journal, self.physics)
+        self.physics.journal = self.journal
+        self.serial.journal = self.journal
+        self.serial.on_jump_callback = self._on_jump
+        self.serial.health.on_status_changed = self._on_link_status
+        self.profiler = SamplingProfiler()
+
+        if args.shared_ring:
+            self.physics.share_buffer(args.shared_ring)
+        self.stream = None
+        if args.stream:
+            from stream_server import StreamServer
+            host, _, port = args.stream.rpartition(":")
+            self.stream = StreamServer(self.physics, host or "127.0.0.1", int(port), args.ws_port).start()
+        self.metrics = None
+        if args.metrics:
+            import metrics
+            registry = metrics.Registry()
+            metrics.instrument(registry, physics=self.physics, serial=self.serial, db=self.db, stream=self.stream)
+            self.metrics = metrics.serve(args.metrics, registry)
+
+        self.athlete_id = self.db.create_athlete(args.athlete).result() if args.athlete else None
+        self.session_id = self.db.start_session(self.athlete_id).result()
+        self.journal.set_context(athlete_id=self.athlete_id, session_id=self.session_id)
+
+    # --- results (serial thread) ---
+    def _on_jump(self, result):
+        result["athlete_id"] = self.athlete_id
+        result["session_id"] = self.session_id
+        future = self.db.save_jump_async(result)
+        future.add_done_callback(lambda f: self._on_saved(result, f))
+
+    def _on_saved(self, result, future):
+        """DB writer thread, after commit."""
+        if future.exception() is not None:
+            self.sink.emit({"type": "error", "message": f"Failed to save jump: {future.exception()}"})
+            return
+        if "journal_index" in result:
+            self.journal.commit(result["journal_index"])
+        record = {k: v for k, v in result.items()
+                  if k not in EMIT_SKIP and k != "journal_index"}
+        if self.args.curves:
+            record["force_curve"] = result.get("force_curve")
+        record["type"] = "result"
+        record["id"] = future.result()
+        self.sink.emit(record)
+        if self.stream:
+            self.stream.publish_result(dict(record))
+
+    def _on_link_status(self, status):
+        """Reader thread: the link started (or stopped) losing data."""
+        self.sink.emit({"type": "link", **self.serial.health.snapshot()})
+
+    def _on_calibrated(self, raw_per_kg):
+        self.db.save_setting("raw_per_kg", raw_per_kg)
+        self.sink.emit({"type": "calibrated", "raw_per_kg": raw_per_kg})
+
+    # --- commands (main thread) ---
+    def status(self):
+        if not self.ready:
+            return {"type": "status", "ready": False}
+        return {
+            "type": "status",
+            "ready": True,
+            "connected": self.serial.connected,
+            "port": self.serial.port_name,
+            "mode": self.physics.active_mode_name,
+            "state": self.physics.state,
+            "jumper_mass_kg": self.physics.jumper_mass_kg,
+            "raw_per_kg": self.physics.config["raw_per_kg"],
+            "frequency": self.physics.config["frequency"],
+            "measured_rate": self.physics.clock.rate_hz,
+            "link": self.serial.health.snapshot(),
+        }
+
+    def handle_command(self, line):
+        line = line.strip()
+        if not line:
+            return
+        if line.startswith("{"):
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                self.sink.emit({"type": "error", "message": f"Bad JSON command: {line}"})
+                return
+            cmd = str(msg.get("cmd", "")).lower()
+            arg = msg.get("kg", msg.get("mode", msg.get("value")))
+            if cmd == "profile" and msg.get("path"):
+                arg = f"{arg} {msg['path']}"
+        else:
+            cmd, _, arg = line.partition(" ")
+            cmd = cmd.lower()
+            arg = arg.strip() or None
+
+        with self.held_lock:
+            if not self.ready:
+                if cmd in ("quit", "exit"):
+                    self.running = False
+                elif cmd == "status":
+                    self.sink.emit(self.status())
+                else:
+                    self.held.append((cmd, arg))
+                return
+        self._run_command(cmd, arg)
+
+    def _run_command(self, cmd, arg):
+        try:
+            if cmd == "tare":
+                self.physics.start_tare()
+            elif cmd == "calibrate":
+                self.physics.start_calibrate(float(arg))
+            elif cmd == "mode":
+                if arg not in self.physics.modes:
+                    raise ValueError(f"unknown mode {arg!r}; one of {', '.join(self.physics.modes)}")
+                self.physics.set_mode(arg)
+            elif cmd == "mass":
+                if not hasattr(self.physics.active_mode, "set_mass"):
+                    raise ValueError(f"{self.physics.active_mode_name} has no manual body mass")
+                self.physics.active_mode.set_mass(float(arg))
+            elif cmd == "profile":
+                action, _, path = (arg or "").partition(" ")
+                if action == "start":
+                    path = self.profiler.start(path.strip() or None)
+                    self.sink.emit({"type": "profile", "running": True, "path": path})
+                elif action == "stop":
+                    summary = self.profiler.stop()
+                    self.sink.emit({"type": "profile", "running": False, **(summary or {})})
+                else:
+                    raise ValueError("profile start [path] | profile stop")
+                return
+            elif cmd == "status":
+                pass
+            elif cmd in ("quit", "exit"):
+                self.running = False
+                return
+            else:
+                raise ValueError(f"unknown command {cmd!r}")
+        except (TypeError, ValueError) as e:
+            self.sink.emit({"type": "error", "message": str(e)})
+            return
+        self.sink.emit(self.status())
+
+    # --- lifecycle ---
+    def connect(self):
+        port = self.args.port
+        if not port:
+            ports = self.serial.list_ports()
+            if not ports:
+                return False
+            port = ports[0]
+        return self.serial.connect(port, self.args.baud)
+
+    def _stdin_loop(self):
+        for line in sys.stdin:
+            self.handle_command(line)
+            if not self.running:
+                break
+        self.running = False
+
+    def run(self):
+        threading.Thread(target=self._stdin_loop, daemon=True).start()
+        _timer.mark("accepting commands")
+        next_status = time.monotonic()
+        try:
+            while self.running:
+                if not self.backend.done():
+                    time.sleep(0.05)
+                    continue
+                self.backend.result()
+                # Reconnect if the plate was unplugged
+                if not self.serial.connected and not self.connect():
+                    time.sleep(self.args.retry)
+                    continue
+                now = time.monotonic()
+                if self.args.status_interval and now >= next_status:
+                    self.sink.emit(self.status())
+                    next_status = now + self.args.status_interval
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        self.shutdown()
+
+    def shutdown(self):
+        # Let recovery finish: a half-replayed journal would be replayed again next time
+        try:
+            self.backend.result()
+        except Exception:
+            self.sink.close()
+            raise
+        self.profiler.stop()
+        self.serial.disconnect()
+        if self.stream:
+            self.stream.stop()
+        if self.metrics:
+            self.metrics.stop()
+        self.physics.unshare_buffer()
+        self.db.end_session(self.session_id)
+        self.db.close()
+        self.journal.close()
+        self.sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Force Plate PRO without GUI")
+    parser.add_argument("--port", help="serial port (default: first available)")
+    parser.add_argument("--baud", type=int, default=921600)
+    parser.add_argument("--db", default="jumps_data.db")
+    parser.add_argument("--mode", help="start in this mode (default Single Jump)")
+    parser.add_argument("--athlete", help="athlete name for this session")
+    parser.add_argument("--socket", metavar="HOST:PORT", help="serve JSON lines over TCP instead of stdout")
+    parser.add_argument("--stream", metavar="HOST:PORT", help="publish live samples (binary) and results")
+    parser.add_argument("--ws-port", type=int, help="also publish the stream over WebSocket on this port")
+    parser.add_argument("--shared-ring", metavar="NAME", help="share the sample ring in memory under this name")
+    parser.add_argument("--metrics", metavar="HOST:PORT", help="serve Prometheus metrics at /metrics")
+    parser.add_argument("--curves", action="store_true", help="include force curves in results")
+    parser.add_argument("--status-interval", type=float, default=0, help="emit status every N seconds")
+    parser.add_argument("--archive", default="session_archive")
+    parser.add_argument("--no-archive", action="store_true", help="do not record raw sessions")
+    parser.add_argument("--journal", default="acquisition.journal")
+    parser.add_argument("--retry", type=float, default=2.0, help="seconds between connection attempts")
+    args = parser.parse_args()
+
+    # Keep stdout for JSON lines only; diagnostics printed by the modules go to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    HeadlessApp(args, out).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Bulk importer for CoolTerm captures and raw sample logs.
+
+A capture is ESP32 boot noise followed by one raw (already tared) integer
+per line. Sample lines are picked out and parsed with array operations,
+timestamps are synthesized from the sample rate, and the samples are run
+through the engine modes. Detected jumps are stored with their source file.
+
+    python importer.py results/*.txt --mode "Single Jump" --mode "Contact Time"
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from replay import replay_samples
+
+DEFAULT_FREQUENCY = 1288
+DEFAULT_MODES = ("Single Jump",)
+
+# "CoolTerm Capture (Untitled_0) 2026-01-09 20-49-39-549.txt" - capture start time
+CAPTURE_NAME_TIME = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}-\d{2}-\d{2})-(\d{3})")
+
+# 10 ** k lookup for digit place values (int64 holds up to 10 ** 18)
+_POW10 = 10 ** np.arange(19, dtype=np.int64)
+
+
+def parse_samples(data):
+    """
+    Integer values of all lines in data (bytes) that consist only of an
+    optionally negative number. Everything else - boot messages, hex
+    addresses, blank lines - is dropped. No per-line Python work.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8).copy()
+    if len(buf) == 0:
+        return np.zeros(0, dtype=np.int64)
+    buf[buf == 13] = 10                      # CRLF -> two line breaks (the empty one is dropped)
+    if buf[-1] != 10:
+        buf = np.append(buf, np.uint8(10))
+
+    newline = buf == 10
+    digit = (buf >= 48) & (buf <= 57)
+    minus = buf == 45
+    ends = np.flatnonzero(newline)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    line_of = np.cumsum(newline) - newline   # line number of every byte
+
+    # Per-line counts of foreign characters and minus signs
+    foreign = np.bincount(line_of, weights=~(digit | minus | newline), minlength=len(ends))
+    minuses = np.bincount(line_of, weights=minus, minlength=len(ends))
+    negative = np.zeros(len(ends), dtype=bool)
+    nonempty = lengths > 0
+    negative[nonempty] = minus[starts[nonempty]]
+    n_digits = lengths - negative
+    valid = (foreign == 0) & (minuses == negative) & (n_digits > 0) & (n_digits <= 15)
+
+    # Each digit contributes digit * 10 ** (places to the end of its line)
+    counted = digit & valid[line_of]
+    place = np.minimum(ends[line_of] - np.arange(len(buf)) - 1, 18)
+    weights = np.where(counted, (buf.astype(np.int64) - 48) * _POW10[place], 0)
+    # Float sums are exact below 2 ** 53, far beyond any ADC value
+    values = np.bincount(line_of, weights=weights, minlength=len(ends)).astype(np.int64)
+    values[negative] *= -1
+    return values[valid]
+
+
+def capture_start(path):
+    """Capture start (epoch ms) from a CoolTerm file name, or None."""
+    m = CAPTURE_NAME_TIME.search(os.path.basename(path))
+    if not m:
+        return None
+    start = datetime.datetime.strptime(m.group(1), "%Y-%m-%d %H-%M-%S")
+    return start.timestamp() * 1000 + int(m.group(2))
+
+
+def detect_rate(path, n_samples, expected=DEFAULT_FREQUENCY):
+    """
+    Sample rate from capture start (file name) to last write (mtime), or
+    None if it is not plausible - copied files lose their mtime.
+    """
+    start = capture_start(path)
+    if start is None or n_samples < 2:
+        return None
+    duration = os.path.getmtime(path) - start / 1000
+    if duration <= 0:
+        return None
+    rate = n_samples / duration
+    return rate if 0.8 * expected <= rate <= 1.25 * expected else None
+
+
+def import_file(path, config=None, modes=DEFAULT_MODES, rate=None, zero_offset=0.0, manual_mass_kg=None,
+                params=None):
+    """
+    Parse one capture and detect jumps in every requested mode, optionally
+    with overridden detection parameters.
+    Returns (path, n_samples, rate, results). Runs in a worker process.
+    """
+    with open(path, "rb") as f:
+        raw = parse_samples(f.read())
+
+    config = dict(config or {})
+    frequency = config.get("frequency", DEFAULT_FREQUENCY)
+    if rate is None:
+        rate = detect_rate(path, len(raw), frequency) or frequency
+    config["frequency"] = rate
+
+    start = capture_start(path)
+    if start is None:
+        start = os.path.getmtime(path) * 1000 - len(raw) * 1000.0 / rate
+    host_ms = start + np.arange(len(raw)) * (1000.0 / rate)
+
+    source = os.path.abspath(path)
+    results = []
+    for mode in modes:
+        for result in replay_samples(raw, host_ms, None, config, mode, zero_offset, manual_mass_kg, params):
+            result["source"] = source
+            results.append(result)
+    return path, len(raw), rate, results
+
+
+def import_captures(paths, db, config=None, modes=DEFAULT_MODES, rate=None, zero_offset=0.0,
+                    manual_mass_kg=None, athlete_id=None, session_id=None, workers=None,
+                    skip_imported=True, on_progress=None, params=None):
+    """
+    Import capture files in a process pool and store their jumps in db.
+    params overrides the detection parameters as in import_file.
+    Files already imported (same source path) are skipped unless
+    skip_imported is False. Returns {path: number of jumps stored}.
+    """
+    if skip_imported:
+        paths = [p for p in paths if not db.has_source(os.path.abspath(p))]
+    imported = {}
+    if not paths:
+        return imported
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(import_file, p, config, modes, rate, zero_offset, manual_mass_kg, params)
+                   for p in paths]
+        for done, future in enumerate(futures, 1):
+            path, n_samples, file_rate, results = future.result()
+            saves = []
+            for result in results:
+                result["athlete_id"] = athlete_id
+                result["session_id"] = session_id
+                saves.append(db.save_jump_async(result))
+            for save in saves:
+                save.result()
+            imported[path] = len(results)
+            if on_progress:
+                on_progress(done, len(paths), path, n_samples, file_rate, len(results))
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import CoolTerm captures into the jump database")
+    parser.add_argument("paths", nargs="+", help="capture files or directories")
+    parser.add_argument("--db", default="jumps_data.db")
+    parser.add_argument("--mode", action="append", help="engine mode (repeatable, default Single Jump)")
+    parser.add_argument("--rate", type=float, help="sample rate in Hz (default: detected, else configured)")
+    parser.add_argument("--zero", type=float, default=0.0, help="raw zero offset (captures are tared on device)")
+    parser.add_argument("--mass", type=float, help="body mass for Jump Estimation")
+    parser.add_argument("--athlete", help="athlete name to file the jumps under")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--force", action="store_true", help="import files that were imported before")
+    args = parser.parse_args()
+
+    from database import DatabaseHandler
+
+    paths = []
+    for p in args.paths:
+        paths.extend(sorted(glob.glob(os.path.join(p, "*.txt"))) if os.path.isdir(p) else [p])
+
+    db = DatabaseHandler(args.db)
+    config = {}
+    saved_raw_per_kg = db.load_setting("raw_per_kg")
+    if saved_raw_per_kg:
+        config["raw_per_kg"] = float(saved_raw_per_kg)
+    # Same detection profile as the live app (tuning.py --save-profile)
+    saved_profile = db.load_setting("detection_profile")
+    params = json.loads(saved_profile) if saved_profile else None
+
+    athlete_id = None
+    session_id = None
+    if args.athlete:
+        athlete_id = db.create_athlete(args.athlete).result()
+        session_id = db.start_session(athlete_id).result()
+
+    def progress(done, total, path, n_samples, rate, n_jumps):
+        print(f"[{done}/{total}] {os.path.basename(path)}: {n_samples} samples at {rate:.1f} Hz, "
+              f"{n_jumps} jump(s)")
+
+    t0 = time.perf_counter()
+    imported = import_captures(paths, db, config, args.mode or DEFAULT_MODES, args.rate, args.zero,
+                               args.mass, athlete_id, session_id, args.workers,
+                               skip_imported=not args.force, on_progress=progress, params=params)
+    if session_id is not None:
+        db.end_session(session_id)
+    db.close()
+    print(f"Imported {sum(imported.values())} jump(s) from {len(imported)} file(s) "
+          f"in {time.perf_counter() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Crash-safe acquisition journal.
+
+Append-only log of everything needed to re-run the engine after a crash:
+
+    H  engine snapshot (mode, config, zero offset, manual inputs) - replay restarts here
+    S  one sample: raw int32, micros uint32, host time f64 (17 bytes)
+    C  command that changes engine state (set_mode, tare, calibrate, ...)
+    R  result emitted at sample index n
+    K  result emitted at sample index n was committed to the DB
+
+Records are buffered in memory and a flusher thread writes and fsyncs them
+in batches. Once every emitted result is committed and the active mode is
+back at rest (no jump in progress), the journal is truncated to a fresh
+snapshot, so it only ever holds the tail that is not yet safe. The snapshot
+holds settings, not the sample ring or the mode's bodyweight, so the last
+trigger-lookback + weighing-window samples are carried over behind it;
+replay runs them only to prime the engine. On the next launch recover()
+replays that tail through a headless engine and stores any jump that never
+reached the DB.
+"""
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+SAMPLE = struct.Struct("<ciId")
+TAGGED = struct.Struct("<cI")
+FSYNC_INTERVAL = 0.2   # seconds
+
+# Results emitted within this many samples of a committed one are the same jump
+MATCH_WINDOW = 64
+
+# Mode states between jumps; rotating anywhere else would cut a jump in half
+REST_STATES = ("IDLE", "READY")
+
+
+class AcquisitionJournal:
+    def __init__(self, path, engine):
+        self.path = path
+        self.engine = engine
+        self.lock = threading.Lock()
+        self.pending = bytearray()
+        self.sample_index = 0
+        self.outstanding = set()
+        self.context = {}
+        self.rotate_pending = False
+        # Packed S records re-written after each snapshot to rebuild the ring and bodyweight
+        params = engine.params
+        weighing = int(params["weighing_time_ms"] * engine.config["frequency"] / 1000)
+        self.tail = deque(maxlen=int(params["trigger_lookback_samples"]) + weighing)
+        self.file = open(path, "ab")
+        self._write_snapshot()
+
+        self.running = True
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    # --- hot path (serial thread) ---
+    def append_sample(self, raw, micros, host_ms):
+        record = SAMPLE.pack(b"S", int(raw), int(micros) & 0xFFFFFFFF, host_ms)
+        with self.lock:
+            if self.rotate_pending and not self.outstanding and self._at_rest():
+                self._rotate()
+            self.pending += record
+            self.tail.append(record)
+            self.sample_index += 1
+
+    def append_result(self, result):
+        """Journal an emitted result; returns the sample index that identifies it."""
+        with self.lock:
+            index = self.sample_index
+            self._append_json(b"R", {"n": index, "timestamp": result.get("timestamp")})
+            self.outstanding.add(index)
+        return index
+
+    # --- control path ---
+    def append_command(self, name, *args):
+        with self.lock:
+            self._append_json(b"C", {"cmd": name, "args": list(args)})
+
+    def set_context(self, **context):
+        """Athlete/session the following results belong to (restored with them)."""
+        with self.lock:
+            self.context = context
+            self._append_json(b"C", {"cmd": "context", "args": [context]})
+
+    def commit(self, index):
+        """Mark a result as stored; truncate once nothing is outstanding and no jump is running."""
+        with self.lock:
+            self.outstanding.discard(index)
+            self._append_json(b"K", {"n": index})
+            if not self.outstanding:
+                if self._at_rest():
+                    self._rotate()
+                else:
+                    # Checked again on every sample until the mode is back at rest
+                    self.rotate_pending = True
+
+    def new_segment(self):
+        """Engine was reset (e.g. on connect): replay must restart from here."""
+        with self.lock:
+            # Samples from before the reset must not prime the new segment
+            self.tail.clear()
+            if self.outstanding:
+                self._write_snapshot()
+            else:
+                self._rotate()
+
+    def close(self, discard=True):
+        """Stop flushing; on a clean shutdown with nothing outstanding, remove the file."""
+        self.running = False
+        self.flusher.join(timeout=1.0)
+        with self.lock:
+            self._flush()
+            self.file.close()
+            if discard and not self.outstanding:
+                os.remove(self.path)
+
+    # --- internals (lock held) ---
+    def _append_json(self, tag, data):
+        body = json.dumps(data).encode()
+        self.pending += TAGGED.pack(tag, len(body)) + body
+
+    def _at_rest(self):
+        engine = self.engine
+        return (engine.active_mode.state in REST_STATES
+                and not engine.is_taring and not engine.is_calibrating)
+
+    def _write_snapshot(self, primed=0):
+        engine = self.engine
+        estimation = engine.modes.get("Jump Estimation")
+        self._append_json(b"H", {
+            "mode": engine.active_mode_name,
+            "config": engine.config,
+            "params": engine.params,
+            "zero_offset": engine.zero_offset,
+            "clock": engine.clock.state(),
+            "manual_mass_kg": getattr(estimation, "manual_mass_kg", None),
+            "manual_start_velocity": getattr(estimation, "manual_start_velocity", None),
+            "taring": engine.is_taring,
+            "calibrating": engine.calib_weight_kg if engine.is_calibrating else None,
+            "context": self.context,
+            "n": self.sample_index - primed,
+            "primed": primed,
+            "host": time.time() * 1000,
+        })
+
+    def _rotate(self):
+        self.pending.clear()
+        self.file.seek(0)
+        self.file.truncate()
+        self.rotate_pending = False
+        self.sample_index = len(self.tail)
+        self._write_snapshot(primed=len(self.tail))
+        for record in self.tail:
+            self.pending += record
+
+    def _flush(self):
+        if self.pending:
+            self.file.write(self.pending)
+            self.pending.clear()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _flush_loop(self):
+        while self.running:
+            time.sleep(FSYNC_INTERVAL)
+            with self.lock:
+                data = bytes(self.pending)
+                self.pending.clear()
+                if data:
+                    self.file.write(data)
+            if data:
+                # fsync outside the lock so the serial thread never waits on the disk
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+
+def read_records(path):
+    """Yield (tag, payload) records; a torn record at the end is ignored."""
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    end = len(data)
+    while pos < end:
+        tag = data[pos:pos + 1]
+        if tag == b"S":
+            if pos + SAMPLE.size > end:
+                break
+            _, raw, micros, host = SAMPLE.unpack_from(data, pos)
+            yield tag, (raw, micros, host)
+            pos += SAMPLE.size
+        elif tag in (b"H", b"C", b"R", b"K"):
+            if pos + TAGGED.size > end:
+                break
+            _, length = TAGGED.unpack_from(data, pos)
+            start = pos + TAGGED.size
+            if start + length > end:
+                break
+            yield tag, json.loads(data[start:start + length])
+            pos = start + length
+        else:
+            print(f"Journal corrupt at byte {pos}, stopping replay")
+            break
+
+
+def _apply_command(engine, cmd, args):
+    if cmd == "set_mode":
+        engine.set_mode(*args)
+    elif cmd == "tare":
+        engine.start_tare()
+    elif cmd == "calibrate":
+        engine.start_calibrate(*args)
+    elif cmd == "set_zero":
+        engine.set_zero(*args)
+    elif cmd == "set_params":
+        engine.set_params(*args)
+    elif cmd == "set_frequency":
+        engine.set_frequency(*args)
+    elif cmd in ("set_mass", "set_start_velocity"):
+        mode = engine.active_mode
+        if hasattr(mode, cmd):
+            getattr(mode, cmd)(*args)
+
+
+def replay(path):
+    """Re-run the journal through a headless engine; returns results never committed."""
+    from physics import PhysicsEngine
+
+    engine = None
+    index = 0
+    primed_until = 0
+    context = {}
+    committed = []
+    results = []
+    for tag, payload in read_records(path):
+        if tag == b"H":
+            engine = PhysicsEngine(payload["config"], payload.get("params"))
+            engine.zero_offset = payload["zero_offset"]
+            if payload.get("clock"):
+                engine.clock.restore(payload["clock"])
+            engine.set_mode(payload["mode"])
+            estimation = engine.modes.get("Jump Estimation")
+            if estimation and payload.get("manual_mass_kg") is not None:
+                estimation.set_mass(payload["manual_mass_kg"])
+                estimation.set_start_velocity(payload.get("manual_start_velocity") or 0.0)
+            if payload.get("taring"):
+                engine.start_tare()
+            elif payload.get("calibrating"):
+                engine.start_calibrate(payload["calibrating"])
+            context = payload.get("context") or {}
+            index = payload.get("n", index)
+            primed_until = index + payload.get("primed", 0)
+        elif engine is None:
+            continue
+        elif tag == b"S":
+            raw, micros, host = payload
+            res = engine.process_sample(raw, host, micros)
+            index += 1
+            # Carried-over samples only rebuild state; their jumps were committed already
+            if res["result"] and index > primed_until:
+                results.append((index, dict(res["result"], **context)))
+        elif tag == b"C" and payload["cmd"] == "context":
+            context = payload["args"][0]
+        elif tag == b"C":
+            _apply_command(engine, payload["cmd"], payload["args"])
+        elif tag == b"K":
+            committed.append(payload["n"])
+
+    return [r for n, r in results
+            if not any(abs(n - k) <= MATCH_WINDOW for k in committed)]
+
+
+def recover(path, db):
+    """Restore jumps from a journal left behind by a crash. Returns how many were saved."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    try:
+        missed = replay(path)
+    except Exception as e:
+        print(f"Journal recovery failed: {e}")
+        missed = []
+    for result in missed:
+        result["recovered"] = True
+        db.save_jump(result)
+    os.remove(path)
+    if missed:
+        print(f"Recovered {len(missed)} jump(s) from the acquisition journal")
+    return len(missed)
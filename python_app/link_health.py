@@ -0,0 +1,126 @@
+"""
+Serial link health - is the plate's data arriving complete?
+
+LinkHealth counts what the reader sees: lines, malformed JSON, non-JSON
+lines, bytes and the serial input buffer fill level (high-water mark). Gaps,
+dropped samples, duplicate stamps and clock restarts come from the engine's
+clock.RateEstimator, which already infers them from the micros deltas.
+
+The hot path only increments plain integers. Once a second the reader thread
+calls tick(), which closes a one-second bucket; rates are computed over the
+last WINDOW_S buckets when someone asks (UI, headless status, metrics).
+
+status is "ok", "degraded" (data is being lost or garbled) or "failing"
+(losing more than FAILING_DROP_RATE of the samples, or no samples at all
+while connected).
+"""
+import collections
+import time
+
+WINDOW_S = 10
+DEGRADED_DROP_RATE = 0.0005   # fraction of samples lost in the window
+FAILING_DROP_RATE = 0.01
+COUNTERS = ("lines", "samples", "bytes", "parse_errors", "non_json_lines",
+            "dropped", "gaps", "duplicates", "resyncs")
+
+
+class LinkHealth:
+    def __init__(self, clock=None):
+        self.clock = clock          # clock.RateEstimator of the engine, for gaps and drops
+        self.lines = 0
+        self.samples = 0
+        self.bytes = 0
+        self.parse_errors = 0
+        self.non_json_lines = 0
+        self.buffer_high_water = 0  # bytes waiting in the serial input buffer, this bucket
+        self.buffer_high_water_max = 0
+        self.history = collections.deque(maxlen=WINDOW_S + 1)
+        self.next_tick = 0.0
+        self.status = "ok"
+        self.on_status_changed = None
+        self.reset()
+
+    def reset(self):
+        """New connection: counters and window start over."""
+        for name in COUNTERS[:5]:
+            setattr(self, name, 0)
+        self.buffer_high_water = 0
+        self.buffer_high_water_max = 0
+        self.history.clear()
+        self.base = self._clock_counts()
+        self.next_tick = 0.0
+
+    def _clock_counts(self):
+        clock = self.clock
+        if clock is None:
+            return (0, 0, 0, 0)
+        return (clock.dropped, clock.gaps, clock.duplicates, clock.resyncs)
+
+    def counts(self):
+        """Totals since reset(), in COUNTERS order."""
+        clock = [now - base for now, base in zip(self._clock_counts(), self.base)]
+        return (self.lines, self.samples, self.bytes, self.parse_errors, self.non_json_lines, *clock)
+
+    # --- reader thread ---
+    def note_read(self, waiting, now=None):
+        """Called per serial read with the bytes that were waiting."""
+        self.bytes += waiting
+        if waiting > self.buffer_high_water:
+            self.buffer_high_water = waiting
+        now = time.monotonic() if now is None else now
+        if now >= self.next_tick:
+            self.tick(now)
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.history.append((now, self.counts(), self.buffer_high_water))
+        if self.buffer_high_water > self.buffer_high_water_max:
+            self.buffer_high_water_max = self.buffer_high_water
+        self.buffer_high_water = 0
+        self.next_tick = now + 1.0
+        status = self._status(self.window())
+        if status != self.status:
+            self.status = status
+            if self.on_status_changed:
+                self.on_status_changed(status)
+
+    # --- readers (any thread) ---
+    def window(self):
+        """Per-second rates over the last WINDOW_S seconds, plus window high-water mark."""
+        history = list(self.history)
+        if len(history) < 2:
+            return None
+        (t0, first, _), (t1, last, _) = history[0], history[-1]
+        span = max(t1 - t0, 1e-6)
+        rates = {name: (b - a) / span for name, a, b in zip(COUNTERS, first, last)}
+        rates["buffer_high_water"] = max(hw for _, _, hw in history[1:])
+        rates["seconds"] = span
+        return rates
+
+    def _status(self, window):
+        if window is None:
+            return "ok"
+        expected = window["samples"] + window["dropped"]
+        if expected <= 0:
+            return "failing"
+        loss = window["dropped"] / expected
+        if loss >= FAILING_DROP_RATE:
+            return "failing"
+        if loss >= DEGRADED_DROP_RATE or window["parse_errors"] > 0 or window["resyncs"] > 0:
+            return "degraded"
+        return "ok"
+
+    def snapshot(self):
+        """Totals, windowed rates and status as a plain dict."""
+        totals = dict(zip(COUNTERS, self.counts()))
+        totals["buffer_high_water_max"] = max(self.buffer_high_water_max, self.buffer_high_water)
+        return {"status": self.status, "totals": totals, "rates": self.window()}
+
+    def summary(self):
+        """One line for the UI."""
+        window = self.window()
+        if window is None:
+            return "Link: --"
+        return (f"Link {self.status}: {window['samples']:.0f} S/s, "
+                f"{window['dropped']:.1f} drop/s, {window['parse_errors']:.1f} err/s, "
+                f"buf {window['buffer_high_water']} B")
@@ -1,92 +1,246 @@
 """
 Force Plate PRO - Main Entry Point
 Clean, minimal entry point that initializes the application.
+
+Startup draws the main menu first. Only DearPyGui and the menu are loaded
+before the first frame; the database (migrations), crash recovery and the
+engine modules are opened on a startup thread while frames keep rendering,
+and menu clicks made meanwhile are replayed once they are ready. The
+workspace (plots, history, mode headers) is built after that and the
+history list is loaded in the background. Per-phase timings are printed
+once the workspace is up (FPP_STARTUP_TIMING=0 to silence).
 """
-import dearpygui.dearpygui as dpg
+import json
+import threading
 import time
+from concurrent.futures import Future
+from startup_timing import StartupTimer
 
-from physics import PhysicsEngine, GRAVITY
-from serial_handler import SerialHandler
-from database import DatabaseHandler
+_timer = StartupTimer()
+
+import dearpygui.dearpygui as dpg
 
 from ui.themes import setup_themes
-from ui.callbacks import (
-    setup_callbacks, 
-    on_new_jump, 
-    get_selected_jump, 
-    get_jump_history,
-    is_autofit_enabled
-)
-from ui.main_menu import create_main_menu
-from ui.shared import create_shared_content
-from ui.factory import get_controller
-from ui.plot_manager import PlotManager
+from ui.main_menu import create_main_menu, set_menu_ready
 
+_timer.mark("imports")
+
+
+def open_backend():
+    """
+    Database, crash recovery and settings. Runs on the startup thread:
+    migrations and replaying a journal tail after a crash can take seconds.
+    """
+    # Engine modules (numpy) load here too, off the GUI thread
+    import physics  # noqa: F401
+    import serial_handler  # noqa: F401
+    from database import DatabaseHandler
+    from journal import recover
 
-def main():
-    # --- INITIALIZATION ---
     db = DatabaseHandler("jumps_data.db")
-    
+    db.migrate_curves_async()
+
+    # Restore jumps that were detected but not committed before a crash
+    recover("acquisition.journal", db)
+
     # Load settings from DB
     saved_raw_per_kg = db.load_setting("raw_per_kg")
-    
+
     config = {"gravity": 9.80665, "frequency": 1288}
     if saved_raw_per_kg:
         config["raw_per_kg"] = float(saved_raw_per_kg)
         print(f"Loaded raw_per_kg from DB: {config['raw_per_kg']}")
-        
-    physics = PhysicsEngine(config)
-    physics.on_calib_callback = lambda val: db.save_setting("raw_per_kg", val)
-    
-    serial_handler = SerialHandler(physics)
 
-    # Load existing history
-    jump_history = db.load_history()
+    # Detection profile emitted by tuning.py (overrides modes.base.DEFAULT_PARAMS)
+    params = None
+    saved_profile = db.load_setting("detection_profile")
+    if saved_profile:
+        params = json.loads(saved_profile)
+        print(f"Loaded detection profile from DB: {params}")
+    return db, config, params
 
-    # Setup callbacks with references
-    setup_callbacks(physics, serial_handler, db, jump_history)
-    serial_handler.on_jump_callback = on_new_jump
+
+def start_backend():
+    """open_backend() on a daemon thread; returns a Future of its result."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(open_backend())
+        except BaseException as e:
+            future.set_exception(e)
+    threading.Thread(target=run, name="startup", daemon=True).start()
+    return future
+
+
+def build_workspace(physics):
+    """Workspace layout and managers - not needed to draw the main menu."""
+    from ui.shared import create_shared_content
+    from ui.plot_manager import PlotManager
+    from ui.callbacks import refresh_athletes, start_session
+
+    dpg.push_container_stack("Primary Window")
+    create_shared_content()
+    dpg.pop_container_stack()
+
+    # Every app run is a session; picking an athlete starts a new one
+    refresh_athletes()
+    start_session()
+    return PlotManager(physics.get_buffer_view_time_window)
+
+
+def main():
+    timer = _timer
 
     # --- GUI SETUP ---
     dpg.create_context()
     setup_themes()
 
     # --- GUI LAYOUT ---
+    # Only the main menu before the first frame, see build_workspace()
     with dpg.window(tag="Primary Window"):
         create_main_menu()
-        create_shared_content()
+    timer.mark("main menu layout")
 
-    # --- CONTROLLERS & MANAGERS ---
-    # Initial setup for specific modes
-    # We delay setup_ui calls until after DPG context is ready, which is now.
-    
-    # Pre-initialize controllers to create their UI elements (hidden by default)
-    # This ensures tags exist when we try to show/hide them.
-    # Note: create_shared_content already called the legacy header creation functions
-    # which created the groups. Our controllers expect these groups to exist.
-    # If we move fully to controllers creating UI, we would call controller.setup_ui() here.
-    # For now, we assume UI is created by create_shared_content -> create_X_header.
-    
-    plot_manager = PlotManager(physics.get_buffer_view_time_window)
-    
-    current_mode_name = physics.active_mode_name
-    current_controller = get_controller(current_mode_name)
-    
-    # --- MAIN LOOP ---
     dpg.create_viewport(title='ForcePlatePRO', width=1600, height=1000)
     dpg.setup_dearpygui()
     dpg.show_viewport()
     dpg.set_primary_window("Primary Window", True)
+    timer.mark("viewport")
+
+    # First frame: the main menu is on screen from here
+    dpg.render_dearpygui_frame()
+    timer.mark("first frame")
+    first_frame_ms = timer.total_ms()
+
+    # --- INITIALIZATION ---
+    # Database and recovery on the startup thread; keep drawing meanwhile
+    backend = start_backend()
+    while not backend.done() and dpg.is_dearpygui_running():
+        dpg.render_dearpygui_frame()
+    db, config, params = backend.result()
+    timer.mark("database & recovery")
+
+    from physics import PhysicsEngine
+    from serial_handler import SerialHandler
+    from journal import AcquisitionJournal
+    from ui.callbacks import (
+        setup_callbacks,
+        on_new_jump,
+        get_selected_jump,
+        get_history_view,
+        end_session,
+        refresh_link_health,
+        set_perf_hud,
+        set_profiler,
+    )
+    from ui.factory import get_controller
+
+    shared_ring = db.load_setting("shared_ring")
+    metrics_address = db.load_setting("metrics_address")
+    acquisition = None
+    if db.load_setting("acquisition_process") == "1":
+        # Serial reader, physics and journal in their own process (GIL-free of the GUI)
+        from acquisition_process import RemoteAcquisition
+        child_metrics = None
+        if metrics_address:
+            # The acquisition process serves its own families on the next port
+            host, _, port = metrics_address.rpartition(":")
+            child_metrics = f"{host}:{int(port) + 1}"
+        acquisition = RemoteAcquisition(config, params, "acquisition.journal",
+                                        "session_archive", shared_ring, child_metrics).start()
+        physics = acquisition.physics
+        serial_handler = acquisition.serial
+        journal = acquisition.journal
+    else:
+        physics = PhysicsEngine(config, params)
+        serial_handler = SerialHandler(physics)
+        serial_handler.archive_root = "session_archive"
+        journal = AcquisitionJournal("acquisition.journal", physics)
+        physics.journal = journal
+        serial_handler.journal = journal
+    physics.on_calib_callback = lambda val: db.save_setting("raw_per_kg", val)
+
+    # Setup callbacks with references
+    # (history is paged from the DB by the history view, nothing is preloaded)
+    setup_callbacks(physics, serial_handler, db)
+    serial_handler.on_jump_callback = on_new_jump
+
+    # Optional shared-memory sample ring for local readers (shm_ring.RingReader)
+    if shared_ring and not acquisition:
+        physics.share_buffer(shared_ring)
+
+    # Optional local stream of live samples/results ("host:port", set in the DB)
+    stream = None
+    stream_address = db.load_setting("stream_address")
+    if stream_address:
+        from stream_server import StreamServer
+        host, _, port = stream_address.rpartition(":")
+        stream = StreamServer(physics, host or "127.0.0.1", int(port)).start()
+
+        def on_jump_streamed(result):
+            on_new_jump(result)
+            stream.publish_result(result)
+        serial_handler.on_jump_callback = on_jump_streamed
+
+    # Optional Prometheus endpoint ("host:port", set in the DB)
+    metrics_server = None
+    frame_time = render_time = None
+    if metrics_address:
+        import metrics
+        registry = metrics.Registry()
+        if acquisition:
+            metrics.instrument(registry, db=db, stream=stream)
+            registry.gauge("fpp_acquisition_event_queue_depth", "Events waiting for the GUI process",
+                           acquisition.events.qsize)
+        else:
+            metrics.instrument(registry, physics=physics, serial=serial_handler, db=db, stream=stream)
+        frame_time = registry.histogram("fpp_frame_seconds", "Main loop period",
+                                        buckets=metrics.FRAME_BUCKETS)
+        render_time = registry.histogram("fpp_render_seconds", "render_dearpygui_frame() duration",
+                                         buckets=metrics.FRAME_BUCKETS)
+        metrics_server = metrics.serve(metrics_address, registry)
+    timer.mark("engine")
+
+    # --- CONTROLLERS & MANAGERS ---
+    current_mode_name = physics.active_mode_name
+    history_view = get_history_view()
+    plot_manager = build_workspace(physics)
+    current_controller = get_controller(current_mode_name)
+
+    # Performance HUD (F3), only measures while shown
+    from ui.perf_hud import PerfHud
+    hud_queues = {"db writes": db.write_queue.qsize}
+    if acquisition:
+        hud_queues["acq. events"] = acquisition.events.qsize
+    hud = PerfHud(serial_handler, hud_queues)
+    hud.create()
+    set_perf_hud(hud)
+
+    # Sampling profiler (Profile checkbox), on the reader side of the process split
+    if acquisition:
+        profiler = acquisition.profiler
+    else:
+        from profiler import SamplingProfiler
+        profiler = SamplingProfiler()
+    set_profiler(profiler)
+    timer.mark("workspace")
+    timer.print_report(f"Startup (first frame at {first_frame_ms:.0f} ms)")
 
     last_update = time.time()
-    last_selected_jump_id = None
+    last_selected_jump = None
+    next_health_update = 0.0
     
     # Ensure initial state matches
     if current_controller:
         current_controller.on_enter()
+    # Run a menu choice clicked while the database was opening
+    set_menu_ready()
 
     while dpg.is_dearpygui_running():
         now = time.time()
+        timed = hud.visible
+        t_plot = t_controller = t_history = 0.0
         
         # 1. Mode Switching Check
         if physics.active_mode_name != current_mode_name:
@@ -102,61 +256,82 @@ def main():
 
         # Get Common State
         selected_jump = get_selected_jump()
-        jump_history = get_jump_history()
         # auto_fit_y = is_autofit_enabled() # Managed by PlotManager now internally if passed or accessed via callback
 
         # 2. Controller Update (Metrics & State)
         if current_controller:
             # We pass 'dt' as approx frame time (0.016) or calculate real dt
             dt = now - last_update 
+            if timed:
+                t0 = time.perf_counter()
             current_controller.update(physics, dt, selected_jump)
+            if timed:
+                t_controller = time.perf_counter() - t0
 
         # 3. History List Update
-        # Filter logic based on mode type (Simplification: Name check)
-        # "Single Jump" and variants vs "Contact Time" vs "Jump Estimation"
-        
-        current_items = dpg.get_item_configuration("list_history")["items"]
-        filtered_history = jump_history
-        
-        if current_mode_name in ["Single Jump", "Box Drop", "Box Drop Jump", "Push Up", "Squat", "Deadlift", "Power Clean"]:
-             filtered_history = [j for j in jump_history if j.get('formula_peak_power') is not None]
-        elif current_mode_name == "Contact Time":
-             filtered_history = [j for j in jump_history if 'contact_time' in j]
-        elif current_mode_name == "Jump Estimation":
-             filtered_history = [j for j in jump_history if j.get('formula_peak_power') is None and 'contact_time' not in j]
-
-        target_items = [
-            f"#{j['_id']}: {j['height_flight']:.1f}cm ({j['flight_time']:.0f}ms)" 
-            if (j.get('height_flight') or 0) > 0 
-            else f"#{j['_id']}: CT {j.get('contact_time', 0):.0f}ms" if 'contact_time' in j
-            else f"#{j['_id']}: Imp {j.get('height_impulse', 0):.1f}cm" 
-            for j in filtered_history
-        ]
-        
-        if len(current_items) != len(target_items) or (len(current_items) > 0 and current_items[0] != target_items[0]):
-            dpg.configure_item("list_history", items=target_items)
+        # Only the visible page is fetched, and only after an insert/delete/
+        # clear, a scroll or filter change, or a mode switch.
+        if timed:
+            t0 = time.perf_counter()
+        history_view.sync(current_mode_name)
+        if timed:
+            t_history = time.perf_counter() - t0
+
+        # Serial link health line (the monitor keeps its own 1 s buckets)
+        if now >= next_health_update:
+            refresh_link_health()
+            next_health_update = now + 1.0
 
         # 4. Plot Update
         if not selected_jump:
             # LIVE VIEW
-            # Last selected ID reset so we refresh if we select again
-            last_selected_jump_id = None
+            # Last selected jump reset so we refresh if we select again
+            last_selected_jump = None
             
             # 30 FPS update cap inside plot_manager
+            if timed:
+                t0 = time.perf_counter()
             plot_manager.update_live_plot(physics, now)
+            if timed:
+                t_plot = time.perf_counter() - t0
             
         else:
             # SELECTED VIEW
             # Only update if the selection actually changed or we haven't drawn it yet
-            sel_id = selected_jump.get('_id')
-            if sel_id != last_selected_jump_id:
+            # (compared by identity: a fresh jump has no DB id until the writer commits it)
+            if selected_jump is not last_selected_jump:
                 plot_manager.update_selected_from_jump(selected_jump)
-                last_selected_jump_id = sel_id
+                last_selected_jump = selected_jump
 
+        if frame_time or timed:
+            render_start = time.perf_counter()
+            dpg.render_dearpygui_frame()
+            t_render = time.perf_counter() - render_start
+            if frame_time:
+                frame_time.observe(now - last_update)
+                render_time.observe(t_render)
+            if timed:
+                hud.record(now, now - last_update, t_render, t_plot, t_controller, t_history)
+        else:
+            dpg.render_dearpygui_frame()
         last_update = now
-        dpg.render_dearpygui_frame()
 
     dpg.destroy_context()
+    if profiler.running:
+        profiler.stop()
+    serial_handler.disconnect()
+    if stream:
+        stream.stop()
+    if metrics_server:
+        metrics_server.stop()
+    physics.unshare_buffer()
+    end_session()
+    db.close()
+    # All results are committed now, the journal is no longer needed
+    journal.close()
+    if acquisition:
+        # Runs the queued journal commits, then closes the journal there
+        acquisition.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+"""
+Prometheus metrics endpoint.
+
+An optional HTTP server on a background thread answers GET /metrics in the
+Prometheus text format (0.0.4):
+
+    registry = Registry()
+    instrument(registry, physics=physics, serial=serial_handler, db=db)
+    server = MetricsServer(registry, "127.0.0.1", 9108).start()
+
+Most numbers already exist as plain counters (LinkHealth, RateEstimator, the
+engine's ring index, queue sizes); they are registered as callbacks and only
+read when a scrape comes in. Timings are pre-bound Histogram objects handed to
+the component (serial.timing, db.write_latency, ...), which the hot path
+updates with a few integer/float additions: no locks and no lookups per
+sample. The per-sample stage timers run on every 16th line only
+(serial_handler.TIMING_EVERY); the rest pay one modulo. Every instrument has a single writing thread; a scrape racing a
+writer can see a sum one observation ahead of its count, which Prometheus
+rates tolerate.
+
+Exported families (all prefixed fpp_):
+
+    serial_*_total, samples_per_second, link_status     reader / LinkHealth
+    stage_seconds{stage=parse|store|physics}            per-sample processing (sampled)
+    result_emit_seconds                                 serial chunk -> result delivered
+    sample_rate_hz, clock_*, buffer_occupancy_ratio     PhysicsEngine
+    db_write_seconds, db_commit_seconds, db_write_queue_depth
+    frame_seconds, ...                                  registered by the main loop
+
+    python metrics.py --scrape 127.0.0.1:9108    # print one scrape
+"""
+import argparse
+import bisect
+import http.server
+import threading
+
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+FRAME_BUCKETS = (0.004, 0.008, 0.0167, 0.025, 0.0333, 0.05, 0.1, 0.25, 1.0)
+LINK_STATUS = {"ok": 0, "degraded": 1, "failing": 2}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels, extra=None):
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    text = ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in items)
+    return "{" + text + "}"
+
+
+class Registry:
+    def __init__(self):
+        self.families = {}      # name -> (type, help, [(labels, source)])
+        self.lock = threading.Lock()   # registration and scrapes only
+
+    def _add(self, name, kind, help, labels, source):
+        with self.lock:
+            family = self.families.setdefault(name, (kind, help, []))
+            family[2].append((labels or {}, source))
+        return source
+
+    def counter(self, name, help, labels=None, fn=None):
+        """A Counter to increment, or fn() read at scrape time."""
+        return self._add(name, "counter", help, labels, fn or Counter())
+
+    def gauge(self, name, help, fn, labels=None):
+        """fn() is read at scrape time."""
+        return self._add(name, "gauge", help, labels, fn)
+
+    def histogram(self, name, help, labels=None, buckets=LATENCY_BUCKETS):
+        return self._add(name, "histogram", help, labels, Histogram(buckets))
+
+    def render(self):
+        lines = []
+        with self.lock:
+            families = [(name, *family[:2], list(family[2])) for name, family in self.families.items()]
+        for name, kind, help, series in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, source in series:
+                if isinstance(source, Histogram):
+                    counts, total, count = list(source.counts), source.sum, source.count
+                    cumulative = 0
+                    for bound, n in zip(source.bounds + ("+Inf",), counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_labels(labels, ('le', bound))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+                    lines.append(f"{name}_count{_labels(labels)} {count}")
+                    continue
+                try:
+                    value = source.value if isinstance(source, Counter) else source()
+                except Exception:
+                    continue    # source not available (not connected, other process, ...)
+                if value is None:
+                    continue
+                lines.append(f"{name}{_labels(labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves registry.render() at /metrics from a daemon thread."""
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        registry_ = registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.registry = registry
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        host, port = self.address
+        print(f"Metrics on http://{host}:{port}/metrics")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def serve(address, registry):
+    """Start a MetricsServer for "host:port" (host defaults to localhost)."""
+    host, _, port = address.rpartition(":")
+    return MetricsServer(registry, host or "127.0.0.1", int(port)).start()
+
+
+def instrument(registry, physics=None, serial=None, db=None, stream=None):
+    """Register the standard families for the components given and bind their timers."""
+    if serial is not None:
+        health = serial.health
+
+        def total(name):
+            return lambda: health.snapshot()["totals"].get(name)
+
+        def rate(name):
+            return lambda: (health.snapshot()["rates"] or {}).get(name)
+
+        registry.counter("fpp_serial_lines_total", "Lines received from the plate", fn=total("lines"))
+        registry.counter("fpp_serial_bytes_total", "Bytes read from the serial port", fn=total("bytes"))
+        registry.counter("fpp_serial_samples_total", "Samples parsed", fn=total("samples"))
+        registry.counter("fpp_serial_parse_errors_total", "Lines that could not be parsed",
+                         {"kind": "json"}, fn=total("parse_errors"))
+        registry.counter("fpp_serial_parse_errors_total", "Lines that could not be parsed",
+                         {"kind": "non_json"}, fn=total("non_json_lines"))
+        registry.counter("fpp_serial_dropped_samples_total", "Samples lost in micros gaps", fn=total("dropped"))
+        registry.counter("fpp_serial_gaps_total", "Gaps in the micros sequence", fn=total("gaps"))
+        registry.counter("fpp_serial_duplicate_stamps_total", "Repeated micros stamps", fn=total("duplicates"))
+        registry.counter("fpp_serial_resyncs_total", "Device clock restarts", fn=total("resyncs"))
+        registry.gauge("fpp_samples_per_second", "Samples per second over the link health window",
+                       rate("samples"))
+        registry.gauge("fpp_serial_buffer_high_water_bytes",
+                       "Most bytes waiting in the serial input buffer over the window", rate("buffer_high_water"))
+        registry.gauge("fpp_link_status", "0 ok, 1 degraded, 2 failing", lambda: LINK_STATUS[health.status])
+        registry.gauge("fpp_serial_connected", "1 while a plate is connected", lambda: int(serial.connected))
+        registry.gauge("fpp_serial_input_waiting_bytes", "Bytes waiting in the serial input buffer",
+                       lambda: serial.serial_port.in_waiting)
+        if hasattr(serial, "results"):
+            registry.gauge("fpp_result_queue_depth", "Results waiting for the async iterator",
+                           serial.results.qsize)
+
+        stage = "Per-sample processing time by stage"
+        serial.timing = (registry.histogram("fpp_stage_seconds", stage, {"stage": "parse"}),
+                         registry.histogram("fpp_stage_seconds", stage, {"stage": "store"}),
+                         registry.histogram("fpp_stage_seconds", stage, {"stage": "physics"}))
+        serial.emit_latency = registry.histogram(
+            "fpp_result_emit_seconds", "From reading the chunk with a result's last sample to the result delivered")
+
+    if physics is not None:
+        registry.gauge("fpp_sample_rate_hz", "Measured plate sample rate", lambda: physics.clock.rate_hz)
+        registry.gauge("fpp_clock_jitter_us", "Sample timestamp jitter", lambda: physics.clock.jitter_us)
+        registry.gauge("fpp_clock_drift_ppm", "Plate clock vs host clock", lambda: physics.clock.drift_ppm)
+        registry.gauge("fpp_buffer_occupancy_ratio", "Filled fraction of the engine's sample ring",
+                       lambda: 1.0 if physics.buf_full else physics.buf_idx / len(physics.buffer))
+
+    if db is not None:
+        registry.gauge("fpp_db_write_queue_depth", "Writes waiting for the writer thread", db.write_queue.qsize)
+        registry.gauge("fpp_db_write_queue_occupancy_ratio", "Filled fraction of the write queue",
+                       lambda: db.write_queue.qsize() / db.write_queue.maxsize)
+        db.write_latency = registry.histogram("fpp_db_write_seconds", "From submitting a write to its commit")
+        db.commit_time = registry.histogram("fpp_db_commit_seconds", "Time to run and commit one write batch")
+
+    if stream is not None:
+        registry.gauge("fpp_stream_clients", "Connected stream clients", lambda: len(stream.clients))
+        registry.gauge("fpp_stream_queue_depth", "Frames waiting to be sent, all clients",
+                       lambda: sum(len(c.frames) for c in list(stream.clients)))
+        registry.counter("fpp_stream_dropped_frames_total", "Frames dropped for slow clients",
+                         fn=lambda: stream.dropped_frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print one scrape of a metrics endpoint")
+    parser.add_argument("--scrape", metavar="HOST:PORT", default="127.0.0.1:9108")
+    args = parser.parse_args()
+    import urllib.request
+    with urllib.request.urlopen(f"http://{args.scrape}/metrics", timeout=5) as response:
+        print(response.read().decode())
+
+
+if __name__ == "__main__":
+    main()
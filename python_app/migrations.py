@@ -0,0 +1,205 @@
+"""
+Schema migrations driven by PRAGMA user_version.
+
+Each migration runs once, in its own transaction, and bumps user_version.
+An up-to-date database costs a single pragma read at startup.
+"""
+import sqlite3
+
+import summaries
+
+# Scalar jump columns, all in the covering index used by history queries
+# (rows with long curves spill into overflow pages, so reading scalars from
+# the table itself drags those in).
+META_COLUMNS = [
+    "id",
+    "mode",
+    "athlete_id",
+    "session_id",
+    "timestamp",
+    "height_flight",
+    "height_impulse",
+    "peak_power",
+    "avg_power",
+    "flight_time",
+    "jumper_weight",
+    "velocity_takeoff",
+    "max_force",
+    "formula_peak_power",
+    "formula_avg_power",
+    "velocity_flight",
+    "contact_time",
+    "contact_start_time",
+    "contact_end_time",
+    "curve_start_time",
+]
+
+
+# The covering index leads with the history page order, one range per mode
+HISTORY_INDEX_COLUMNS = ["mode", "timestamp", "id"] + [
+    name for name in META_COLUMNS if name not in ("mode", "timestamp", "id")]
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migrate_v1(conn):
+    """Base schema; brings pre-versioning databases up to the full column set."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS jumps (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL,
+        height_flight REAL,
+        height_impulse REAL,
+        peak_power REAL,
+        avg_power REAL,
+        flight_time REAL,
+        jumper_weight REAL,
+        velocity_takeoff REAL,
+        max_force REAL,
+        force_curve TEXT,
+        formula_peak_power REAL,
+        formula_avg_power REAL,
+        velocity_flight REAL,
+        contact_time REAL,
+        contact_start_time REAL,
+        contact_end_time REAL,
+        curve_start_time REAL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+
+    existing = _columns(conn, "jumps")
+    for name in ["formula_peak_power", "formula_avg_power", "velocity_flight", "contact_time",
+                 "contact_start_time", "contact_end_time", "curve_start_time"]:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE jumps ADD COLUMN {name} REAL")
+
+
+def _migrate_v2(conn):
+    """Explicit mode column, athletes/sessions, indexes and mode backfill."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS athletes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        created REAL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        athlete_id INTEGER REFERENCES athletes(id),
+        started REAL,
+        ended REAL
+    )''')
+
+    existing = _columns(conn, "jumps")
+    if "mode" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN mode TEXT")
+    if "athlete_id" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN athlete_id INTEGER REFERENCES athletes(id)")
+    if "session_id" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN session_id INTEGER REFERENCES sessions(id)")
+
+    # One-time backfill of the mode that used to be inferred from null patterns
+    conn.execute('''UPDATE jumps SET mode = CASE
+            WHEN formula_peak_power IS NOT NULL THEN 'Single Jump'
+            WHEN contact_time IS NOT NULL THEN 'Contact Time'
+            ELSE 'Jump Estimation'
+        END
+        WHERE mode IS NULL''')
+
+    conn.execute("DROP INDEX IF EXISTS idx_jumps_meta")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_timestamp ON jumps (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_mode ON jumps (mode, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_session ON jumps (session_id, id)")
+    conn.execute("CREATE INDEX idx_jumps_meta ON jumps (" + ", ".join(META_COLUMNS) + ")")
+
+
+def _migrate_v3(conn):
+    """Incrementally maintained per-athlete and per-session summaries."""
+    for table, key, parent in [("athlete_summaries", "athlete_id", "athletes"),
+                               ("session_summaries", "session_id", "sessions")]:
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+            {key} INTEGER NOT NULL REFERENCES {parent}(id),
+            metric TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            total REAL NOT NULL,
+            total_sq REAL NOT NULL,
+            best REAL,
+            PRIMARY KEY ({key}, metric)
+        )''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_athlete ON jumps (athlete_id, id)")
+    summaries.rebuild(conn)
+
+
+def _migrate_v4(conn):
+    """Link jumps to their sample range in the raw session archive."""
+    existing = _columns(conn, "jumps")
+    if "archive_path" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN archive_path TEXT")
+    if "sample_start" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN sample_start INTEGER")
+    if "sample_end" not in existing:
+        conn.execute("ALTER TABLE jumps ADD COLUMN sample_end INTEGER")
+
+
+def _migrate_v5(conn):
+    """Source file of imported jumps."""
+    if "source" not in _columns(conn, "jumps"):
+        conn.execute("ALTER TABLE jumps ADD COLUMN source TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_source ON jumps (source)")
+
+
+def _migrate_v6(conn):
+    """History pages in (timestamp, id) order, one index range per mode."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jumps_history ON jumps (mode, timestamp, id)")
+
+
+def _migrate_v7(conn):
+    """
+    Make the history index covering. idx_jumps_meta was led by id and no
+    longer served history pages (they read the table, overflow pages
+    included); one covering index in page order replaces both.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_jumps_meta")
+    conn.execute("DROP INDEX IF EXISTS idx_jumps_history")
+    conn.execute("CREATE INDEX idx_jumps_history ON jumps (" + ", ".join(HISTORY_INDEX_COLUMNS) + ")")
+
+
+MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+    (7, _migrate_v7),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(db_path):
+    """Bring the database at db_path up to SCHEMA_VERSION. Returns the starting version."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return version
+
+        # Persistent setting, only needs to happen once per file
+        conn.execute("PRAGMA journal_mode=WAL")
+        for target, step in MIGRATIONS:
+            if target <= version:
+                continue
+            conn.execute("BEGIN")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"Database migrated to schema v{target}")
+        return version
+    finally:
+        conn.close()
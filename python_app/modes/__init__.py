@@ -1,5 +1,5 @@
 # Physics Modes Package
-from .base import PhysicsMode, GRAVITY, AIR_THRESHOLD, MOVEMENT_THRESHOLD, STABILITY_TOLERANCE_KG
+from .base import PhysicsMode, GRAVITY, AIR_THRESHOLD, MOVEMENT_THRESHOLD, STABILITY_TOLERANCE_KG, DEFAULT_PARAMS
 from .single_jump import SingleJumpMode
 from .jump_estimation import JumpEstimationMode
 from .contact_time import ContactTimeMode
@@ -12,5 +12,6 @@ __all__ = [
     'AIR_THRESHOLD',
     'AIR_THRESHOLD',
     'MOVEMENT_THRESHOLD',
-    'STABILITY_TOLERANCE_KG'
+    'STABILITY_TOLERANCE_KG',
+    'DEFAULT_PARAMS'
 ]
@@ -12,11 +12,39 @@ MIN_AIR_TIME = 75
 MAX_AIR_TIME = 1500
 GRAVITY = 9.80665
 
+# Tunable detection parameters. The constants above are the defaults; an
+# engine can run with any subset overridden (PhysicsEngine(params=...)).
+DEFAULT_PARAMS = {
+    "air_threshold": AIR_THRESHOLD,               # raw units below which the plate is unloaded
+    "movement_threshold": MOVEMENT_THRESHOLD,     # raw deviation from bodyweight that starts a jump
+    "stability_tolerance_kg": STABILITY_TOLERANCE_KG,
+    "max_propulsion_time_ms": MAX_PROPULSION_TIME_MS,
+    "min_air_time": MIN_AIR_TIME,                 # ms
+    "max_air_time": MAX_AIR_TIME,                 # ms
+    # Single Jump ready/trigger logic
+    "weighing_time_ms": 300,                      # stable window needed to confirm bodyweight
+    "step_off_time_ms": 500,                      # low weight with negative velocity -> IDLE
+    "trigger_lookback_samples": 100,              # integration rewind at trigger (~77 ms)
+}
+
 
 class PhysicsMode:
     def __init__(self, engine):
         self.engine = engine
         self.state = "IDLE"
+        self.apply_params(engine.params)
+
+    def apply_params(self, params):
+        """Copy detection parameters to attributes, so the per-sample path does no dict lookups."""
+        self.air_threshold = params["air_threshold"]
+        self.movement_threshold = params["movement_threshold"]
+        self.stability_tolerance_kg = params["stability_tolerance_kg"]
+        self.max_propulsion_time_ms = params["max_propulsion_time_ms"]
+        self.min_air_time = params["min_air_time"]
+        self.max_air_time = params["max_air_time"]
+        self.weighing_time_ms = params["weighing_time_ms"]
+        self.step_off_time_ms = params["step_off_time_ms"]
+        self.trigger_lookback_samples = int(params["trigger_lookback_samples"])
 
     def process_sample(self, raw, timestamp, micros, now, dt):
         raise NotImplementedError
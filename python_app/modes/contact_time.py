@@ -2,7 +2,7 @@
 Contact Time Mode - Tracks the sequence: Ready -> Propulsion -> Flight 1 -> Contact -> Flight 2.
 Calculates contact time between two flights.
 """
-from .base import PhysicsMode, AIR_THRESHOLD, MAX_AIR_TIME
+from .base import PhysicsMode
 
 class ContactTimeMode(PhysicsMode):
     def __init__(self, engine):
@@ -40,21 +40,21 @@ class ContactTimeMode(PhysicsMode):
         
         if self.state == "READY":
             # Nothing on platform
-            if weight > AIR_THRESHOLD:
+            if weight > self.air_threshold:
                 self.state = "PROPULSION"
                 
         elif self.state == "PROPULSION":
             # On platform
-            if weight < AIR_THRESHOLD:
+            if weight < self.air_threshold:
                 self.in_air_start_time = now
                 self.state = "IN_AIR_1"
                 
         elif self.state == "IN_AIR_1":
             # first jump
             self.in_air_duration = now - self.in_air_start_time
-            if self.in_air_duration > MAX_AIR_TIME:
+            if self.in_air_duration > self.max_air_time:
                 self.reset_state()
-            if weight > AIR_THRESHOLD:
+            if weight > self.air_threshold:
                 self.state = "CONTACT"
                 self.contact_start_time = now
                 
@@ -63,7 +63,7 @@ class ContactTimeMode(PhysicsMode):
             if weight > (self.max_force * engine.config["raw_per_kg"]):
                  self.max_force = display_kg
                  
-            if weight < AIR_THRESHOLD:
+            if weight < self.air_threshold:
                 self.in_air_start_time = now
                 self.contact_end_time = now
                 self.state = "IN_AIR_2"
@@ -75,9 +75,9 @@ class ContactTimeMode(PhysicsMode):
         elif self.state == "IN_AIR_2":
             # second jump
             self.in_air_duration = now - self.in_air_start_time
-            if self.in_air_duration > MAX_AIR_TIME:
+            if self.in_air_duration > self.max_air_time:
                 self.reset_state()
-            if weight > AIR_THRESHOLD:
+            if weight > self.air_threshold:
                 self.state = "RESULT"
                 curve_start = self.contact_start_time - 500
                 # puste p i vel bo to chujstwo nie zadziala ianczwej bo to metoda engine
@@ -98,7 +98,7 @@ class ContactTimeMode(PhysicsMode):
         
         elif self.state == "RESULT":
             # jak zejdzie to ready
-            if weight < AIR_THRESHOLD:
+            if weight < self.air_threshold:
                 self.reset_state()
 
         return {
@@ -1,11 +1,7 @@
 """
 Jump Estimation Mode - User inputs bodyweight manually, results based on impulse.
 """
-from .base import (
-    PhysicsMode, 
-    AIR_THRESHOLD, 
-    STABILITY_TOLERANCE_KG
-)
+from .base import PhysicsMode
 
 
 class JumpEstimationMode(PhysicsMode):
@@ -40,10 +36,12 @@ class JumpEstimationMode(PhysicsMode):
         return self.manual_mass_kg
 
     def set_mass(self, mass_kg):
+        self.engine.log_command("set_mass", mass_kg)
         self.manual_mass_kg = mass_kg
         self.static_weight_raw = mass_kg * self.engine.config["raw_per_kg"]
         
     def set_start_velocity(self, vel):
+        self.engine.log_command("set_start_velocity", vel)
         self.manual_start_velocity = vel
     
     def process_sample(self, raw, timestamp, micros, now, dt):
@@ -62,7 +60,7 @@ class JumpEstimationMode(PhysicsMode):
         if self.state == "IDLE":
              self.state = "READY"
         
-        if weight < AIR_THRESHOLD:
+        if weight < self.air_threshold:
             # IN AIR
             if self.state == "PROPULSION":
                 # Add start velocity
@@ -107,7 +105,7 @@ class JumpEstimationMode(PhysicsMode):
                 else:
                     self.state = "READY"
 
-        elif weight >= AIR_THRESHOLD:
+        elif weight >= self.air_threshold:
             # ON GROUND
             if self.state == "IN_AIR":
                  self.state = "READY" 
@@ -136,7 +134,7 @@ class JumpEstimationMode(PhysicsMode):
 
             else:
                  # READY
-                 if abs(display_kg - self.manual_mass_kg) > STABILITY_TOLERANCE_KG * 2: 
+                 if abs(display_kg - self.manual_mass_kg) > self.stability_tolerance_kg * 2: 
                       self.state = "PROPULSION"
                       self.integration_start_time = now
                       self.jump_start_y = now
@@ -207,22 +205,11 @@ class JumpEstimationMode(PhysicsMode):
         self.power_sample_count = 0
         self.max_propulsion_force = 0
         
-        last_buf_micros = engine.buffer[start_index][2]
-        if last_buf_micros == 0:
-            last_buf_micros = engine.buffer[start_index][0] * 1000
-            
         steps = 0
         i = start_index
         while i != engine.buf_idx:
             b = engine.buffer[i]
-            iter_dt = 1.0 / engine.config["frequency"]
-            if b[2] > 0 and last_buf_micros > 0:
-                d = b[2] - last_buf_micros
-                if d < 0:
-                    d += 4294967295
-                if 0 < d < 100000:
-                    iter_dt = d / 1000000.0
-            last_buf_micros = b[2]
+            iter_dt = b[3] or 1.0 / engine.config["frequency"]
             
             force_kg = b[1]
             net_kg = force_kg - self.manual_mass_kg
@@ -4,15 +4,7 @@ Single Jump Mode - Measures bodyweight automatically and tracks a complete jump
 States:
     IDLE -> WEIGHING -> READY -> PROPULSION -> IN_AIR -> LANDING -> READY
 """
-from .base import (
-    PhysicsMode, 
-    AIR_THRESHOLD, 
-    MOVEMENT_THRESHOLD, 
-    STABILITY_TOLERANCE_KG,
-    MAX_PROPULSION_TIME_MS,
-    MIN_AIR_TIME,
-    MAX_AIR_TIME
-)
+from .base import PhysicsMode
 
 
 class SingleJumpMode(PhysicsMode):
@@ -192,12 +184,12 @@ class SingleJumpMode(PhysicsMode):
         if self.state == "IN_AIR":
             current_air_time = now - self.takeoff_time
             
-            if weight >= AIR_THRESHOLD:
+            if weight >= self.air_threshold:
                 # Landing detected
-                if current_air_time >= MIN_AIR_TIME:
+                if current_air_time >= self.min_air_time:
                     self._handle_landing(now, current_air_time, gravity)
                     
-            elif current_air_time > MAX_AIR_TIME:
+            elif current_air_time > self.max_air_time:
                 # Timeout - jumped off platform
                 self.state = "IDLE"
                 self.weight_confirmed = False
@@ -205,7 +197,7 @@ class SingleJumpMode(PhysicsMode):
             return self._make_response(display_kg, result)
 
         # 2. Takeoff detection (priority check)
-        if weight < AIR_THRESHOLD and self.current_velocity > 0:
+        if weight < self.air_threshold and self.current_velocity > 0:
             if self.state in ["READY", "PROPULSION", "LANDING"]:
                 # Save phase times before they get reset
                 self.saved_phase_times = {
@@ -221,7 +213,7 @@ class SingleJumpMode(PhysicsMode):
                 return self._make_response(display_kg, result)
 
         # 3. IDLE reset when weight is low (stepped off platform)
-        if weight < AIR_THRESHOLD and self.state not in ["PROPULSION", "LANDING", "IN_AIR"]:
+        if weight < self.air_threshold and self.state not in ["PROPULSION", "LANDING", "IN_AIR"]:
             if self.weight_confirmed:
                 self.weight_confirmed = False
                 self.jumper_mass_kg = 0
@@ -231,7 +223,7 @@ class SingleJumpMode(PhysicsMode):
 
         # 4. Active integration (PROPULSION or LANDING)
         if self.state in ["PROPULSION", "LANDING"]:
-            result = self._process_integration_state(now, weight, display_kg, raw_per_kg, gravity, result)
+            result = self._process_integration_state(now, weight, display_kg, raw_per_kg, gravity, dt, result)
         # 5. Weighing / Ready state 
         else:
             self._process_ready_state(now, weight, raw_per_kg)
@@ -309,7 +301,7 @@ class SingleJumpMode(PhysicsMode):
         self.block_averages = []
         self.phase_start_velocity = v_impact
 
-    def _process_integration_state(self, now, weight, display_kg, raw_per_kg, gravity, result):
+    def _process_integration_state(self, now, weight, display_kg, raw_per_kg, gravity, dt, result):
         """Handle physics integration during PROPULSION or LANDING states."""
         
         # Check for pending result emission
@@ -319,10 +311,10 @@ class SingleJumpMode(PhysicsMode):
                 result = res
 
         # Step-off detection (low weight + negative velocity = user stepped off)
-        if weight < AIR_THRESHOLD and self.current_velocity < 0:
+        if weight < self.air_threshold and self.current_velocity < 0:
             if self.low_weight_start_time == 0:
                 self.low_weight_start_time = now
-            elif now - self.low_weight_start_time > 500:  # 500ms timeout
+            elif now - self.low_weight_start_time > self.step_off_time_ms:
                 self.state = "IDLE"
                 self.weight_confirmed = False
                 self.jumper_mass_kg = 0
@@ -333,18 +325,18 @@ class SingleJumpMode(PhysicsMode):
             self.low_weight_start_time = 0
 
         # Physics integration (within time limit)
-        if self.jumper_mass_kg > 0 and now - self.integration_start_time <= MAX_PROPULSION_TIME_MS:
-            self._integrate_sample(now, display_kg, raw_per_kg, gravity)
+        if self.jumper_mass_kg > 0 and now - self.integration_start_time <= self.max_propulsion_time_ms:
+            self._integrate_sample(now, display_kg, raw_per_kg, gravity, dt)
             result = self._check_stability_exit(now, display_kg, raw_per_kg, result)
 
         # Timeout - return to READY
-        if now - self.integration_start_time > MAX_PROPULSION_TIME_MS:
+        if now - self.integration_start_time > self.max_propulsion_time_ms:
             self.state = "READY"
             self._reset_integration_accumulators()
             
         return result
 
-    def _integrate_sample(self, now, display_kg, raw_per_kg, gravity):
+    def _integrate_sample(self, now, display_kg, raw_per_kg, gravity, dt):
         """Perform physics integration for one sample and track phase transitions."""
         force_n = display_kg * gravity
         net_kg = display_kg - self.jumper_mass_kg
@@ -354,7 +346,7 @@ class SingleJumpMode(PhysicsMode):
         # Store previous velocity before updating
         prev_vel = self.current_velocity
         
-        self.current_velocity += acc * (1.0 / self.engine.config["frequency"])
+        self.current_velocity += acc * dt
         instant_power = force_n * self.current_velocity
         
         # --- Phase transition detection ---
@@ -416,10 +408,6 @@ class SingleJumpMode(PhysicsMode):
         
         # Integrate forward from lookback, tracking velocity and timestamps
         v = 0.0
-        last_u = engine.buffer[start_index][2]
-        if last_u == 0:
-            last_u = engine.buffer[start_index][0] * 1000
-        
         last_zero_time = engine.buffer[start_index][0]  # Default to start
         
         steps = 0
@@ -433,15 +421,8 @@ class SingleJumpMode(PhysicsMode):
                     break
                 continue
             
-            # Calculate dt
-            iter_dt = 1.0 / engine.config["frequency"]
-            if b[2] > 0 and last_u > 0:
-                d = b[2] - last_u
-                if d < 0:
-                    d += 4294967295
-                if 0 < d < 100000:
-                    iter_dt = d / 1000000.0
-            last_u = b[2]
+            # Corrected dt of this sample (engine clock estimate)
+            iter_dt = b[3] or 1.0 / engine.config["frequency"]
             
             # Check if force is close to bodyweight (net force ~= 0)
             # This indicates the neutral position before unweighting started
@@ -476,7 +457,7 @@ class SingleJumpMode(PhysicsMode):
                 diff_bw = abs(avg_val - self.jumper_mass_kg)
                 
                 # Stable if noise and drift are within tolerance
-                if noise_kg <= STABILITY_TOLERANCE_KG * 2 and diff_bw <= STABILITY_TOLERANCE_KG * 4: 
+                if noise_kg <= self.stability_tolerance_kg * 2 and diff_bw <= self.stability_tolerance_kg * 4: 
                     self.jumper_mass_kg = avg_val
                     self.static_weight_raw = avg_val * raw_per_kg
                     res = self._try_emit_result(now, force=True)
@@ -514,14 +495,14 @@ class SingleJumpMode(PhysicsMode):
                 self.block_sum = 0
                 self.block_count = 0
             
-            # Check calibration after 300ms
-            if now - self.calibration_start_time >= 300:
+            # Check calibration after the weighing window (300ms by default)
+            if now - self.calibration_start_time >= self.weighing_time_ms:
                 if len(self.block_averages) > 0:
                     b_min = min(self.block_averages)
                     b_max = max(self.block_averages)
                     noise_kg = (b_max - b_min) / raw_per_kg
                     
-                    if noise_kg <= STABILITY_TOLERANCE_KG:
+                    if noise_kg <= self.stability_tolerance_kg:
                         self.static_weight_raw = self.calibration_sum / self.calibration_count
                         self.jumper_mass_kg = self.static_weight_raw / raw_per_kg
                         self.weight_confirmed = True
@@ -530,7 +511,7 @@ class SingleJumpMode(PhysicsMode):
         else:
             # READY state - detect movement to trigger propulsion
             diff = abs(weight - self.static_weight_raw)
-            if diff > MOVEMENT_THRESHOLD:
+            if diff > self.movement_threshold:
                 self.state = "PROPULSION"
                 self.integration_start_time = now
                 self.jump_start_y = now
@@ -548,7 +529,7 @@ class SingleJumpMode(PhysicsMode):
         raw_per_kg = engine.config["raw_per_kg"]
         gravity = engine.config["gravity"]
         
-        lookback_count = 100  # ~77ms at 1300Hz
+        lookback_count = self.trigger_lookback_samples  # ~77ms at 1300Hz by default
         start_index = (engine.buf_idx - lookback_count) % engine.BUFFER_SIZE
         
         start_pt = engine.buffer[start_index]
@@ -563,10 +544,6 @@ class SingleJumpMode(PhysicsMode):
         self.max_propulsion_force = 0
         
         # Forward integrate from lookback point
-        last_buf_micros = engine.buffer[start_index][2]
-        if last_buf_micros == 0:
-            last_buf_micros = engine.buffer[start_index][0] * 1000
-            
         steps = 0
         i = start_index
         while i != engine.buf_idx:
@@ -580,15 +557,8 @@ class SingleJumpMode(PhysicsMode):
                     break
                 continue
 
-            # Calculate dt from micros timestamps
-            iter_dt = 1.0 / engine.config["frequency"]
-            if b[2] > 0 and last_buf_micros > 0:
-                d = b[2] - last_buf_micros
-                if d < 0:
-                    d += 4294967295  # Handle micros overflow
-                if 0 < d < 100000:
-                    iter_dt = d / 1000000.0
-            last_buf_micros = b[2]
+            # Corrected dt of this sample (engine clock estimate)
+            iter_dt = b[3] or 1.0 / engine.config["frequency"]
             
             # Integrate this sample
             force_kg = b[1]
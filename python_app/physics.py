@@ -1,13 +1,14 @@
 import numpy as np
+from clock import RateEstimator
 from modes import SingleJumpMode, JumpEstimationMode, ContactTimeMode
-from modes.base import AIR_THRESHOLD
+from modes.base import DEFAULT_PARAMS
 
 # Constants
 GRAVITY = 9.80665
 BUFFER_SIZE = 10000  # ~8s
 
 class PhysicsEngine:
-    def __init__(self, config=None):
+    def __init__(self, config=None, params=None):
         self.config = {
             "gravity": GRAVITY,
             "raw_per_kg": 12822.594604545637,
@@ -16,15 +17,25 @@ class PhysicsEngine:
         if config:
             self.config.update(config)
 
+        # Detection parameters (thresholds, timings); modes copy them on creation
+        self.params = dict(DEFAULT_PARAMS)
+        if params:
+            self.params.update(params)
+
         # Buffers - Fixed Size NumPy Array
-        # Columns: 0=MsgTimestamp(ms), 1=Weight(kg), 2=PrevMicros
-        self.buffer = np.zeros((BUFFER_SIZE, 3), dtype=np.float64)
+        # Columns: 0=MsgTimestamp(ms), 1=Weight(kg), 2=PrevMicros, 3=dt(s, corrected)
+        self.buffer = np.zeros((BUFFER_SIZE, 4), dtype=np.float64)
         self.buf_idx = 0
         self.buf_full = False
         self.BUFFER_SIZE = BUFFER_SIZE # Access for modes
+        self.shared_ring = None  # shm_ring.SharedRing when the buffer is shared
 
         self.last_micros = 0
         self.logic_time = 0.0
+
+        # Measured sample rate / dt from the device micros (clock.RateEstimator)
+        self.clock = RateEstimator(self.config["frequency"])
+        self.dropped_at_result = 0
         
         # Tare Logic
         self.zero_offset = 0.0
@@ -56,8 +67,17 @@ class PhysicsEngine:
         self.active_mode_name = "Single Jump"
         self.on_calib_callback = None
 
+        # Crash journal (journal.AcquisitionJournal), set by the app when enabled
+        self.journal = None
+
+    def log_command(self, name, *args):
+        """Record a state-changing command so a journal replay reproduces it."""
+        if self.journal:
+            self.journal.append_command(name, *args)
+
     def set_mode(self, mode_name):
         if mode_name in self.modes:
+            self.log_command("set_mode", mode_name)
             self.active_mode = self.modes[mode_name]
             self.active_mode_name = mode_name
             self.reset_state()
@@ -65,6 +85,13 @@ class PhysicsEngine:
         else:
             print(f"Mode {mode_name} not found")
 
+    def set_params(self, params):
+        """Override detection parameters for every mode (takes effect on the next sample)."""
+        self.log_command("set_params", params)
+        self.params.update(params)
+        for mode in self.modes.values():
+            mode.apply_params(self.params)
+
     def reset_state(self):
         self.logic_time = 0.0
         self.last_micros = 0
@@ -78,21 +105,51 @@ class PhysicsEngine:
 
     def reset(self):
         self.reset_state()
+        self.clock.reset(self.config["frequency"])
+        self.dropped_at_result = 0
         self.buffer.fill(0)
         self.buf_idx = 0
         self.buf_full = False
+        if self.shared_ring is not None:
+            self.shared_ring.reset()
+
+    def share_buffer(self, name="force_plate"):
+        """
+        Move the sample ring into named shared memory so other local processes
+        can follow it (see shm_ring.RingReader). Writes stay in place; each
+        sample additionally publishes the write index.
+        """
+        from shm_ring import SharedRing
+        ring = SharedRing(name, BUFFER_SIZE, self.buffer.shape[1], self.config["frequency"])
+        ring.data[:] = self.buffer
+        self.buffer = ring.data
+        self.shared_ring = ring
+        return ring
+
+    def unshare_buffer(self):
+        if self.shared_ring is not None:
+            self.buffer = self.buffer.copy()
+            self.shared_ring.close()
+            self.shared_ring = None
 
     def set_zero(self, offset):
+        self.log_command("set_zero", offset)
         self.zero_offset = offset
         self.reset_state()
 
     def set_frequency(self, hz):
         """Update the sampling frequency."""
         if hz > 0:
+            self.log_command("set_frequency", hz)
             self.config["frequency"] = hz
+            # The firmware rate is only the starting point, the estimate takes over
+            self.clock.reset(hz)
+            if self.shared_ring is not None:
+                self.shared_ring.set_rate(hz)
             print(f"Physics frequency updated to {hz} Hz")
 
     def start_tare(self):
+        self.log_command("tare")
         self.is_taring = True
         self.tare_start_time = 0
         self.tare_sum = 0
@@ -114,6 +171,7 @@ class PhysicsEngine:
             self.reset_state()
 
     def start_calibrate(self, known_weight_kg):
+        self.log_command("calibrate", known_weight_kg)
         self.is_calibrating = True
         self.calib_weight_kg = known_weight_kg
         self.calib_start_time = 0
@@ -142,11 +200,13 @@ class PhysicsEngine:
             self.is_calibrating = False
             self.reset_state()
 
-    def add_to_buffer(self, t, w, u):
-        self.buffer[self.buf_idx] = [t, w, u]
+    def add_to_buffer(self, t, w, u, dt):
+        self.buffer[self.buf_idx] = [t, w, u, dt]
         self.buf_idx = (self.buf_idx + 1) % BUFFER_SIZE
         if self.buf_idx == 0:
             self.buf_full = True
+        if self.shared_ring is not None:
+            self.shared_ring.publish(self.buf_idx)
             
     # Proxy properties for backward compatibility / easy access if needed
     @property
@@ -174,16 +234,8 @@ class PhysicsEngine:
         return ordered[mask]
 
     def process_sample(self, raw, timestamp, micros=0):
-        # DT Calculation
-        dt = 1.0 / self.config["frequency"]
-        
-        if micros > 0 and self.last_micros > 0:
-            diff = micros - self.last_micros
-            if diff < 0:
-                diff += 4294967295  # wrap uint32
-            
-            if 0 < diff < 100000:
-                dt = diff / 1000000.0
+        # DT Calculation: estimated period, covering samples dropped before this one
+        dt = self.clock.update(micros, timestamp)
         
         # Update Logic Time
         if micros > 0:
@@ -195,7 +247,7 @@ class PhysicsEngine:
                 if 0 < diff < 1000000:
                     self.logic_time += (diff / 1000.0)
                 else:
-                    self.logic_time += (1000.0 / self.config["frequency"])
+                    self.logic_time += dt * 1000.0
             else:
                 self.logic_time = timestamp
             
@@ -204,7 +256,7 @@ class PhysicsEngine:
             if self.logic_time == 0:
                 self.logic_time = timestamp
             else:
-                self.logic_time += (1000.0 / self.config["frequency"])
+                self.logic_time += dt * 1000.0
                 
         now = self.logic_time
         
@@ -231,9 +283,14 @@ class PhysicsEngine:
             }
         # Delegate to Mode
         result_dict = self.active_mode.process_sample(raw, timestamp, micros, now, dt)
+        if result_dict["result"] is not None:
+            result_dict["result"]["mode"] = self.active_mode_name
+            # Flag results whose data had gaps (samples lost since the previous result)
+            result_dict["result"]["dropped_samples"] = self.clock.dropped - self.dropped_at_result
+            self.dropped_at_result = self.clock.dropped
         
         # ADD TO BUFFER
-        self.add_to_buffer(now, result_dict["display_kg"], micros)
+        self.add_to_buffer(now, result_dict["display_kg"], micros, dt)
         
         return result_dict
 
@@ -252,7 +309,6 @@ class PhysicsEngine:
         
         v = 0.0 # Accumulator for Delta V
         # Actual velocity at any point is start_velocity + v
-        last_u = relevant[0][2] if len(relevant) > 0 else 0
         
         curve = []
         
@@ -260,15 +316,7 @@ class PhysicsEngine:
             sample = relevant[i]
             t = sample[0]
             w = sample[1]
-            u = sample[2]
-            
-            dt = 1.0 / self.config["frequency"]
-            if u > 0 and last_u > 0:
-                d = u - last_u
-                if d < 0: d += 4294967295
-                if 0 < d < 100000:
-                    dt = d / 1000000.0
-            last_u = u
+            dt = sample[3] or 1.0 / self.config["frequency"]
             
             force_kg = w
             p = 0.0
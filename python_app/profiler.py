@@ -0,0 +1,209 @@
+"""
+Sampling profiler for the live app.
+
+cProfile hooks every call and slows the 1288 Hz reader loop several times
+over, which changes what is being measured. SamplingProfiler instead wakes
+every INTERVAL_S on its own thread, takes the current stack of the selected
+threads from sys._current_frames(), and counts identical stacks. Stopping
+writes them in the collapsed-stack format used by flamegraph.pl, speedscope
+and inferno:
+
+    serial-reader;_read_loop (serial_handler.py:105);feed (...);... 412
+
+A sample can only be taken while the sampler holds the GIL, so a thread
+that runs pure Python without releasing it is seen at the interpreter's
+switch points (every 5 ms) rather than at exact intervals; over a few
+seconds the counts still follow where the time goes.
+
+The sampler measures its own cost. If walking the stacks takes more than
+MAX_OVERHEAD of the wall time, the interval is stretched until it does not.
+The default is 100 Hz; on a paced 1288 Hz feed that added well under one
+percentage point of CPU (see --self-test).
+
+Start and stop it with the "Profile" checkbox in the GUI (in the
+acquisition process when that runs separately), or with
+"profile start [path]" / "profile stop" on the headless control channel.
+
+    python profiler.py --self-test    # overhead on a synthetic 1288 Hz feed
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+INTERVAL_S = 0.01
+MAX_OVERHEAD = 0.005        # fraction of wall time the stack walks may use (wake-ups cost about as much again)
+NAMES_REFRESH_S = 1.0       # threads are looked up by name this often
+DEFAULT_THREADS = ("serial-reader", "MainThread")
+
+
+def _frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, threads=DEFAULT_THREADS, interval=INTERVAL_S, max_overhead=MAX_OVERHEAD):
+        self.threads = threads          # thread names to sample, None for all
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.counts = {}                # (thread name, code ids leaf first) -> [samples, codes]
+        self.samples = 0
+        self.busy = 0.0                 # CPU s spent sampling (sampler thread)
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.path = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, path=None):
+        """Start sampling; the collapsed stacks go to path on stop(). Returns the path."""
+        if self.running:
+            return self.path
+        self.path = path or time.strftime("profile_%Y%m%d_%H%M%S.folded")
+        self.counts = {}
+        self.samples = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self.thread.start()
+        print(f"Profiling {', '.join(self.threads) if self.threads else 'all threads'} -> {self.path}")
+        return self.path
+
+    def stop(self):
+        """Stop, write the collapsed-stack file and return a summary dict."""
+        if not self.running:
+            return None
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.elapsed = time.perf_counter() - self.started
+        with open(self.path, "w") as f:
+            f.writelines(line + "\n" for line in self.collapsed())
+        summary = self.summary()
+        print(f"Profile written to {self.path}: {summary['samples']} samples, "
+              f"{summary['overhead'] * 100:.2f}% overhead")
+        return summary
+
+    def summary(self):
+        elapsed = self.elapsed if not self.running else time.perf_counter() - self.started
+        return {
+            "path": self.path,
+            "samples": self.samples,
+            "stacks": len(self.counts),
+            "seconds": elapsed,
+            "overhead": self.busy / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def collapsed(self):
+        """Lines of "thread;root;...;leaf count", heaviest first."""
+        labels = {}
+        lines = []
+        for key, (count, codes) in sorted(self.counts.items(), key=lambda item: -item[1][0]):
+            frames = [labels.get(code) or labels.setdefault(code, _frame_label(code)) for code in reversed(codes)]
+            name = key[0]
+            lines.append(";".join([name] + frames) + f" {count}")
+        return lines
+
+    def _targets(self):
+        own = threading.get_ident()
+        return {t.ident: t.name for t in threading.enumerate()
+                if t.ident != own and (self.threads is None or t.name in self.threads)}
+
+    def _run(self):
+        counts = self.counts
+        interval = self.interval
+        targets = {}
+        next_names = 0.0
+        while not self.stop_event.wait(interval):
+            start = time.thread_time()
+            now = time.perf_counter()
+            if now >= next_names:
+                targets = self._targets()
+                next_names = now + NAMES_REFRESH_S
+            frames = sys._current_frames()
+            for ident, name in targets.items():
+                frame = frames.get(ident)
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if codes:
+                    # Keyed by identity: hashing code objects hashes their contents
+                    key = (name, *map(id, codes))
+                    entry = counts.get(key)
+                    if entry is None:
+                        counts[key] = [1, codes]
+                    else:
+                        entry[0] += 1
+            del frames   # frame objects keep their locals alive
+            self.samples += 1
+            self.busy += time.thread_time() - start
+            # Stretch the interval if the stack walks got expensive (deep stacks, many threads)
+            interval = max(self.interval, self.busy / self.samples / self.max_overhead)
+
+
+def _self_test(seconds):
+    """CPU used by a paced 1288 Hz feed (10 ms chunks), without and with the profiler."""
+    from physics import PhysicsEngine
+    from serial_handler import SerialHandler
+
+    rate = 1288
+    per_chunk = rate // 100
+    chunks = []
+    micros = 0
+    for c in range(int(seconds * 100)):
+        lines = []
+        for i in range(per_chunk):
+            micros += 1e6 / rate
+            lines.append('{"w":%d,"t":%d}' % (100 + (i % 7), micros))
+        chunks.append(("\n".join(lines) + "\n").encode())
+
+    def run(profiler):
+        def feed():
+            handler = SerialHandler(PhysicsEngine())
+            start = time.perf_counter()
+            for k, chunk in enumerate(chunks):
+                handler.feed(chunk)
+                delay = start + (k + 1) * 0.01 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        thread = threading.Thread(target=feed, name="serial-reader")
+        if profiler:
+            profiler.start(os.devnull)
+        wall, cpu = time.perf_counter(), time.process_time()
+        thread.start()
+        thread.join()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if profiler:
+            profiler.stop()
+        return cpu / wall
+
+    plain = run(None)
+    profiler = SamplingProfiler()
+    profiled = run(profiler)
+    print(f"CPU load {plain * 100:.1f}% plain, {profiled * 100:.1f}% profiled "
+          f"({(profiled - plain) * 100:+.2f} points); sampler busy {profiler.summary()['overhead'] * 100:.2f}%, "
+          f"{profiler.samples} samples")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampling profiler for Force Plate PRO")
+    parser.add_argument("--self-test", action="store_true", help="measure overhead on a synthetic feed")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the synthetic feed")
+    args = parser.parse_args()
+    if args.self_test:
+        _self_test(args.seconds)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
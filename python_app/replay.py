@@ -0,0 +1,43 @@
+"""
+Headless engine replay.
+
+Runs recorded sample columns through a fresh PhysicsEngine in one mode and
+collects the results, each tagged with the sample range its curve covers.
+Used by the capture importer and anything else that re-detects jumps
+offline; no serial port or GUI involved.
+"""
+import numpy as np
+
+from physics import PhysicsEngine
+
+
+def replay_samples(raw, host_ms, micros=None, config=None, mode="Single Jump", zero_offset=0.0,
+                   manual_mass_kg=None, params=None):
+    """
+    Detect jumps in recorded samples. raw/host_ms/micros are equal-length
+    arrays; micros may be None for data without device timestamps (dt then
+    comes from config["frequency"]). params overrides detection parameters
+    (modes.base.DEFAULT_PARAMS). Returns a list of result dicts.
+    """
+    engine = PhysicsEngine(config, params)
+    engine.zero_offset = zero_offset
+    engine.set_mode(mode)
+    if manual_mass_kg is not None and hasattr(engine.active_mode, "set_mass"):
+        engine.active_mode.set_mass(manual_mass_kg)
+
+    # Python scalars: the engine works per sample and numpy scalars are slower
+    raw = np.asarray(raw).tolist()
+    host_ms = np.asarray(host_ms).tolist()
+    micros = np.asarray(micros).tolist() if micros is not None else [0] * len(raw)
+
+    results = []
+    process = engine.process_sample
+    for i, (w, now, t) in enumerate(zip(raw, host_ms, micros)):
+        result = process(w, now, t)["result"]
+        if result:
+            n = len(result.get("force_curve") or [])
+            # The curve ends at the sample before i (see SerialHandler._link_archive)
+            result["sample_end"] = i
+            result["sample_start"] = max(0, i - n)
+            results.append(result)
+    return results
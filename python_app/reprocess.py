@@ -0,0 +1,161 @@
+"""
+Offline reprocessing of recorded sessions with a different parameter set.
+
+Every raw session in the archive (and optionally CoolTerm captures) is
+replayed headlessly through the engine with the given detection parameters,
+one session per worker process. Results go to a separate result-set
+database, never the live one, so old and new detections can be compared
+side by side: both carry archive_path / sample_start / sample_end.
+
+    python reprocess.py --set air_threshold=80000 --set movement_threshold=11000 \\
+        --out reprocessed.db session_archive
+
+Sessions are independent, so the speed-up follows the core count: with one
+core, extra workers only add process start-up (python reprocess.py --bench
+times 1, 2 and 4 workers on the given sources into throwaway databases).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modes.base import DEFAULT_PARAMS
+from replay import replay_samples
+from session_archive import ArchiveReader, list_sessions
+
+
+def reprocess_session(path, params=None, modes=None, config=None, manual_mass_kg=None):
+    """
+    Replay one archived session (or capture file) in each mode.
+    Returns (path, n_samples, results). Runs in a worker process.
+    """
+    if os.path.isfile(path):
+        from importer import import_file
+        path, n_samples, _, results = import_file(path, config, modes or ("Single Jump",),
+                                                  manual_mass_kg=manual_mass_kg, params=params)
+        return path, n_samples, results
+
+    reader = ArchiveReader(path)
+    meta = reader.meta
+    cfg = {key: meta[key] for key in ("frequency", "raw_per_kg") if meta.get(key)}
+    cfg.update(config or {})
+    cols = reader.read()
+
+    results = []
+    for mode in modes or [meta.get("mode", "Single Jump")]:
+        for result in replay_samples(cols["raw"], cols["host"], cols["micros"], cfg, mode,
+                                     meta.get("zero_offset", 0.0), manual_mass_kg, params):
+            result["archive_path"] = path
+            results.append(result)
+    return path, len(reader), results
+
+
+def expand_sources(sources):
+    """Session directories / capture files from archive roots, sessions and files."""
+    paths = []
+    for src in sources:
+        if os.path.exists(os.path.join(src, "meta.json")) or os.path.isfile(src):
+            paths.append(src)
+        else:
+            paths.extend(list_sessions(src))
+    return paths
+
+
+def reprocess(sources, out_db, params=None, modes=None, config=None, manual_mass_kg=None,
+              workers=None, on_progress=None):
+    """
+    Reprocess all sessions under sources into the result-set database
+    out_db. The full parameter set is stored in its settings table
+    ("reprocess_params"). Returns {session path: number of jumps}.
+    """
+    from database import DatabaseHandler
+
+    paths = expand_sources(sources)
+    db = DatabaseHandler(out_db)
+    db.save_setting("reprocess_params", json.dumps(dict(DEFAULT_PARAMS, **(params or {}))))
+    counts = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(reprocess_session, p, params, modes, config, manual_mass_kg)
+                       for p in paths]
+            for done, future in enumerate(as_completed(futures), 1):
+                path, n_samples, results = future.result()
+                saves = [db.save_jump_async(r) for r in results]
+                for save in saves:
+                    save.result()
+                counts[path] = len(results)
+                if on_progress:
+                    on_progress(done, len(paths), path, n_samples, len(results))
+    finally:
+        db.close()
+    return counts
+
+
+def _coerce(name, value):
+    if name not in DEFAULT_PARAMS:
+        raise SystemExit(f"Unknown parameter {name!r}; known: {', '.join(DEFAULT_PARAMS)}")
+    return type(DEFAULT_PARAMS[name])(float(value))
+
+
+def parse_params(assignments, params_file=None):
+    """Parameter overrides from a JSON file and/or name=value pairs (--set wins)."""
+    params = {}
+    if params_file:
+        with open(params_file) as f:
+            for name, value in json.load(f).items():
+                params[name] = _coerce(name, value)
+    for item in assignments or []:
+        name, _, value = item.partition("=")
+        params[name] = _coerce(name, value)
+    return params
+
+
+def bench(sources, params=None, modes=None, manual_mass_kg=None, worker_counts=(1, 2, 4)):
+    cpus = os.cpu_count() or 1
+    print(f"{cpus} CPU(s), {len(expand_sources(sources))} session(s)")
+    if cpus < 2:
+        print("  single core: workers share one CPU, so more of them cannot be faster here")
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            counts = reprocess(sources, os.path.join(tmp, "bench.db"), params, modes,
+                               manual_mass_kg=manual_mass_kg, workers=workers)
+            elapsed = time.perf_counter() - t0
+        print(f"  {workers} worker(s): {elapsed:.2f} s, {sum(counts.values())} jump(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-detect jumps in recorded sessions with new parameters")
+    parser.add_argument("sources", nargs="*", default=["session_archive"],
+                        help="archive roots, session directories or capture files")
+    parser.add_argument("--out", help="result-set database (default: reprocess_<time>.db)")
+    parser.add_argument("--set", action="append", metavar="NAME=VALUE", help="override one parameter")
+    parser.add_argument("--params", help="JSON file with parameter overrides")
+    parser.add_argument("--mode", action="append", help="engine mode (default: mode the session was recorded in)")
+    parser.add_argument("--mass", type=float, help="body mass for Jump Estimation")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--bench", action="store_true", help="time 1, 2 and 4 workers, keep no results")
+    args = parser.parse_args()
+
+    out = args.out or time.strftime("reprocess_%Y%m%d_%H%M%S.db")
+    if os.path.abspath(out) == os.path.abspath("jumps_data.db"):
+        raise SystemExit("Refusing to write a result set into the live database")
+    params = parse_params(args.set, args.params)
+    if args.bench:
+        bench(args.sources, params, args.mode, args.mass)
+        return
+
+    def progress(done, total, path, n_samples, n_jumps):
+        print(f"[{done}/{total}] {os.path.basename(path)}: {n_samples} samples, {n_jumps} jump(s)")
+
+    t0 = time.perf_counter()
+    counts = reprocess(args.sources, out, params, args.mode, manual_mass_kg=args.mass,
+                       workers=args.workers, on_progress=progress)
+    print(f"{sum(counts.values())} jump(s) from {len(counts)} session(s) in "
+          f"{time.perf_counter() - t0:.2f} s -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+asyncio serial transport - the plate as a coroutine-friendly source.
+
+AsyncSerialHandler runs the same line parsing, journal, archive and physics
+path as SerialHandler, but without a reader thread. On POSIX the port's file
+descriptor is watched with loop.add_reader, so chunks are fed to the engine
+as soon as they arrive. Where that is not possible (Windows, pyserial URL
+handlers without a descriptor) a reader task polls the port non-blockingly
+on the loop instead.
+
+Detected results are exposed as an async iterator:
+
+    handler = AsyncSerialHandler(PhysicsEngine())
+    if await handler.connect("/dev/ttyUSB0"):
+        async for result in handler:
+            print(result["height_flight"])
+
+on_jump_callback keeps working as well. Several plates and network
+publishers can share one event loop this way, without extra threads.
+The iterator queue holds the newest RESULT_QUEUE results: when nobody
+iterates (callback-only use) the oldest are dropped instead of piling up.
+"""
+import argparse
+import asyncio
+
+from serial_handler import SerialHandler
+
+POLL_INTERVAL = 0.001  # s, fallback reader only
+READ_SIZE = 4096
+RESULT_QUEUE = 64      # results (with their curves) kept for the iterator
+
+
+class AsyncSerialHandler(SerialHandler):
+    def __init__(self, physics_engine):
+        super().__init__(physics_engine)
+        self.loop = None
+        self.fd = None
+        self.reader_task = None
+        self.results = asyncio.Queue(maxsize=RESULT_QUEUE)
+
+    async def connect(self, port_name, baud_rate=921600):
+        if self.connected:
+            self.disconnect()
+
+        import serial
+
+        self.loop = asyncio.get_running_loop()
+        try:
+            print(f"Attempting to connect to {port_name} at {baud_rate}...")
+            # serial_for_url also accepts test URLs such as loop:// or socket://
+            self.serial_port = serial.serial_for_url(port_name, do_not_open=True)
+            self.serial_port.baudrate = baud_rate
+            self.serial_port.timeout = 0   # non-blocking reads
+            self.serial_port.setDTR(False)
+            self.serial_port.setRTS(False)
+            self.serial_port.open()
+            self._start_session(port_name)
+        except Exception as e:
+            print(f"Failed to connect to {port_name}: {e}")
+            return False
+
+        try:
+            self.fd = self.serial_port.fileno()
+            self.loop.add_reader(self.fd, self._on_readable)
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            # No selectable descriptor (or a Proactor loop): poll on the loop
+            self.fd = None
+            self.reader_task = self.loop.create_task(self._poll_loop())
+        print(f"Connected to {port_name}")
+        return True
+
+    def disconnect(self):
+        self.running = False
+        if self.fd is not None:
+            self.loop.remove_reader(self.fd)
+            self.fd = None
+        if self.reader_task:
+            self.reader_task.cancel()
+            self.reader_task = None
+
+        if self.serial_port and self.serial_port.is_open:
+            self.serial_port.close()
+
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+        was_connected = self.connected
+        self.connected = False
+        self.serial_port = None
+        if was_connected:
+            self._enqueue(None)   # ends running iterators
+            print("Disconnected")
+
+    def _read_available(self):
+        data = self.serial_port.read(max(1, self.serial_port.in_waiting or READ_SIZE))
+        self.health.note_read(len(data))
+        if data:
+            self.feed(data)
+
+    def _on_readable(self):
+        try:
+            self._read_available()
+        except Exception as e:
+            print(f"Read error: {e}")
+            self.disconnect()
+
+    async def _poll_loop(self):
+        while self.running:
+            try:
+                if self.serial_port.in_waiting:
+                    self._read_available()
+                else:
+                    await asyncio.sleep(POLL_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Read error: {e}")
+                self.disconnect()
+                return
+
+    def _emit_result(self, result):
+        super()._emit_result(result)
+        self._enqueue(result)
+
+    def _enqueue(self, item):
+        if self.results.full():
+            self.results.get_nowait()   # drop the oldest unread result
+        self.results.put_nowait(item)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """Next detected result; stops when the port is disconnected."""
+        if not self.connected and self.results.empty():
+            raise StopAsyncIteration
+        result = await self.results.get()
+        if result is None:
+            raise StopAsyncIteration
+        return result
+
+
+async def _print_results(port, baud):
+    from physics import PhysicsEngine
+    handler = AsyncSerialHandler(PhysicsEngine())
+    if not await handler.connect(port, baud):
+        return
+    async for result in handler:
+        print({k: v for k, v in result.items() if k not in ("force_curve", "phase_times")})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print results from a plate using the asyncio transport")
+    parser.add_argument("port")
+    parser.add_argument("--baud", type=int, default=921600)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_print_results(args.port, args.baud))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
-import serial
-import serial.tools.list_ports
 import threading
 import json
 import time
 
+from link_health import LinkHealth
+from session_archive import SessionRecorder
+
+TIMING_EVERY = 16   # stage timers sample one line in this many
+
 class SerialHandler:
     def __init__(self, physics_engine):
         self.physics = physics_engine
@@ -13,8 +16,29 @@ class SerialHandler:
         self.connected = False
         self.port_name = ""
         self.on_jump_callback = None
+        
+        # Raw session archive (set archive_root to enable recording)
+        self.archive_root = None
+        self.recorder = None
+
+        # Crash journal (journal.AcquisitionJournal), optional
+        self.journal = None
+
+        # Incomplete line carried between reads
+        self.line_buffer = ""
+
+        # Parse errors, gaps, buffer fill - see link_health.py
+        self.health = LinkHealth(physics_engine.clock)
+
+        # Pre-bound metrics.Histogram timers, set by metrics.instrument():
+        # (parse, store, physics) every TIMING_EVERY samples, and chunk-to-result latency
+        self.timing = None
+        self.emit_latency = None
+        self.chunk_time = 0.0
 
     def list_ports(self):
+        # pyserial is imported on first use, it is not needed to draw the main menu
+        import serial.tools.list_ports
         ports = serial.tools.list_ports.comports()
         return [p.device for p in ports]
 
@@ -22,6 +46,8 @@ class SerialHandler:
         if self.connected:
             self.disconnect()
         
+        import serial
+
         try:
             print(f"Attempting to connect to {port_name} at {baud_rate}...")
             # Robust connection sequence for Windows
@@ -34,13 +60,9 @@ class SerialHandler:
             self.serial_port.setRTS(False)
             
             self.serial_port.open()
+            self._start_session(port_name)
             
-            self.connected = True
-            self.port_name = port_name
-            self.running = True
-            self.physics.reset()
-            
-            self.thread = threading.Thread(target=self._read_loop, daemon=True)
+            self.thread = threading.Thread(target=self._read_loop, name="serial-reader", daemon=True)
             self.thread.start()
             print(f"Connected to {port_name}")
             return True
@@ -48,60 +70,122 @@ class SerialHandler:
             print(f"Failed to connect to {port_name}: {e}")
             return False
 
+    def _start_session(self, port_name):
+        """Reset the engine and open journal/archive segments for a new connection."""
+        self.connected = True
+        self.port_name = port_name
+        self.running = True
+        self.line_buffer = ""
+        self.physics.reset()
+        self.health.reset()
+        if self.journal:
+            self.journal.new_segment()
+        
+        if self.archive_root:
+            self.recorder = SessionRecorder(self.archive_root, {
+                "port": port_name,
+                "frequency": self.physics.config["frequency"],
+                "raw_per_kg": self.physics.config["raw_per_kg"],
+                "zero_offset": self.physics.zero_offset,
+                "mode": self.physics.active_mode_name,
+            })
+
     def disconnect(self):
         self.running = False
         if self.thread and self.thread.is_alive():
+            # Wake the reader if it is blocked waiting for the next byte
+            self.serial_port.cancel_read()
             self.thread.join(timeout=1.0)
         
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
+        
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
             
         self.connected = False
         self.serial_port = None
         print("Disconnected")
 
     def _read_loop(self):
-        buffer = ""
         while self.running and self.serial_port and self.serial_port.is_open:
             try:
                 # Read chunks to avoid blocking too long on readline
-                if self.serial_port.in_waiting:
-                    data = self.serial_port.read(self.serial_port.in_waiting).decode('utf-8', errors='ignore')
-                    buffer += data
-                    
-                    if '\n' in buffer:
-                        lines = buffer.split('\n')
-                        # Process all complete lines
-                        for line in lines[:-1]:
-                            self._process_line(line.strip())
-                        
-                        # Keep the remainder
-                        buffer = lines[-1]
+                waiting = self.serial_port.in_waiting
+                if waiting:
+                    data = self.serial_port.read(waiting)
                 else:
-                    time.sleep(0.001) # Yield slightly
+                    # Block for the next byte (up to the port timeout) instead of polling
+                    data = self.serial_port.read(1)
+                self.health.note_read(len(data))
+                if data:
+                    self.feed(data)
             except Exception as e:
                 print(f"Read error: {e}")
                 self.running = False
                 self.connected = False
 
+    def feed(self, data):
+        """Process a chunk of raw serial bytes; a trailing partial line is kept for the next chunk."""
+        if self.timing:
+            self.chunk_time = time.perf_counter()
+        buffer = self.line_buffer + data.decode('utf-8', errors='ignore')
+        if '\n' in buffer:
+            lines = buffer.split('\n')
+            self.health.lines += len(lines) - 1
+            # Process all complete lines
+            for line in lines[:-1]:
+                self._process_line(line.strip())
+            
+            # Keep the remainder
+            buffer = lines[-1]
+        self.line_buffer = buffer
+
     def _process_line(self, line):
         if not line: return
         
         # Check for JSON start
         if line.startswith('{'):
+            timing = self.timing
+            if timing and self.health.samples % TIMING_EVERY:
+                timing = None
             try:
+                if timing:
+                    t0 = time.perf_counter()
                 data = json.loads(line)
                 
                 # Handling message types
                 if "w" in data:
+                    self.health.samples += 1
                     w = data["w"]
                     t = data.get("t", 0)
                     # Timestamp in ms for logic
                     now = time.time() * 1000 
+                    if timing:
+                        t1 = time.perf_counter()
+                        timing[0].observe(t1 - t0)
+                    recorder = self.recorder
+                    journal = self.journal
+                    if recorder:
+                        recorder.append(w, t, now)
+                    if journal:
+                        journal.append_sample(w, t, now)
+                    if timing:
+                        t2 = time.perf_counter()
+                        timing[1].observe(t2 - t1)
                     res = self.physics.process_sample(w, now, t)
+                    if timing:
+                        timing[2].observe(time.perf_counter() - t2)
                     
-                    if res["result"] and self.on_jump_callback:
-                        self.on_jump_callback(res["result"])
+                    if res["result"]:
+                        if recorder:
+                            self._link_archive(res["result"], recorder)
+                        if journal:
+                            res["result"]["journal_index"] = journal.append_result(res["result"])
+                        self._emit_result(res["result"])
+                        if self.emit_latency:
+                            self.emit_latency.observe(time.perf_counter() - self.chunk_time)
                     
                 elif "event" in data:
                     evt = data["event"]
@@ -112,4 +196,22 @@ class SerialHandler:
                         print("Device Auto-Zeroed")
                         
             except json.JSONDecodeError:
-                pass
+                self.health.parse_errors += 1
+        else:
+            self.health.non_json_lines += 1
+
+    def _emit_result(self, result):
+        if self.on_jump_callback:
+            self.on_jump_callback(result)
+
+    def _link_archive(self, result, recorder):
+        """
+        Tag a result with the archived sample range [sample_start, sample_end)
+        its curve covers. The curve is built from the engine buffer before the
+        current sample is added to it, so it ends at the previous sample.
+        """
+        n = len(result.get("force_curve") or [])
+        end = recorder.count - 1
+        result["archive_path"] = recorder.path
+        result["sample_end"] = end
+        result["sample_start"] = max(0, end - n)
@@ -0,0 +1,226 @@
+"""
+Raw session archive - append-only chunked columnar files.
+
+Every connected session is recorded to its own directory:
+
+    <root>/<YYYYmmdd_HHMMSS>/
+        meta.json           session info (port, rate, calibration at start)
+        index.json          chunk list: first sample index and count per chunk
+        00000.raw           int32   raw ADC values
+        00000.micros        uint32  device micros
+        00000.host          float64 host time (ms)
+        00001.raw ...
+
+Columns are plain little-endian arrays, so readers map them with np.memmap
+and slice sample ranges without copying. Writes are buffered and a flusher
+thread fsyncs periodically, keeping disk I/O off the serial thread's path:
+it only takes the lock to flush and duplicate the open file descriptors, and
+fsyncs the duplicates (and rewrites index.json) after releasing it.
+"""
+import json
+import os
+import threading
+import time
+import numpy as np
+
+CHUNK_SAMPLES = 1 << 16          # ~51 s at 1288 Hz per chunk file
+WRITE_BLOCK = 1024               # samples buffered in RAM before a write
+FSYNC_INTERVAL = 1.0             # seconds
+
+COLUMNS = {
+    "raw": np.dtype("<i4"),
+    "micros": np.dtype("<u4"),
+    "host": np.dtype("<f8"),
+}
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+class SessionRecorder:
+    """Appends samples for one session. append() is called from the serial thread."""
+
+    def __init__(self, root, meta=None):
+        self.path = os.path.join(root, time.strftime("%Y%m%d_%H%M%S"))
+        suffix = 1
+        base = self.path
+        while os.path.exists(self.path):
+            self.path = f"{base}_{suffix}"
+            suffix += 1
+        os.makedirs(self.path)
+
+        self.meta = dict(meta or {}, started=time.time() * 1000, chunk_samples=CHUNK_SAMPLES,
+                         columns={name: dt.str for name, dt in COLUMNS.items()})
+        _write_json(os.path.join(self.path, "meta.json"), self.meta)
+
+        self.count = 0
+        self.chunks = []
+        self.files = None
+        self.chunk_count = 0
+        self.lock = threading.Lock()
+        self.index_lock = threading.Lock()   # index.json writes, from either thread
+        self.index_count = -1                # count in the newest index.json written
+
+        self.block = {name: np.zeros(WRITE_BLOCK, dtype=dt) for name, dt in COLUMNS.items()}
+        self.block_n = 0
+
+        self.running = True
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def append(self, raw, micros, host_ms):
+        """Record one sample; returns its index within the session."""
+        n = self.block_n
+        self.block["raw"][n] = raw
+        self.block["micros"][n] = micros
+        self.block["host"][n] = host_ms
+        self.block_n = n + 1
+        index = self.count
+        self.count += 1
+        if self.block_n == WRITE_BLOCK:
+            self._write_block()
+        return index
+
+    def _open_chunk(self):
+        number = len(self.chunks)
+        first = self.chunks[-1]["first"] + self.chunks[-1]["count"] if self.chunks else 0
+        self.chunks.append({"chunk": number, "first": first, "count": 0})
+        self.files = {name: open(os.path.join(self.path, f"{number:05d}.{name}"), "ab")
+                      for name in COLUMNS}
+        self.chunk_count = 0
+        self._write_index()
+
+    def _write_block(self):
+        n = self.block_n
+        start = 0
+        with self.lock:
+            while start < n:
+                if self.files is None or self.chunk_count == CHUNK_SAMPLES:
+                    self._close_chunk()
+                    self._open_chunk()
+                take = min(n - start, CHUNK_SAMPLES - self.chunk_count)
+                for name, f in self.files.items():
+                    f.write(self.block[name][start:start + take].tobytes())
+                self.chunk_count += take
+                self.chunks[-1]["count"] = self.chunk_count
+                start += take
+        self.block_n = 0
+
+    def _close_chunk(self):
+        if self.files is None:
+            return
+        for f in self.files.values():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self.files = None
+        self._write_index()
+
+    def _write_index(self, index=None):
+        index = index or self._index()
+        with self.index_lock:
+            # The flusher writes its snapshot after releasing the lock: never let it
+            # replace a newer index written meanwhile by a chunk change
+            if index["count"] < self.index_count:
+                return
+            _write_json(os.path.join(self.path, "index.json"), index)
+            self.index_count = index["count"]
+
+    def _index(self):
+        return {"count": self.count, "chunks": [dict(c) for c in self.chunks]}
+
+    def _flush_loop(self):
+        while self.running:
+            time.sleep(FSYNC_INTERVAL)
+            self.sync()
+
+    def sync(self):
+        """
+        Flush written blocks to disk and bring index.json up to date
+        (buffered, not-yet-written samples stay in RAM).
+        """
+        with self.lock:
+            if self.files is None:
+                return
+            fds = []
+            for f in self.files.values():
+                f.flush()
+                # A duplicate stays valid if the chunk is closed while we fsync
+                fds.append(os.dup(f.fileno()))
+            index = self._index()
+        # fsync outside the lock so the serial thread never waits on the disk
+        try:
+            for fd in fds:
+                os.fsync(fd)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        self._write_index(index)
+
+    def close(self):
+        self.running = False
+        if self.block_n:
+            self._write_block()
+        with self.lock:
+            self._close_chunk()
+            self._write_index()
+
+
+class ArchiveReader:
+    """Zero-copy access to a recorded session via np.memmap."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.chunks = []
+        first = 0
+        number = 0
+        while os.path.exists(self._file(number, "raw")):
+            cols = {}
+            for name, dt in COLUMNS.items():
+                size = os.path.getsize(self._file(number, name)) // dt.itemsize
+                cols[name] = np.memmap(self._file(number, name), dtype=dt, mode="r", shape=(size,)) \
+                    if size else np.zeros(0, dtype=dt)
+            count = min(len(c) for c in cols.values())
+            self.chunks.append((first, count, cols))
+            first += count
+            number += 1
+        self.count = first
+
+    def _file(self, number, name):
+        return os.path.join(self.path, f"{number:05d}.{name}")
+
+    def __len__(self):
+        return self.count
+
+    def read(self, start=0, stop=None):
+        """
+        Columns for samples [start, stop). Views into the mapped files when the
+        range lies in one chunk, otherwise a concatenated copy.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        start = max(0, start)
+        parts = []
+        for first, count, cols in self.chunks:
+            lo = max(start, first)
+            hi = min(stop, first + count)
+            if lo < hi:
+                parts.append({name: c[lo - first:hi - first] for name, c in cols.items()})
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return {name: np.zeros(0, dtype=dt) for name, dt in COLUMNS.items()}
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+
+def list_sessions(root):
+    """Session directories under root, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(os.path.join(root, d) for d in os.listdir(root)
+                  if os.path.exists(os.path.join(root, d, "meta.json")))
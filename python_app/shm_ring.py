@@ -0,0 +1,261 @@
+"""
+Shared-memory sample ring - the live force stream for other local processes.
+
+The producer (PhysicsEngine.share_buffer) places its ring buffer in a named
+multiprocessing.shared_memory block, so samples are written exactly once and
+any number of readers on the same machine follow them without copies on the
+producer side and without talking to it.
+
+Layout: a 128-byte header followed by capacity x columns float64 rows
+(columns as in PhysicsEngine.buffer: time ms, force kg, micros, dt s).
+
+    header slot  0  magic / layout version
+                 1  capacity (rows)
+                 2  columns
+                 3  write index   (next row the producer writes)
+                 4  sequence      (samples written since creation, monotonic)
+                 5  generation    (bumped when the producer resets the ring)
+                 6  sample rate   (float64, Hz)
+                 7  sequence at the last reset
+                 8  publish counter (odd while slots 3-7 are being updated)
+
+The producer writes the row first and then publishes the write index and
+sequence under a seqlock: the publish counter is made odd, the slots are
+updated, and it is made even again. Readers take the write index, sequence
+and generation as one snapshot (retrying while the counter is odd or has
+moved), copy the rows ending at that write index, and retry if the producer
+lapped the copied window meanwhile. Since rows are written before they are
+published, the slot after the newest row may be mid-write at any time:
+readers see at most capacity - 1 rows.
+
+Reader usage:
+
+    from shm_ring import RingReader
+    ring = RingReader("force_plate")
+    t, kg = ring.latest(1288)[:, :2].T      # last second, ordered copy
+    first, second = ring.latest_views(500)  # zero-copy views
+    rows = ring.read_new()                  # rows since the previous call
+"""
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = 0x46505232    # "FPR2"
+HEADER_BYTES = 128
+H_MAGIC, H_CAPACITY, H_COLUMNS, H_WRITE, H_SEQ, H_GEN, H_RATE, H_RESET_SEQ, H_LOCK = range(9)
+DEFAULT_NAME = "force_plate"
+SNAPSHOT_SPINS = 10000
+
+_attach_lock = threading.Lock()
+
+
+def _attach(name):
+    """
+    Open an existing block without registering it with the resource tracker.
+    Before 3.13 every attach is tracked, and the tracker unlinks the block when
+    the attaching process exits - taking the producer's ring with it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Ring:
+    """Views over a mapped ring block (shared by producer and reader)."""
+
+    def _map(self, shm):
+        self.shm = shm
+        # memoryview slots: far cheaper per access than numpy scalars
+        self.header = shm.buf[:HEADER_BYTES].cast("Q")
+        self.rate_slot = shm.buf[:HEADER_BYTES].cast("d")
+        if self.header[H_MAGIC] != MAGIC:
+            raise ValueError(f"{shm.name} is not a force plate ring")
+        self.capacity = self.header[H_CAPACITY]
+        self.columns = self.header[H_COLUMNS]
+        self.data = np.ndarray((self.capacity, self.columns), dtype=np.float64,
+                               buffer=shm.buf, offset=HEADER_BYTES)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def sequence(self):
+        return self.header[H_SEQ]
+
+    @property
+    def generation(self):
+        return self.header[H_GEN]
+
+    @property
+    def sample_rate(self):
+        return self.rate_slot[H_RATE]
+
+    @property
+    def readable(self):
+        """Most rows a reader can take: the oldest slot may be mid-write."""
+        return self.capacity - 1
+
+    def available(self):
+        """Rows currently readable (since the last reset, at most capacity - 1)."""
+        _, seq, _, reset_seq = self.snapshot()
+        return min(self.readable, seq - reset_seq)
+
+    def snapshot(self):
+        """(write index, sequence, generation, reset sequence) as published together."""
+        header = self.header
+        for _ in range(SNAPSHOT_SPINS):
+            lock = header[H_LOCK]
+            if not lock & 1:
+                snap = (header[H_WRITE], header[H_SEQ], header[H_GEN], header[H_RESET_SEQ])
+                if header[H_LOCK] == lock:
+                    return snap
+            time.sleep(0)   # producer is mid-publish: let it finish
+        # Producer died mid-publish: the slots will not change any more
+        return (header[H_WRITE], header[H_SEQ], header[H_GEN], header[H_RESET_SEQ])
+
+    def _unmap(self):
+        self.header.release()
+        self.rate_slot.release()
+        self.header = self.rate_slot = self.data = None
+        self.shm.close()
+
+
+class SharedRing(_Ring):
+    """Producer side. PhysicsEngine writes rows into .data and calls publish()."""
+
+    def __init__(self, name=DEFAULT_NAME, capacity=10000, columns=3, sample_rate=0.0):
+        size = HEADER_BYTES + capacity * columns * 8
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a crashed producer - nobody else may own this name
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        header = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = 0
+        header[H_MAGIC] = MAGIC
+        header[H_CAPACITY] = capacity
+        header[H_COLUMNS] = columns
+        del header
+        self._map(shm)
+        self.data.fill(0)
+        self.set_rate(sample_rate)
+
+    def publish(self, write_index):
+        """Make the row before write_index visible to readers."""
+        header = self.header
+        header[H_LOCK] += 1
+        header[H_WRITE] = write_index
+        header[H_SEQ] += 1
+        header[H_LOCK] += 1
+
+    def set_rate(self, hz):
+        self.rate_slot[H_RATE] = hz
+
+    def reset(self):
+        """The producer cleared its ring (engine.reset())."""
+        header = self.header
+        header[H_LOCK] += 1
+        header[H_WRITE] = 0
+        header[H_RESET_SEQ] = header[H_SEQ]
+        header[H_GEN] += 1
+        header[H_LOCK] += 1
+
+    def close(self):
+        # Views must be gone before unmapping (the engine copies its buffer first)
+        self._unmap()
+        self.shm.unlink()
+
+
+class RingReader(_Ring):
+    """
+    Consumer side: attaches to a producer's ring by name.
+    Reading never blocks or signals the producer.
+    """
+    def __init__(self, name=DEFAULT_NAME):
+        self._map(_attach(name))
+        _, self.last_seq, self.last_gen, _ = self.snapshot()
+        self.overruns = 0
+
+    def _views(self, write_index, n):
+        """Views of the n rows ending before write_index, oldest first."""
+        start = write_index - n
+        if start >= 0:
+            return self.data[start:write_index], self.data[0:0]
+        return self.data[start:], self.data[:write_index]
+
+    def _lapped(self, seq, gen, n):
+        """
+        True if the producer overwrote, or may be overwriting, rows of the
+        n-row window ending at seq: row now_seq + 1 is written into the slot
+        of row now_seq + 1 - capacity before it is published.
+        """
+        _, now_seq, now_gen, _ = self.snapshot()
+        return now_gen != gen or now_seq - seq + n >= self.capacity
+
+    def latest_views(self, n):
+        """
+        The newest n rows as (older, newer) views into shared memory, no copy.
+        The producer keeps writing: use them immediately, or use latest().
+        """
+        write_index, seq, _, reset_seq = self.snapshot()
+        return self._views(write_index, min(n, self.readable, seq - reset_seq))
+
+    def latest(self, n):
+        """The newest n rows, oldest first, as a consistent copy."""
+        while True:
+            write_index, seq, gen, reset_seq = self.snapshot()
+            count = min(n, self.readable, seq - reset_seq)
+            rows = np.concatenate(self._views(write_index, count))
+            if not self._lapped(seq, gen, count):
+                return rows
+
+    def read_new(self):
+        """
+        Rows written since the previous call, oldest first.
+        If the reader fell a ring behind, the lost rows are counted
+        in .overruns and reading resumes from the oldest row still available.
+        """
+        while True:
+            write_index, seq, gen, reset_seq = self.snapshot()
+            last_seq = self.last_seq
+            if gen != self.last_gen:
+                # Producer reset: rows from before it are gone
+                last_seq = max(last_seq, reset_seq)
+            n = seq - last_seq
+            lost = 0
+            if n > self.readable:
+                lost = n - self.readable
+                n = self.readable
+            rows = np.concatenate(self._views(write_index, n))
+            if not self._lapped(seq, gen, n):
+                break
+        self.overruns += lost
+        self.last_gen = gen
+        self.last_seq = seq
+        return rows
+
+    def wait_new(self, timeout=None, poll=0.002):
+        """Block (polling) until new rows arrive; returns them, or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.sequence == self.last_seq and self.generation == self.last_gen:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+        return self.read_new()
+
+    def close(self):
+        """Detach; arrays returned by latest_views() must not be used afterwards."""
+        self._unmap()
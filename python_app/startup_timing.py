@@ -0,0 +1,43 @@
+"""
+Startup instrumentation - wall time per startup phase.
+
+    timer = StartupTimer()
+    ... imports ...
+    timer.mark("imports")
+    ... open database ...
+    timer.mark("database")
+    print(timer.report())
+
+Each mark records the time since the previous one, so phases add up to the
+total. Set FPP_STARTUP_TIMING=0 to silence the report.
+"""
+import os
+import time
+
+
+class StartupTimer:
+    def __init__(self, t0=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.last = self.t0
+        self.phases = []
+        self.enabled = os.environ.get("FPP_STARTUP_TIMING", "1") != "0"
+
+    def mark(self, name):
+        """Close the current phase under name; returns its duration in ms."""
+        now = time.perf_counter()
+        ms = (now - self.last) * 1000
+        self.phases.append((name, ms))
+        self.last = now
+        return ms
+
+    def total_ms(self):
+        return (self.last - self.t0) * 1000
+
+    def report(self, title="Startup"):
+        lines = [f"{title}: {self.total_ms():.0f} ms"]
+        lines += [f"  {name:<24s} {ms:7.1f} ms" for name, ms in self.phases]
+        return "\n".join(lines)
+
+    def print_report(self, title="Startup"):
+        if self.enabled:
+            print(self.report(title))
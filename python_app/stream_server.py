@@ -0,0 +1,389 @@
+"""
+Local streaming server for live samples and results.
+
+An asyncio loop on its own thread polls the engine's sample ring (the
+acquisition thread does no extra work), decimates new samples and
+publishes them as compact binary frames. Results are sent as JSON. Two
+transports share the same payloads:
+
+    TCP        messages are  type (u8) | length (u32) | payload
+               type 1 = sample frame, type 2 = JSON (UTF-8)
+    WebSocket  sample frames as binary messages, JSON as text messages
+
+Sample frame payload (little endian):
+
+    seq u32 | n u16 | t_base f64 (ms) | n x f32 t - t_base (ms) | n x f32 force (kg)
+
+Every client has a small frame queue; when a client cannot keep up the
+oldest frames are dropped (results are never dropped), and a client whose
+socket stays blocked past SEND_TIMEOUT is disconnected.
+
+Localhost demo (synthetic jumps through a real engine, plus a reader):
+
+    python stream_server.py --demo --port 9100 --ws-port 9101
+    python stream_server.py --client 127.0.0.1:9100
+"""
+import argparse
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+
+MSG_SAMPLES = 1
+MSG_JSON = 2
+MESSAGE_HEADER = struct.Struct("<BI")
+FRAME_HEADER = struct.Struct("<IHd")
+
+POLL_INTERVAL = 1 / 30     # s between ring polls (one frame per poll)
+DECIMATE = 8               # 1288 Hz -> 161 Hz
+MAX_QUEUED_FRAMES = 8      # per client, ~250 ms
+SEND_TIMEOUT = 5.0         # s a client may block before it is dropped
+WRITE_BUFFER_HIGH = 64 * 1024
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def encode_samples(seq, t, kg):
+    """Binary sample frame payload for arrays t (ms) and kg."""
+    n = len(t)
+    base = float(t[0]) if n else 0.0
+    return (FRAME_HEADER.pack(seq, n, base)
+            + (np.asarray(t, dtype=np.float64) - base).astype("<f4").tobytes()
+            + np.asarray(kg, dtype="<f4").tobytes())
+
+
+def decode_samples(payload):
+    """Inverse of encode_samples: (seq, t ms float64, kg float32)."""
+    seq, n, base = FRAME_HEADER.unpack_from(payload)
+    off = FRAME_HEADER.size
+    dt = np.frombuffer(payload, dtype="<f4", count=n, offset=off)
+    kg = np.frombuffer(payload, dtype="<f4", count=n, offset=off + 4 * n)
+    return seq, base + dt.astype(np.float64), kg
+
+
+def _ws_frame(opcode, payload):
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class _Client:
+    def __init__(self, writer, websocket):
+        self.writer = writer
+        self.websocket = websocket
+        self.frames = collections.deque(maxlen=MAX_QUEUED_FRAMES)
+        self.messages = collections.deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def encode(self, kind, payload):
+        if self.websocket:
+            return _ws_frame(0x2 if kind == MSG_SAMPLES else 0x1, payload)
+        return MESSAGE_HEADER.pack(kind, len(payload)) + payload
+
+    def push_frame(self, payload):
+        """Queue a sample frame; returns True if the oldest queued one was dropped."""
+        dropped = len(self.frames) == self.frames.maxlen
+        if dropped:
+            self.dropped += 1
+        self.frames.append(self.encode(MSG_SAMPLES, payload))
+        self.ready.set()
+        return dropped
+
+    def push_message(self, payload):
+        self.messages.append(self.encode(MSG_JSON, payload))
+        self.ready.set()
+
+
+class StreamServer:
+    """
+    Publishes engine samples and results to local clients.
+    start() runs the event loop on a daemon thread; publish_result() may be
+    called from any thread.
+    """
+    def __init__(self, engine, host="127.0.0.1", port=9100, ws_port=None, decimate=DECIMATE):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.decimate = max(1, int(decimate))
+        self.clients = set()
+        self.loop = None
+        self.thread = None
+        self.servers = []
+        self.seq = 0
+        self.dropped_frames = 0     # all clients since start, including disconnected ones
+        self.last_idx = engine.buf_idx
+        self.last_t = -float("inf")
+        self.carry = np.zeros((0, 2))
+        self.started = threading.Event()
+
+    # --- lifecycle ---
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.started.wait(timeout=5.0)
+        return self
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=2.0)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+        self.started.set()
+        self.loop.create_task(self._pump())
+        try:
+            self.loop.run_forever()
+        finally:
+            for server in self.servers:
+                server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    async def _serve(self):
+        # Port 0 picks a free port; .port / .ws_port hold the bound ones afterwards
+        server = await asyncio.start_server(
+            lambda r, w: self._handle(r, w, websocket=False), self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.servers.append(server)
+        if self.ws_port is not None:
+            server = await asyncio.start_server(
+                lambda r, w: self._handle(r, w, websocket=True), self.host, self.ws_port)
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+        print(f"Streaming on tcp://{self.host}:{self.port}"
+              + (f" and ws://{self.host}:{self.ws_port}" if self.ws_port is not None else ""))
+
+    # --- publishing ---
+    def publish_result(self, result):
+        """Send a result (scalars only) to every client. Thread-safe."""
+        if self.loop is None or not self.clients:
+            return
+        record = {k: v for k, v in result.items() if k not in ("force_curve", "phase_times")}
+        record["type"] = "result"
+        payload = json.dumps(record, default=float).encode()
+        self.loop.call_soon_threadsafe(self._broadcast_message, payload)
+
+    def _broadcast_message(self, payload):
+        for client in self.clients:
+            client.push_message(payload)
+
+    def _collect(self):
+        """New (t, kg) rows of the engine ring since the last poll."""
+        engine = self.engine
+        idx = engine.buf_idx
+        last = self.last_idx
+        if idx == last:
+            return None
+        buf = engine.buffer
+        rows = buf[last:idx, :2].copy() if idx > last else np.concatenate((buf[last:, :2], buf[:idx, :2]))
+        self.last_idx = idx
+        # After engine.reset() the ring restarts; drop rows older than what was sent
+        rows = rows[rows[:, 0] > self.last_t]
+        if len(rows):
+            self.last_t = rows[-1, 0]
+        return rows
+
+    def _decimate(self, rows):
+        rows = np.concatenate((self.carry, rows)) if len(self.carry) else rows
+        n = len(rows) // self.decimate * self.decimate
+        self.carry = rows[n:]
+        if n == 0:
+            return None
+        blocks = rows[:n].reshape(-1, self.decimate, 2)
+        return blocks[:, -1, 0], blocks[:, :, 1].mean(axis=1)
+
+    async def _pump(self):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            rows = self._collect()
+            if rows is None or not len(rows) or not self.clients:
+                continue
+            decimated = self._decimate(rows)
+            if decimated is None:
+                continue
+            payload = encode_samples(self.seq, *decimated)
+            self.seq = (self.seq + 1) & 0xFFFFFFFF
+            for client in self.clients:
+                if client.push_frame(payload):
+                    self.dropped_frames += 1
+
+    # --- connections ---
+    async def _handle(self, reader, writer, websocket):
+        if websocket and not await self._ws_handshake(reader, writer):
+            writer.close()
+            return
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        client = _Client(writer, websocket)
+        self.clients.add(client)
+        client.push_message(json.dumps({
+            "type": "hello",
+            "rate": self.engine.config["frequency"] / self.decimate,
+            "decimate": self.decimate,
+            "mode": self.engine.active_mode_name,
+        }).encode())
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            await (self._ws_read_loop(reader, client) if websocket else self._tcp_read_loop(reader))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.messages or client.frames:
+                    data = client.messages.popleft() if client.messages else client.frames.popleft()
+                    writer.write(data)
+                    await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            # Too slow or gone - the reader side cleans up
+            writer.transport.abort()
+
+    async def _tcp_read_loop(self, reader):
+        # Clients do not send anything; reading only detects the disconnect
+        while await reader.read(1024):
+            pass
+
+    async def _ws_handshake(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return False
+        key = None
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        if not key:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        return True
+
+    async def _ws_read_loop(self, reader, client):
+        while True:
+            b0, b1 = await reader.readexactly(2)
+            opcode = b0 & 0x0F
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            mask = await reader.readexactly(4) if b1 & 0x80 else None
+            payload = await reader.readexactly(n)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:      # close
+                client.writer.write(_ws_frame(0x8, payload[:2]))
+                return
+            if opcode == 0x9:      # ping
+                client.messages.append(_ws_frame(0xA, payload))
+                client.ready.set()
+
+
+async def read_stream(host, port):
+    """Async iterator over ("samples", (seq, t, kg)) / ("json", dict) from a TCP stream."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            kind, length = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+            payload = await reader.readexactly(length)
+            if kind == MSG_SAMPLES:
+                yield "samples", decode_samples(payload)
+            else:
+                yield "json", json.loads(payload)
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        writer.close()
+
+
+def _demo_feed(engine, on_result, hz=1288):
+    """Synthetic stand-still / jump cycles through a real engine at the plate rate."""
+    raw_per_kg = engine.config["raw_per_kg"]
+    profile = [75] * 3000 + [40] * 100 + [150] * 250 + [0] * 500 + [160] * 200 + [75] * 3000
+    i = 0
+    start = time.perf_counter()
+    while True:
+        kg = profile[i % len(profile)]
+        res = engine.process_sample(int(kg * raw_per_kg), time.time() * 1000, 1 + (i * 776) % 4294967295)
+        if res["result"]:
+            on_result(res["result"])
+        i += 1
+        delay = start + i / hz - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+async def _print_client(host, port):
+    frames = 0
+    samples = 0
+    t0 = time.perf_counter()
+    async for kind, data in read_stream(host, port):
+        if kind == "json":
+            print(data)
+            continue
+        seq, t, kg = data
+        frames += 1
+        samples += len(t)
+        if frames % 30 == 0:
+            rate = samples / (time.perf_counter() - t0)
+            print(f"frame {seq}: {len(t)} samples, last {kg[-1]:.1f} kg, {rate:.0f} samples/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream live plate data to local clients")
+    parser.add_argument("--demo", action="store_true", help="serve a synthetic engine feed")
+    parser.add_argument("--client", metavar="HOST:PORT", help="connect and print a TCP stream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ws-port", type=int)
+    parser.add_argument("--decimate", type=int, default=DECIMATE)
+    args = parser.parse_args()
+
+    if args.client:
+        host, _, port = args.client.rpartition(":")
+        asyncio.run(_print_client(host or "127.0.0.1", int(port)))
+        return
+    if not args.demo:
+        parser.error("use --demo to serve synthetic data, or --client to read a stream")
+
+    from physics import PhysicsEngine
+    engine = PhysicsEngine()
+    server = StreamServer(engine, args.host, args.port, args.ws_port, args.decimate).start()
+    try:
+        _demo_feed(engine, server.publish_result)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
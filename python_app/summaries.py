@@ -0,0 +1,104 @@
+"""
+Incrementally maintained per-athlete and per-session summary rows.
+
+Each (scope id, metric) row keeps count, sum, sum of squares and best value,
+so mean and SD are O(1) to read. Rows are updated inside the same writer
+transaction as the jump insert/delete they describe.
+"""
+import math
+
+# Summarized metrics and whether "best" is the largest or smallest value
+SUMMARY_METRICS = {
+    "height_flight": "MAX",
+    "peak_power": "MAX",
+    "contact_time": "MIN",
+}
+
+SCOPES = {
+    "athlete": ("athlete_summaries", "athlete_id"),
+    "session": ("session_summaries", "session_id"),
+}
+
+
+def _valid(value):
+    # Modes store 0 for metrics they do not measure, so only count real values
+    return value is not None and value > 0
+
+
+def add_jump(conn, jump):
+    """Fold one inserted jump (dict of column values) into its summaries."""
+    for scope, (table, key) in SCOPES.items():
+        scope_id = jump.get(key)
+        if scope_id is None:
+            continue
+        for metric, agg in SUMMARY_METRICS.items():
+            value = jump.get(metric)
+            if not _valid(value):
+                continue
+            conn.execute(f'''INSERT INTO {table} ({key}, metric, n, total, total_sq, best)
+                VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT ({key}, metric) DO UPDATE SET
+                    n = n + 1,
+                    total = total + excluded.total,
+                    total_sq = total_sq + excluded.total_sq,
+                    best = {agg}(COALESCE(best, excluded.best), excluded.best)''',
+                (scope_id, metric, value, value * value, value))
+
+
+def remove_jump(conn, jump_id):
+    """Take a jump out of its summaries; call before deleting the row."""
+    row = conn.execute(
+        "SELECT athlete_id, session_id, " + ", ".join(SUMMARY_METRICS) + " FROM jumps WHERE id = ?",
+        (jump_id,)).fetchone()
+    if row is None:
+        return
+    ids = {"athlete_id": row[0], "session_id": row[1]}
+    values = dict(zip(SUMMARY_METRICS, row[2:]))
+
+    for scope, (table, key) in SCOPES.items():
+        scope_id = ids[key]
+        if scope_id is None:
+            continue
+        for metric, agg in SUMMARY_METRICS.items():
+            value = values[metric]
+            if not _valid(value):
+                continue
+            conn.execute(f'''UPDATE {table} SET n = n - 1, total = total - ?, total_sq = total_sq - ?
+                WHERE {key} = ? AND metric = ?''', (value, value * value, scope_id, metric))
+            best = conn.execute(f"SELECT best FROM {table} WHERE {key} = ? AND metric = ?",
+                                (scope_id, metric)).fetchone()
+            if best is not None and best[0] == value:
+                # Best is not invertible - rescan this scope's remaining jumps (indexed)
+                new_best = conn.execute(
+                    f"SELECT {agg}({metric}) FROM jumps WHERE {key} = ? AND id != ? AND {metric} > 0",
+                    (scope_id, jump_id)).fetchone()[0]
+                conn.execute(f"UPDATE {table} SET best = ? WHERE {key} = ? AND metric = ?",
+                             (new_best, scope_id, metric))
+        conn.execute(f"DELETE FROM {table} WHERE {key} = ? AND n <= 0", (scope_id,))
+
+
+def rebuild(conn):
+    """Recompute all summary rows from the jumps table."""
+    for scope, (table, key) in SCOPES.items():
+        conn.execute(f"DELETE FROM {table}")
+        for metric, agg in SUMMARY_METRICS.items():
+            conn.execute(f'''INSERT INTO {table} ({key}, metric, n, total, total_sq, best)
+                SELECT {key}, ?, COUNT(*), TOTAL({metric}), TOTAL({metric} * {metric}), {agg}({metric})
+                FROM jumps WHERE {key} IS NOT NULL AND {metric} > 0 GROUP BY {key}''', (metric,))
+
+
+def read_summary(conn, scope, scope_id):
+    """{metric: {"count", "best", "mean", "sd"}} for one athlete or session."""
+    table, key = SCOPES[scope]
+    summary = {}
+    for metric, n, total, total_sq, best in conn.execute(
+            f"SELECT metric, n, total, total_sq, best FROM {table} WHERE {key} = ?", (scope_id,)):
+        mean = total / n
+        var = (total_sq - n * mean * mean) / (n - 1) if n > 1 else 0.0
+        summary[metric] = {
+            "count": n,
+            "best": best,
+            "mean": mean,
+            "sd": math.sqrt(max(0.0, var)),
+        }
+    return summary
@@ -0,0 +1,71 @@
+"""Writer thread: group commits keep each op atomic."""
+import threading
+
+import pytest
+
+import database
+from database import DatabaseHandler
+
+
+@pytest.fixture
+def db(tmp_path):
+    handler = DatabaseHandler(str(tmp_path / "jumps.db"))
+    yield handler
+    handler.close()
+
+
+def test_failed_op_leaves_no_rows(db, monkeypatch):
+    def fail(conn, jump):
+        raise RuntimeError("summary update failed")
+    monkeypatch.setattr(database.summaries, "add_jump", fail)
+
+    # Park the writer so the next two ops are committed as one batch
+    gate = threading.Event()
+    db._submit(lambda conn: gate.wait(5))
+    failing = db.save_jump_async({"height_flight": 10.0, "mode": "Single Jump"})
+    ok = db.save_setting("k", "v")
+    gate.set()
+
+    with pytest.raises(RuntimeError):
+        failing.result(5)
+    ok.result(5)
+    assert db.count_history() == 0
+    assert db.load_setting("k") == "v"
+
+
+def test_history_keyset_pages_match_offset_pages(db):
+    # Repeated and missing timestamps, ids not in timestamp order
+    stamps = [5.0, 3.0, 3.0, None, 9.0, 3.0, 1.0, None, 7.0, 5.0, 3.0, 8.0]
+    modes = ["Single Jump", "Box Drop", "Contact Time"]
+    for i, ts in enumerate(stamps):
+        db.save_jump_async({"timestamp": ts, "height_flight": 20.0, "mode": modes[i % 3]})
+    db.save_setting("flush", "1").result(5)
+
+    everything = db.query_history(0, 100)
+    keys = [db.history_key(j) for j in everything]
+    assert len(keys) == len(stamps)
+    assert keys[0][0] == 9.0 and keys[-1][0] is None
+    # Per-mode index ranges merge into the same order as the unfiltered query
+    single = [db.history_key(j) for j in db.query_history(0, 100, family="single")]
+    assert single == [db.history_key(j) for j in everything if j["mode"] != "Contact Time"]
+
+    limit = 4
+    for filters, ordered in (({}, keys), ({"family": "single"}, single)):
+        for anchor in range(len(ordered)):
+            for target in range(len(ordered)):
+                page = db.query_history(target - anchor, limit, start=ordered[anchor], **filters)
+                assert [db.history_key(j) for j in page] == ordered[target:target + limit]
+    # Stepping above the newest row stops at the top
+    assert db.query_history(-50, limit, start=keys[3])[0]["_id"] == everything[0]["_id"]
+
+
+@pytest.mark.parametrize("start", [None, (5.0, 3), (None, 3)])
+def test_family_pages_merge_index_ranges(db, start):
+    # mode IN (...) would sort every matching row; one index range per mode merges instead
+    legs = db._history_legs({"family": "single"})
+    parts = [(None, [])] if start is None else db._keyset(start, older=True, inclusive=True)
+    sql, args = db._history_sql(database.META_SELECT, legs, parts, database.HISTORY_ORDER)
+    plan = [row[3] for row in db.conn.execute("EXPLAIN QUERY PLAN " + sql, args + [15, 0])]
+    assert not any("TEMP B-TREE" in step for step in plan)
+    # Covering: no table reads, so no overflow pages behind force_curve
+    assert all("COVERING INDEX idx_jumps_history" in step for step in plan if step.startswith("SEARCH"))
@@ -0,0 +1,31 @@
+"""Two simulated plates with drifting clocks, merged onto one timebase."""
+import pytest
+
+from device_manager import simulate
+
+
+@pytest.fixture(scope="module")
+def run():
+    return simulate(seconds=30)
+
+
+def test_clock_drift_is_tracked(run):
+    manager, _, _ = run
+    for clock, ppm in zip(manager.clocks, (60.0, -40.0)):
+        assert clock.drift_ppm == pytest.approx(ppm, abs=5.0)
+
+
+def test_plates_are_aligned(run):
+    _, _, errors = run
+    relative = errors[0] - errors[1]
+    assert abs(relative.mean()) < 0.1
+    assert relative.std() < 0.1
+
+
+def test_combined_jumps_and_asymmetry(run):
+    _, results, _ = run
+    assert len(results) == 3
+    for result in results:
+        assert result["plates"] == 2
+        # 55/45 split
+        assert result["asymmetry_impulse_pct"] == pytest.approx(10.0, abs=1.0)
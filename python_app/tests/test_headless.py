@@ -0,0 +1,65 @@
+"""Headless daemon: commands are accepted while recovery runs and replayed in order."""
+import argparse
+import io
+import json
+import threading
+
+import pytest
+
+import headless
+import journal
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Recovery blocks until the test releases it
+    release = threading.Event()
+    recovered = []
+
+    def slow_recover(path, db):
+        release.wait(5)
+        recovered.append(path)
+        return 0
+    monkeypatch.setattr(journal, "recover", slow_recover)
+
+    args = argparse.Namespace(
+        port=None, baud=921600, db=str(tmp_path / "jumps.db"), mode=None, athlete=None,
+        socket=None, stream=None, ws_port=None, shared_ring=None, metrics=None, curves=False,
+        status_interval=0, archive=str(tmp_path / "archive"), no_archive=True,
+        journal=str(tmp_path / "acquisition.journal"), retry=2.0)
+    out = io.StringIO()
+    app = headless.HeadlessApp(args, out)
+    yield app, out, release, recovered
+    release.set()
+    app.shutdown()
+
+
+def _records(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_commands_held_until_backend_is_up(app):
+    app, out, release, recovered = app
+    app.handle_command("status")
+    app.handle_command("mode Contact Time")
+    app.handle_command('{"cmd": "calibrate", "kg": "not a number"}')
+    assert _records(out) == [{"type": "status", "ready": False}]
+    assert not recovered
+
+    release.set()
+    app.backend.result(5)
+    assert recovered == [app.args.journal]
+    assert app.physics.active_mode_name == "Contact Time"
+    records = _records(out)[1:]
+    assert [r["type"] for r in records] == ["status", "error", "status"]
+    assert records[0]["mode"] == "Contact Time"
+    assert records[-1]["ready"] is True
+
+
+def test_quit_before_ready_waits_for_recovery(app):
+    app, out, release, recovered = app
+    app.handle_command("quit")
+    assert not app.running
+    release.set()
+    app.backend.result(5)
+    assert recovered
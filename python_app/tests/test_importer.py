@@ -0,0 +1,63 @@
+"""Capture importer: vectorized line parsing and a full import of results/."""
+import glob
+import os
+import re
+
+import pytest
+
+from database import DatabaseHandler
+from importer import DEFAULT_FREQUENCY, import_captures, parse_samples
+
+RESULTS = os.path.join(os.path.dirname(__file__), "..", "..", "results")
+CAPTURES = sorted(glob.glob(os.path.join(RESULTS, "*.txt")))
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"", []),
+    (b"42\n-17\n0\n", [42, -17, 0]),
+    # ESP32 boot noise, hex addresses and config lines are dropped
+    (b"ets Jul 29 2019 12:21:46\n\nrst:0x1 (POWERON_RESET),boot:0x13\nload:0x3fff0030,len:4980\n"
+     b"entry 0x400805b4\n924264\n0x1f\n926473\n", [924264, 926473]),
+    # A bare minus, a minus inside the number, two minus signs, a trailing minus
+    (b"-\n1-2\n--5\n5-\n-3\n", [-3]),
+    # Spaces or other characters make the whole line foreign
+    (b" 12\n12 \n1.5\n12\n", [12]),
+    # Last line without a newline
+    (b"1\n2\n3", [1, 2, 3]),
+    (b"boot\n-4", [-4]),
+    # CRLF line endings, including an empty CRLF line
+    (b"boot\r\n10\r\n\r\n-20\r\n30", [10, -20, 30]),
+    # More than 15 digits is not an ADC value
+    (b"1234567890123456\n123456789012345\n", [123456789012345]),
+])
+def test_parse_samples(data, expected):
+    assert parse_samples(data).tolist() == expected
+
+
+def _reference(data):
+    lines = data.replace(b"\r", b"\n").split(b"\n")
+    return [int(line) for line in lines if re.fullmatch(rb"-?\d{1,15}", line)]
+
+
+@pytest.mark.skipif(not CAPTURES, reason="no captures in results/")
+def test_parse_samples_matches_per_line_parse_on_captures():
+    for path in CAPTURES:
+        with open(path, "rb") as f:
+            data = f.read()
+        assert parse_samples(data).tolist() == _reference(data), path
+
+
+@pytest.mark.skipif(not CAPTURES, reason="no captures in results/")
+def test_import_results_captures(tmp_path):
+    db = DatabaseHandler(str(tmp_path / "jumps.db"))
+    try:
+        # A fixed rate: the checkout's mtimes say nothing about the capture length
+        imported = import_captures(CAPTURES, db, rate=DEFAULT_FREQUENCY, workers=1)
+        assert sorted(imported.values()) == [1, 1, 1, 1]
+        assert db.count_history() == 4
+        assert all(db.has_source(os.path.abspath(p)) for p in CAPTURES)
+        # Already imported files are skipped
+        assert import_captures(CAPTURES, db, rate=DEFAULT_FREQUENCY, workers=1) == {}
+        assert db.count_history() == 4
+    finally:
+        db.close()
@@ -0,0 +1,117 @@
+"""Crash journal: rotation never cuts a jump, recover() restores only missed jumps."""
+import pytest
+
+import journal
+from database import DatabaseHandler
+from journal import AcquisitionJournal, recover, replay
+from physics import PhysicsEngine
+
+HZ = 1288
+
+
+def jump(body=75.0, air=500):
+    """One countermovement jump in kg per sample, standing still before and after."""
+    return ([body] * 1500 + [body * 0.55] * 150 + [body * 2.0] * 250
+            + [0.0] * air + [body * 2.2] * 200 + [body] * 1500)
+
+
+class Acquisition:
+    """The serial loop in miniature: journal each sample, process it, journal its result."""
+
+    def __init__(self, path):
+        self.engine = PhysicsEngine({"frequency": HZ})
+        self.journal = AcquisitionJournal(str(path), self.engine)
+        self.engine.journal = self.journal
+        self.k = 0
+        self.results = []
+
+    def feed(self, kg):
+        for value in kg:
+            self.k += 1
+            raw = int(value * self.engine.config["raw_per_kg"])
+            host = self.k * 1000.0 / HZ
+            micros = int(self.k * 1e6 / HZ)
+            self.journal.append_sample(raw, micros, host)
+            res = self.engine.process_sample(raw, host, micros)
+            if res["result"]:
+                res["result"]["journal_index"] = self.journal.append_result(res["result"])
+                self.results.append(res["result"])
+
+    def crash(self):
+        """Stop as a killed process would: what was written stays, nothing is discarded."""
+        self.journal.running = False
+        self.journal.flusher.join(timeout=1.0)
+        with self.journal.lock:
+            self.journal._flush()
+            self.journal.file.close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    handler = DatabaseHandler(str(tmp_path / "jumps.db"))
+    yield handler
+    handler.close()
+
+
+def test_commit_during_next_jump_keeps_it_replayable(tmp_path):
+    path = tmp_path / "acquisition.journal"
+    acq = Acquisition(path)
+    first = jump(air=400)
+    acq.feed(first)
+    assert len(acq.results) == 1
+
+    # The DB write of jump 1 lands while jump 2 is already in propulsion
+    second = jump(air=500)
+    acq.feed(second[:1700])
+    assert acq.engine.state == "PROPULSION"
+    acq.journal.commit(acq.results[0]["journal_index"])
+    assert acq.journal.rotate_pending
+
+    acq.feed(second[1700:])
+    assert len(acq.results) == 2
+    acq.crash()
+
+    missed = replay(str(path))
+    assert len(missed) == 1
+    assert missed[0]["flight_time"] == pytest.approx(acq.results[1]["flight_time"], abs=2)
+
+
+def test_rotation_at_rest_primes_the_next_jump(tmp_path):
+    path = tmp_path / "acquisition.journal"
+    acq = Acquisition(path)
+    acq.feed(jump())
+    acq.journal.commit(acq.results[0]["journal_index"])
+    assert not acq.journal.rotate_pending
+
+    # Jump 2 starts right after the rotation: bodyweight and lookback come from the carried tail
+    acq.feed(jump()[1300:])
+    acq.crash()
+    records = list(journal.read_records(str(path)))
+    assert records[0][0] == b"H" and records[0][1]["primed"] == acq.journal.tail.maxlen
+
+    missed = replay(str(path))
+    assert len(missed) == 1
+    assert missed[0]["height_flight"] == pytest.approx(acq.results[1]["height_flight"], rel=0.01)
+
+
+def test_recover_restores_only_uncommitted_jumps(tmp_path, db):
+    path = tmp_path / "acquisition.journal"
+    acq = Acquisition(path)
+    acq.journal.set_context(athlete_id=7, session_id=3)
+    acq.feed(jump(air=400))
+    acq.feed(jump(air=500))
+    assert len(acq.results) == 2
+
+    # Jump 1 reached the DB, jump 2 was still queued when the process died
+    db.save_jump(dict(acq.results[0]))
+    acq.journal.commit(acq.results[0]["journal_index"])
+    acq.crash()
+
+    assert recover(str(path), db) == 1
+    assert not path.exists()
+    history = db.query_history(limit=10)
+    assert len(history) == 2
+    # Only the replayed jump carries the journaled athlete context
+    restored = [j for j in history if j["athlete_id"] == 7]
+    assert len(restored) == 1
+    assert restored[0]["flight_time"] == pytest.approx(acq.results[1]["flight_time"], abs=2)
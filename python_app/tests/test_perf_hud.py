@@ -0,0 +1,42 @@
+"""Smoke test: the performance HUD builds and redraws in a headless DearPyGui context."""
+import gc
+
+import pytest
+
+dpg = pytest.importorskip("dearpygui.dearpygui")
+
+from link_health import LinkHealth
+from ui.perf_hud import PerfHud
+
+
+class _Serial:
+    def __init__(self):
+        self.health = LinkHealth()
+
+
+@pytest.fixture
+def context():
+    dpg.create_context()
+    yield
+    dpg.destroy_context()
+
+
+def test_create_show_record_hide(context):
+    serial = _Serial()
+    hud = PerfHud(serial, {"db writes": lambda: 3})
+    hud.create()
+    assert dpg.does_item_exist("perf_hud")
+
+    hud.show()
+    now = 1000.0
+    for _ in range(100):
+        serial.health.samples += 13
+        hud.record(now, 0.016, 0.004, 0.002, 0.001, 0.0005)
+        now += 0.016
+    xs, ys = dpg.get_value("perf_hud_frame")[:2]
+    assert len(xs) == len(ys) > 0
+    assert "frame p50" in dpg.get_value("perf_hud_text")
+
+    hud.hide()
+    assert not hud.visible
+    assert hud._on_gc not in gc.callbacks
@@ -0,0 +1,111 @@
+"""Shared-memory ring: a reader in another process never sees torn rows, overruns are counted."""
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pytest
+
+from shm_ring import RingReader, SharedRing
+
+CAPACITY = 64
+COLUMNS = 4
+
+
+def _row(k):
+    # Every column derives from k, so a row mixing two writes is detectable
+    return (k, -k, k * 0.5, k * 2.0)
+
+
+def _write(ring, start, count):
+    for k in range(start, start + count):
+        index = (k - 1) % CAPACITY
+        ring.data[index] = _row(k)
+        ring.publish(index + 1)
+
+
+def _producer_main(name, n, ready, go, done):
+    ring = SharedRing(name, CAPACITY, COLUMNS, 1288.0)
+    try:
+        ready.set()
+        go.wait(10)
+        _write(ring, 1, n)
+        done.wait(30)
+    finally:
+        ring.close()
+
+
+def _check_rows(rows):
+    k = rows[:, 0]
+    assert np.array_equal(rows, np.stack([k, -k, k * 0.5, k * 2.0], axis=1)), "torn row"
+    assert np.array_equal(np.diff(k), np.ones(len(k) - 1)), "rows out of order"
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing(f"fpr_test_{os.getpid()}", CAPACITY, COLUMNS, 1288.0)
+    reader = RingReader(ring.name)
+    yield ring, reader
+    reader.close()
+    ring.close()
+
+
+def test_lapped_window_and_overruns(ring):
+    ring, reader = ring
+    _write(ring, 1, 10)
+    _, seq, gen, _ = reader.snapshot()
+    assert not reader._lapped(seq, gen, 10)
+    # Row k + 1 goes into the slot of row k + 1 - CAPACITY before it is published,
+    # so the window of rows 1-10 is unsafe as soon as row 64 is out
+    _write(ring, 11, CAPACITY - 11)
+    assert not reader._lapped(seq, gen, 10)
+    _write(ring, CAPACITY, 1)
+    assert reader._lapped(seq, gen, 10)
+
+    rows = reader.read_new()
+    assert len(rows) == CAPACITY - 1 and reader.overruns == 1
+    _check_rows(rows)
+    assert rows[-1, 0] == CAPACITY
+
+    # Three rings behind: only the newest readable rows are left, the rest is counted as lost
+    _write(ring, CAPACITY + 1, 3 * CAPACITY)
+    rows = reader.read_new()
+    _check_rows(rows)
+    assert len(rows) == CAPACITY - 1 and reader.overruns == 1 + 3 * CAPACITY - (CAPACITY - 1)
+    assert rows[-1, 0] == 4 * CAPACITY
+    _check_rows(reader.latest(2 * CAPACITY))
+    assert len(reader.latest(2 * CAPACITY)) == CAPACITY - 1
+
+
+def test_reader_in_other_process_never_sees_torn_rows():
+    n = 200000
+    name = f"fpr_test_{os.getpid()}_mp"
+    ctx = mp.get_context("spawn")
+    ready, go, done = ctx.Event(), ctx.Event(), ctx.Event()
+    producer = ctx.Process(target=_producer_main, args=(name, n, ready, go, done))
+    producer.start()
+    try:
+        assert ready.wait(30), "producer did not start"
+        reader = RingReader(name)
+        try:
+            go.set()
+            received = 0
+            last = 0
+            while last < n:
+                rows = reader.read_new()
+                if len(rows):
+                    _check_rows(rows)
+                    last = rows[-1, 0]
+                    received += len(rows)
+                latest = reader.latest(CAPACITY)
+                if len(latest):
+                    _check_rows(latest)
+            # Every row was either read once or counted as lost
+            assert received + reader.overruns == n
+            assert reader.overruns > 0, "reader never fell behind: producer too slow to lap it"
+        finally:
+            reader.close()
+    finally:
+        done.set()
+        producer.join(30)
+    assert producer.exitcode == 0
+
@@ -0,0 +1,156 @@
+"""Stream server on localhost: TCP and WebSocket clients, slow-client dropping."""
+import base64
+import json
+import os
+import socket
+import struct
+import time
+
+import numpy as np
+import pytest
+
+import stream_server
+from stream_server import MESSAGE_HEADER, MSG_JSON, MSG_SAMPLES, StreamServer, decode_samples
+
+
+class FakeEngine:
+    """Just the ring the server polls: buffer rows (t ms, kg, ...) and buf_idx."""
+
+    def __init__(self, capacity=200000):
+        self.buffer = np.zeros((capacity, 4))
+        self.buf_idx = 0
+        self.t = 0.0
+        self.config = {"frequency": 1288}
+        self.active_mode_name = "Single Jump"
+
+    def feed(self, kg):
+        kg = np.asarray(kg, dtype=np.float64)
+        n = len(kg)
+        i = self.buf_idx
+        self.buffer[i:i + n, 0] = self.t + np.arange(1, n + 1)
+        self.buffer[i:i + n, 1] = kg
+        self.t += n
+        self.buf_idx = (i + n) % len(self.buffer)
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("closed")
+        data += chunk
+    return data
+
+
+def _tcp_message(sock):
+    kind, length = MESSAGE_HEADER.unpack(_recv_exact(sock, MESSAGE_HEADER.size))
+    return kind, _recv_exact(sock, length)
+
+
+def _ws_message(sock):
+    b0, b1 = _recv_exact(sock, 2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", _recv_exact(sock, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", _recv_exact(sock, 8))[0]
+    return b0 & 0x0F, _recv_exact(sock, n)
+
+
+def _ws_connect(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    key = base64.b64encode(os.urandom(16)).decode()
+    sock.sendall((f"GET / HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    response = b""
+    while not response.endswith(b"\r\n\r\n"):
+        response += _recv_exact(sock, 1)
+    assert response.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def _wait_clients(server, n):
+    deadline = time.monotonic() + 5
+    while len(server.clients) < n:
+        assert time.monotonic() < deadline, "client not registered"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def served():
+    engine = FakeEngine()
+    server = StreamServer(engine, "127.0.0.1", 0, ws_port=0, decimate=1).start()
+    yield engine, server
+    server.stop()
+
+
+def test_tcp_and_websocket_clients(served):
+    engine, server = served
+    tcp = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    ws = _ws_connect(server.ws_port)
+    _wait_clients(server, 2)
+
+    kind, payload = _tcp_message(tcp)
+    assert kind == MSG_JSON and json.loads(payload)["type"] == "hello"
+    opcode, payload = _ws_message(ws)
+    assert opcode == 0x1 and json.loads(payload)["decimate"] == 1
+
+    engine.feed([10.0, 20.5, 30.25])
+    kind, payload = _tcp_message(tcp)
+    assert kind == MSG_SAMPLES
+    _, t, kg = decode_samples(payload)
+    assert t.tolist() == [1.0, 2.0, 3.0]
+    assert kg.dtype == np.float32 and kg.tolist() == [10.0, 20.5, 30.25]
+    opcode, payload = _ws_message(ws)
+    assert opcode == 0x2 and decode_samples(payload)[2].tolist() == [10.0, 20.5, 30.25]
+
+    server.publish_result({"height_flight": 31.5, "force_curve": [1, 2, 3]})
+    kind, payload = _tcp_message(tcp)
+    result = json.loads(payload)
+    assert kind == MSG_JSON and result == {"height_flight": 31.5, "type": "result"}
+    opcode, payload = _ws_message(ws)
+    assert opcode == 0x1 and json.loads(payload)["height_flight"] == 31.5
+    tcp.close()
+    ws.close()
+
+
+def test_slow_client_drops_oldest_frames_keeps_results(served):
+    engine, server = served
+    slow = socket.socket()
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.settimeout(5)
+    slow.connect(("127.0.0.1", server.port))
+    _wait_clients(server, 1)
+    client = next(iter(server.clients))
+    client.writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+    # Large frames while the client does not read: socket and transport fill up
+    deadline = time.monotonic() + 3
+    while server.dropped_frames < 4:
+        assert time.monotonic() < deadline, "no frames dropped"
+        engine.feed(np.full(5000, 1.0))
+        time.sleep(stream_server.POLL_INTERVAL)
+    server.publish_result({"height_flight": 40.0})
+    time.sleep(0.1)
+    assert client.dropped == server.dropped_frames
+    assert len(client.frames) == stream_server.MAX_QUEUED_FRAMES
+
+    seqs = []
+    results = []
+    slow.settimeout(1)
+    try:
+        while True:
+            kind, payload = _tcp_message(slow)
+            if kind == MSG_SAMPLES:
+                seqs.append(decode_samples(payload)[0])
+            else:
+                results.append(json.loads(payload))
+    except (socket.timeout, ConnectionError):
+        pass
+    slow.close()
+
+    assert [r["type"] for r in results] == ["hello", "result"]
+    # The newest frames arrive; the dropped ones leave a gap in the sequence
+    assert seqs == sorted(seqs)
+    assert seqs[-1] - seqs[0] + 1 == len(seqs) + server.dropped_frames
@@ -0,0 +1,263 @@
+"""
+Parameter sweep and auto-tuning of detection thresholds.
+
+Evaluates parameter sets (modes.base.DEFAULT_PARAMS overrides) against
+labeled captures in a process pool. Each configuration is scored by
+detection F1, mean absolute flight-height error of matched jumps and CPU
+cost per sample. The best profile can be stored as the "detection_profile"
+setting, which the app loads at startup.
+
+Labels file (JSON):
+
+    {"captures": [
+        {"file": "results/capture.txt", "rate": 1288,
+         "jumps": [{"t_ms": 4120.5, "height_cm": 30.2}, ...]}
+    ]}
+
+t_ms is the landing time from the first sample of the capture. A labels
+file to correct by hand can be bootstrapped from the current detections:
+
+    python tuning.py --bootstrap labels.json results/*.txt
+    python tuning.py labels.json --grid air_threshold=70000,90000,110000 \\
+        --grid movement_threshold=9000,13000,17000 --save-profile
+    python tuning.py labels.json --random 100 --range air_threshold=60000:120000
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from modes.base import DEFAULT_PARAMS
+from replay import replay_samples
+
+DEFAULT_FREQUENCY = 1288
+MODE = "Single Jump"
+MATCH_TOLERANCE_MS = 150.0
+T0_MS = 1000.0   # synthetic time of the first sample (the engine treats 0 as "unset")
+
+_capture_cache = {}
+
+
+def _load_capture(path):
+    """Parsed samples of a capture, cached per worker process."""
+    raw = _capture_cache.get(path)
+    if raw is None:
+        from importer import parse_samples
+        with open(path, "rb") as f:
+            raw = parse_samples(f.read())
+        _capture_cache[path] = raw
+    return raw
+
+
+def detect(path, rate, params=None, config=None):
+    """Single Jump results for one capture; result "t_ms" is the landing time from the first sample."""
+    import numpy as np
+
+    raw = _load_capture(path)
+    cfg = dict(config or {}, frequency=rate)
+    host_ms = T0_MS + np.arange(len(raw)) * (1000.0 / rate)
+    results = replay_samples(raw, host_ms, None, cfg, MODE, 0.0, None, params)
+    for r in results:
+        r["t_ms"] = r["timestamp"] - T0_MS
+    return results, len(raw)
+
+
+def match(detected, labeled, tolerance=MATCH_TOLERANCE_MS):
+    """Greedy one-to-one matching by landing time; returns [(detected, label)] pairs."""
+    pairs = []
+    used = set()
+    for label in sorted(labeled, key=lambda j: j["t_ms"]):
+        best = None
+        for i, d in enumerate(detected):
+            dt = abs(d["t_ms"] - label["t_ms"])
+            if i not in used and dt <= tolerance and (best is None or dt < best[0]):
+                best = (dt, i)
+        if best:
+            used.add(best[1])
+            pairs.append((detected[best[1]], label))
+    return pairs
+
+
+def evaluate(params, captures, config=None):
+    """Score one parameter set over all labeled captures. Runs in a worker process."""
+    tp = fp = fn = 0
+    errors = []
+    samples = 0
+    cpu = 0.0
+    for cap in captures:
+        rate = cap.get("rate", DEFAULT_FREQUENCY)
+        _load_capture(cap["file"])   # parsing is not part of the per-sample cost
+        t0 = time.process_time()
+        detected, n = detect(cap["file"], rate, params, config)
+        cpu += time.process_time() - t0
+        samples += n
+
+        pairs = match(detected, cap["jumps"])
+        tp += len(pairs)
+        fp += len(detected) - len(pairs)
+        fn += len(cap["jumps"]) - len(pairs)
+        errors.extend(abs(d["height_flight"] - l["height_cm"]) for d, l in pairs
+                      if l.get("height_cm") is not None)
+
+    return {
+        "params": params,
+        "tp": tp, "fp": fp, "fn": fn,
+        "f1": 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 1.0,
+        "height_mae_cm": sum(errors) / len(errors) if errors else None,
+        "us_per_sample": cpu / max(1, samples) * 1e6,
+    }
+
+
+def _rank_key(score):
+    # Ties go to the profile closest to the defaults; CPU cost is the last resort since it is noisy
+    mae = score["height_mae_cm"]
+    changed = sum(1 for k, v in score["params"].items() if DEFAULT_PARAMS.get(k) != v)
+    return (-score["f1"], round(mae, 2) if mae is not None else float("inf"), changed,
+            score["us_per_sample"])
+
+
+def grid(axes):
+    """All combinations of {name: [values]}."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def random_search(ranges, n, seed=0):
+    """n random parameter sets from {name: (low, high)}; integer parameters stay integers."""
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(n):
+        params = {}
+        for name, (low, high) in ranges.items():
+            value = rng.uniform(low, high)
+            params[name] = round(value) if isinstance(DEFAULT_PARAMS[name], int) else value
+        sets.append(params)
+    return sets
+
+
+def sweep(param_sets, captures, config=None, workers=None, on_progress=None):
+    """Evaluate every parameter set in parallel; returns scores, best first."""
+    scores = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate, p, captures, config) for p in param_sets]
+        for done, future in enumerate(futures, 1):
+            scores.append(future.result())
+            if on_progress:
+                on_progress(done, len(futures), scores[-1])
+    return sorted(scores, key=_rank_key)
+
+
+def bootstrap_labels(paths, out, rate=DEFAULT_FREQUENCY, config=None):
+    """Write a labels file from the current default detections, for hand correction."""
+    # main() resolves relative paths against the labels file: captures next to
+    # (or below) it are stored relative to it, anything else as an absolute path
+    labels_dir = os.path.dirname(os.path.abspath(out))
+    captures = []
+    for path in paths:
+        detected, _ = detect(path, rate, None, config)
+        file = os.path.abspath(path)
+        try:
+            if os.path.commonpath([file, labels_dir]) == labels_dir:
+                file = os.path.relpath(file, labels_dir)
+        except ValueError:   # different drives (Windows)
+            pass
+        captures.append({
+            "file": file,
+            "rate": rate,
+            "jumps": [{"t_ms": round(d["t_ms"], 1), "height_cm": round(d["height_flight"], 2)}
+                      for d in detected],
+        })
+    with open(out, "w") as f:
+        json.dump({"captures": captures}, f, indent=1)
+    return captures
+
+
+def _parse_axes(items, parse):
+    axes = {}
+    for item in items or []:
+        name, _, spec = item.partition("=")
+        if name not in DEFAULT_PARAMS:
+            raise SystemExit(f"Unknown parameter {name!r}; known: {', '.join(DEFAULT_PARAMS)}")
+        axes[name] = parse(name, spec)
+    return axes
+
+
+def _grid_values(name, spec):
+    kind = type(DEFAULT_PARAMS[name])
+    return [kind(float(v)) for v in spec.split(",")]
+
+
+def _range_values(name, spec):
+    low, _, high = spec.partition(":")
+    return float(low), float(high)
+
+
+def _format_score(score):
+    mae = score["height_mae_cm"]
+    mae = f"{mae:5.2f}" if mae is not None else "   --"
+    changed = {k: v for k, v in score["params"].items() if DEFAULT_PARAMS[k] != v}
+    return (f"F1 {score['f1']:.3f} (tp {score['tp']} fp {score['fp']} fn {score['fn']})  "
+            f"height err {mae} cm  {score['us_per_sample']:5.2f} us/sample  {changed or 'defaults'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune detection parameters against labeled captures")
+    parser.add_argument("labels", help="labels JSON (or output path with --bootstrap)")
+    parser.add_argument("captures", nargs="*", help="capture files for --bootstrap")
+    parser.add_argument("--bootstrap", action="store_true", help="write labels from current detections")
+    parser.add_argument("--grid", action="append", metavar="NAME=V1,V2,...")
+    parser.add_argument("--random", type=int, metavar="N", help="random search with N samples")
+    parser.add_argument("--range", action="append", metavar="NAME=LOW:HIGH", help="random search range")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--db", default="jumps_data.db")
+    parser.add_argument("--save-profile", action="store_true", help="store the best profile in the DB settings")
+    parser.add_argument("--out", help="write the best profile to a JSON file")
+    args = parser.parse_args()
+
+    if args.bootstrap:
+        captures = bootstrap_labels(args.captures, args.labels)
+        print(f"Wrote {sum(len(c['jumps']) for c in captures)} label(s) for {len(captures)} capture(s) "
+              f"to {args.labels}")
+        return
+
+    with open(args.labels) as f:
+        captures = json.load(f)["captures"]
+    base = os.path.dirname(os.path.abspath(args.labels))
+    for cap in captures:
+        cap["file"] = os.path.join(base, cap["file"]) if not os.path.isabs(cap["file"]) else cap["file"]
+
+    param_sets = [{}]
+    if args.grid:
+        param_sets = grid(_parse_axes(args.grid, _grid_values))
+    if args.random:
+        param_sets += random_search(_parse_axes(args.range, _range_values), args.random, args.seed)
+    param_sets = [dict(DEFAULT_PARAMS, **p) for p in param_sets]
+
+    def progress(done, total, score):
+        print(f"\r{done}/{total} configurations", end="", flush=True)
+
+    t0 = time.perf_counter()
+    scores = sweep(param_sets, captures, workers=args.workers, on_progress=progress)
+    print(f"\nEvaluated {len(scores)} configuration(s) in {time.perf_counter() - t0:.1f} s")
+    for score in scores[:args.top]:
+        print(_format_score(score))
+
+    best = scores[0]["params"]
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(best, f, indent=1)
+    if args.save_profile:
+        from database import DatabaseHandler
+        db = DatabaseHandler(args.db)
+        db.save_setting("detection_profile", json.dumps(best)).result()
+        db.close()
+        print(f"Saved best profile to {args.db} (setting 'detection_profile')")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 # UI Package
-from .themes import setup_themes
-from .callbacks import setup_callbacks
-from .main_menu import create_main_menu
-from .single_jump import create_single_jump_header
-from .jump_estimation import create_jump_estimation_header
-from .shared import create_shared_content
+# Exports are resolved on first access, so importing one submodule (e.g. the
+# main menu) does not pull in every mode's widgets at startup.
+import importlib
 
-__all__ = [
-    'setup_themes',
-    'setup_callbacks', 
-    'create_main_menu',
-    'create_single_jump_header',
-    'create_jump_estimation_header',
-    'create_shared_content'
-]
+_EXPORTS = {
+    'setup_themes': '.themes',
+    'setup_callbacks': '.callbacks',
+    'create_main_menu': '.main_menu',
+    'create_single_jump_header': '.single_jump',
+    'create_jump_estimation_header': '.jump_estimation',
+    'create_shared_content': '.shared',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,24 @@
 """
 Callback functions for the Force Plate PRO application.
 """
+import datetime
 import dearpygui.dearpygui as dpg
 import numpy as np
+from .history_view import HistoryViewModel
+from curve_codec import curve_columns, curve_length
 
 # These will be set by setup_callbacks()
 _physics = None
 _serial_handler = None
 _db = None
-_jump_history = None
+_history_view = None
+_athletes = {}
+_athlete_id = None
+_session_id = None
 _selected_jump = None
 _auto_fit_y = True
+_perf_hud = None
+_profiler = None
 _current_plot_data = {
     "x": [],
     "y": [],
@@ -19,22 +27,23 @@ _current_plot_data = {
 }
 
 
-def setup_callbacks(physics, serial_handler, db, jump_history_ref):
+def setup_callbacks(physics, serial_handler, db):
     """Initialize callbacks with references to app components."""
-    global _physics, _serial_handler, _db, _jump_history
+    global _physics, _serial_handler, _db, _history_view
     _physics = physics
     _serial_handler = serial_handler
     _db = db
-    _jump_history = jump_history_ref
+    _history_view = HistoryViewModel(db)
+    _history_view.on_page_changed = _on_history_page_changed
 
 
 def get_state():
     """Get current application state."""
-    global _selected_jump, _auto_fit_y, _jump_history
+    global _selected_jump, _auto_fit_y
     return {
         'selected_jump': _selected_jump,
         'auto_fit_y': _auto_fit_y,
-        'jump_history': _jump_history
+        'jump_history': get_jump_history()
     }
 
 
@@ -50,14 +59,49 @@ def get_selected_jump():
 
 
 def get_jump_history():
-    """Get reference to jump history list."""
-    return _jump_history
+    """Get the jumps currently materialized in the history panel."""
+    return _history_view.rows
 
 
-def set_jump_history(history):
-    """Update jump history reference."""
-    global _jump_history
-    _jump_history = history
+def get_history_view():
+    """Get the incremental history view model."""
+    return _history_view
+
+
+def set_perf_hud(hud):
+    """Register the performance HUD (ui.perf_hud.PerfHud) toggled by the checkbox."""
+    global _perf_hud
+    _perf_hud = hud
+
+
+def toggle_perf_hud(sender, app_data):
+    """Show or hide the performance HUD."""
+    if _perf_hud is None:
+        return
+    if app_data:
+        _perf_hud.show()
+    else:
+        _perf_hud.hide()
+
+
+def set_profiler(profiler):
+    """Register the sampling profiler (profiler.SamplingProfiler or its remote proxy)."""
+    global _profiler
+    _profiler = profiler
+
+
+def toggle_profiler(sender, app_data):
+    """Start sampling, or stop and write the collapsed-stack file."""
+    if _profiler is None:
+        return
+    if app_data:
+        path = _profiler.start()
+        dpg.set_value("txt_profile", f"Profiling -> {path}" if path else "Profiler failed to start")
+    elif _profiler.running:
+        summary = _profiler.stop()
+        if summary:
+            dpg.set_value("txt_profile", f"{summary['path']}: {summary['samples']} samples, "
+                                         f"{summary['overhead'] * 100:.2f}% overhead")
 
 
 def toggle_autofit(sender, app_data):
@@ -114,9 +158,7 @@ def calibrate_callback():
 
 def clear_history_callback():
     """Clear all jump history."""
-    global _jump_history
-    _db.clear()
-    _jump_history.clear()
+    _db.clear().add_done_callback(lambda f: _history_view.on_clear())
     _current_plot_data["x"] = []
     _current_plot_data["y"] = []
     _current_plot_data["p"] = []
@@ -132,7 +174,7 @@ def clear_history_callback():
 
 def delete_selected_jump_callback():
     """Delete the currently selected jump."""
-    global _jump_history, _selected_jump
+    global _selected_jump
     selection = dpg.get_value("list_history")
     if not selection:
         return
@@ -140,19 +182,10 @@ def delete_selected_jump_callback():
     idx_str = selection.split(':')[0].replace('#', '')
     try:
         idx = int(idx_str)
-        _jump_history[:] = [j for j in _jump_history if j['_id'] != idx]
+        # Listbox is refreshed by the main loop once the delete is committed
+        _db.delete_jump(idx).add_done_callback(lambda f: _history_view.on_delete(idx))
         
-        # Update Listbox
-        items = [
-            f"#{j['_id']}: {j['height_flight']:.1f}cm ({j['flight_time']:.0f}ms)" 
-            if (j.get('height_flight') or 0) > 0 
-            else f"#{j['_id']}: CT {j.get('contact_time', 0):.0f}ms" if 'contact_time' in j
-            else f"#{j['_id']}: Imp {j.get('height_impulse', 0):.1f}cm" 
-            for j in _jump_history
-        ]
-        dpg.configure_item("list_history", items=items)
-        
-        if _selected_jump and _selected_jump['_id'] == idx:
+        if _selected_jump and _selected_jump.get('_id') == idx:
             _selected_jump = None
             dpg.configure_item("plot_line_series", x=[], y=[])
             dpg.configure_item("plot_line_series_power", x=[], y=[])
@@ -171,31 +204,29 @@ def history_click_callback(sender, app_data):
     try:
         idx_str = app_data.split(':')[0].replace('#', '')
         idx = int(idx_str)
-        target = None
-        for j in _jump_history:
-            if j['_id'] == idx:
-                target = j
-                break
+        target = _history_view.find(idx)
+        if target is None:
+            target = _db.get_jump(idx)
+        
+        # History rows only carry scalars; fetch the curve on demand
+        if target is not None and 'force_curve' not in target:
+            target['force_curve'] = _db.load_curve(idx)
         
         if target:
             _selected_jump = target
             
             curve = target.get('force_curve')
-            if curve and len(curve) > 0:
-                xs = [(p['t'] - curve[0]['t'])/1000.0 for p in curve]
-                ys = [p.get('v', 0) for p in curve] 
+            if curve_length(curve) > 0:
+                cols = curve_columns(curve)
                 
                 # Check if power and velocity are present
-                has_power = all(p.get('p') is not None for p in curve)
-                has_vel = all(p.get('vel') is not None for p in curve)
+                has_power = cols['p'] is not None
+                has_vel = cols['vel'] is not None
 
-                ps = [p.get('p', 0) for p in curve] if has_power else []
-                vs = [p.get('vel', 0) for p in curve] if has_vel else []
-                
-                xs = np.ascontiguousarray(xs)
-                ys = np.ascontiguousarray(ys)
-                ps = np.ascontiguousarray(ps)
-                vs = np.ascontiguousarray(vs)
+                xs = (cols['t'] - cols['t'][0]) / 1000.0
+                ys = np.ascontiguousarray(cols['v'], dtype=np.float64)
+                ps = np.ascontiguousarray(cols['p'], dtype=np.float64) if has_power else np.zeros(0)
+                vs = np.ascontiguousarray(cols['vel'], dtype=np.float64) if has_vel else np.zeros(0)
 
                 dpg.configure_item("plot_line_series", x=xs, y=ys)
                 dpg.configure_item("plot_line_series_power", x=xs if has_power else [], y=ps if has_power else [])
@@ -245,6 +276,146 @@ def history_click_callback(sender, app_data):
         print(f"Error in history_click_callback: {e}")
 
 
+def history_wheel_callback(sender, app_data):
+    """Scroll the history window with the mouse wheel while hovering the list."""
+    if dpg.is_item_hovered("list_history"):
+        _history_view.scroll(-int(app_data) * 3)
+
+
+def history_scroll_callback(sender, app_data):
+    """Scroll the history window from the vertical slider (top = newest)."""
+    _history_view.scroll_to(_history_view.max_offset() - app_data)
+
+
+def _on_history_page_changed(view):
+    _update_history_scrollbar(view)
+    refresh_summary()
+
+
+def _update_history_scrollbar(view):
+    max_offset = view.max_offset()
+    dpg.configure_item("slider_history_scroll", max_value=max(1, max_offset))
+    dpg.set_value("slider_history_scroll", max_offset - view.offset)
+    first = view.offset + 1 if view.total else 0
+    last = view.offset + len(view.rows)
+    dpg.set_value("txt_history_page", f"{first}-{last} of {view.total}")
+
+
+def _parse_date(text, days=0):
+    """'YYYY-MM-DD' -> epoch ms (start of that day + days), or None if blank/invalid."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        day = datetime.datetime.strptime(text, "%Y-%m-%d") + datetime.timedelta(days=days)
+    except ValueError:
+        return None
+    return day.timestamp() * 1000
+
+
+def _parse_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def history_filter_callback():
+    """Apply the history filter inputs as server-side query filters."""
+    _history_view.set_filters(
+        start_ts=_parse_date(dpg.get_value("input_hist_from")),
+        end_ts=_parse_date(dpg.get_value("input_hist_to"), days=1),
+        metric=dpg.get_value("combo_hist_metric"),
+        min_value=_parse_float(dpg.get_value("input_hist_min")),
+        max_value=_parse_float(dpg.get_value("input_hist_max")),
+    )
+
+
+def history_filter_reset_callback():
+    """Clear all history filters."""
+    for tag in ("input_hist_from", "input_hist_to", "input_hist_min", "input_hist_max"):
+        dpg.set_value(tag, "")
+    _history_view.set_filters()
+
+
+# --- ATHLETES & SESSIONS ---
+def start_session(athlete_id=None):
+    """End the current session and start a new one for athlete_id (None = anonymous)."""
+    global _athlete_id, _session_id
+    if _session_id is not None:
+        _db.end_session(_session_id)
+    _athlete_id = athlete_id
+    _session_id = _db.start_session(athlete_id).result()
+    if _serial_handler and _serial_handler.journal:
+        _serial_handler.journal.set_context(athlete_id=_athlete_id, session_id=_session_id)
+    refresh_summary()
+
+
+def end_session():
+    if _session_id is not None:
+        _db.end_session(_session_id)
+
+
+def refresh_athletes():
+    """Reload the athlete combo from the DB."""
+    global _athletes
+    _athletes = {name: athlete_id for athlete_id, name in _db.list_athletes()}
+    dpg.configure_item("combo_athlete", items=["(none)"] + list(_athletes))
+
+
+def athlete_select_callback(sender, app_data):
+    """Switching athlete starts a new session for them."""
+    start_session(_athletes.get(app_data))
+
+
+def add_athlete_callback():
+    name = dpg.get_value("input_athlete_name").strip()
+    if not name:
+        return
+    athlete_id = _db.create_athlete(name).result()
+    refresh_athletes()
+    dpg.set_value("combo_athlete", name)
+    dpg.set_value("input_athlete_name", "")
+    start_session(athlete_id)
+
+
+def _format_summary(title, summary):
+    lines = [title]
+    for metric, label, unit, fmt in [("height_flight", "Height", "cm", ".1f"),
+                                     ("peak_power", "Peak P", "W", ".0f"),
+                                     ("contact_time", "CT", "ms", ".0f")]:
+        m = summary.get(metric)
+        if m:
+            lines.append(f"{label}: n={m['count']} best {m['best']:{fmt}} "
+                         f"mean {m['mean']:{fmt}}+-{m['sd']:{fmt}} {unit}")
+    return "\n".join(lines) if len(lines) > 1 else title + " --"
+
+
+def refresh_summary():
+    """Show the precomputed session / athlete summaries (O(1) reads)."""
+    if _session_id is None or not dpg.does_item_exist("txt_summary"):
+        return
+    text = _format_summary("Session", _db.get_summary("session", _session_id))
+    if _athlete_id is not None:
+        text += "\n" + _format_summary("Athlete", _db.get_summary("athlete", _athlete_id))
+    dpg.set_value("txt_summary", text)
+
+
+LINK_STATUS_COLORS = {"ok": (0, 255, 0), "degraded": (255, 200, 0), "failing": (255, 0, 0)}
+
+
+def refresh_link_health():
+    """Show the serial link health line (called about once a second)."""
+    if not dpg.does_item_exist("txt_link_health"):
+        return
+    health = _serial_handler.health
+    if not _serial_handler.connected:
+        dpg.configure_item("txt_link_health", default_value="Link: --", color=(150, 150, 150))
+        return
+    dpg.configure_item("txt_link_health", default_value=health.summary(),
+                       color=LINK_STATUS_COLORS.get(health.status, (150, 150, 150)))
+
+
 def update_current_plot_data(x, y, p, v):
     """External helper to update the tracked plot data."""
     global _current_plot_data
@@ -442,16 +613,30 @@ def show_contact_time(sender=None, app_data=None):
 
 def on_new_jump(jump_result):
     """Callback when a new jump is recorded."""
-    global _selected_jump, _jump_history
-    # Save to DB
-    new_id = _db.save_jump(jump_result)
-    jump_result['_id'] = new_id
-    
-    # Add to history
-    _jump_history.insert(0, jump_result)  # Newest first
+    global _selected_jump
+    # Queue for the DB writer thread; the id arrives once it is committed
+    jump_result['_id'] = None
+    jump_result['athlete_id'] = _athlete_id
+    jump_result['session_id'] = _session_id
+    future = _db.save_jump_async(jump_result)
+    future.add_done_callback(lambda f: _on_jump_saved(jump_result, f))
     _selected_jump = jump_result
 
 
+def _on_jump_saved(jump_result, future):
+    """Runs on the DB writer thread after the insert was committed."""
+    if future.exception() is not None:
+        print(f"Failed to save jump: {future.exception()}")
+        return
+    jump_result['_id'] = future.result()
+    journal = _serial_handler.journal if _serial_handler else None
+    if journal and 'journal_index' in jump_result:
+        journal.commit(jump_result['journal_index'])
+    
+    # History page is refetched by the main loop on the next sync
+    _history_view.on_insert(jump_result)
+
+
 def safe_fmt(val, unit, fmt=".1f"):
     """Format value with unit, handling None and non-numeric types."""
     if val is None:
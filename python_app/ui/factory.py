@@ -1,13 +1,13 @@
-from .single_jump import SingleJumpController
-from .jump_estimation import JumpEstimationController
-from .contact_time import ContactTimeController
-
 def get_controller(mode_name):
+    # Controllers are imported on first use, the main menu does not need them
     if mode_name in ["Single Jump", "Box Drop", "Box Drop Jump", "Push Up", "Squat", "Deadlift", "Power Clean"]:
+        from .single_jump import SingleJumpController
         # All these currently share the same UI logic
         return SingleJumpController(mode_name)
     elif mode_name == "Jump Estimation":
+        from .jump_estimation import JumpEstimationController
         return JumpEstimationController(mode_name)
     elif mode_name == "Contact Time":
+        from .contact_time import ContactTimeController
         return ContactTimeController(mode_name)
     return None
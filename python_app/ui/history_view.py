@@ -0,0 +1,159 @@
+"""
+History view model - a virtualized, paged window over the jumps table.
+
+Only the rows visible in the listbox are materialized. Scrolling and filter
+changes fetch one page through an indexed SQL query, and insert, delete or
+clear events just mark the window dirty so it is refetched on the next sync.
+Scrolling pages from the first row shown (a (timestamp, id) keyset anchor),
+so the query only skips the rows scrolled over; inserts, deletes and filter
+changes shift the offsets and drop the anchor.
+Pages are fetched by a loader thread, so the GUI thread never waits on the
+database - at startup the list fills in after the window is up.
+"""
+import threading
+import dearpygui.dearpygui as dpg
+from database import MODE_FAMILIES
+
+
+def family_for_mode(mode_name):
+    """Map a physics mode name to the history family shown in the list."""
+    for family, modes in MODE_FAMILIES.items():
+        if mode_name in modes:
+            return family
+    return None
+
+
+def format_label(jump):
+    """Listbox label for a jump (the '#<id>:' prefix is parsed back by the callbacks)."""
+    if (jump.get('height_flight') or 0) > 0:
+        return f"#{jump['_id']}: {jump['height_flight']:.1f}cm ({jump['flight_time']:.0f}ms)"
+    if 'contact_time' in jump:
+        return f"#{jump['_id']}: CT {jump.get('contact_time', 0):.0f}ms"
+    return f"#{jump['_id']}: Imp {jump.get('height_impulse', 0):.1f}cm"
+
+
+class HistoryViewModel:
+    """
+    Keeps the visible page of jumps and its cached labels.
+    Events may arrive from the serial thread; sync() runs on the GUI thread
+    and only applies pages the loader thread has finished.
+    """
+    def __init__(self, db, tag="list_history", page_size=15):
+        self.db = db
+        self.tag = tag
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.anchor = None      # (offset, history key) of the first row shown
+        self.total = 0
+        self.filters = {}
+        self.rows = []
+        self.labels = []
+        self.dirty = True
+        self.shown_family = None
+        self.on_page_changed = None
+
+        # Loader thread: request (filters, offset, anchor) in, finished page out
+        self.request = None
+        self.loaded = None
+        self.wake = threading.Event()
+        self.loader = threading.Thread(target=self._loader_loop, daemon=True)
+        self.loader.start()
+
+    def on_insert(self, jump):
+        with self.lock:
+            self.anchor = None
+            self.dirty = True
+
+    def on_delete(self, jump_id):
+        with self.lock:
+            self.anchor = None
+            self.dirty = True
+
+    def on_clear(self):
+        with self.lock:
+            self.offset = 0
+            self.anchor = None
+            self.dirty = True
+
+    def set_filters(self, **filters):
+        """Server-side filters: start_ts, end_ts, metric, min_value, max_value."""
+        with self.lock:
+            self.filters = {k: v for k, v in filters.items() if v is not None}
+            self.offset = 0
+            self.anchor = None
+            self.dirty = True
+
+    def scroll(self, delta_rows):
+        self.scroll_to(self.offset + delta_rows)
+
+    def scroll_to(self, offset):
+        with self.lock:
+            offset = max(0, min(int(offset), self.max_offset()))
+            if offset != self.offset:
+                self.offset = offset
+                self.dirty = True
+
+    def max_offset(self):
+        return max(0, self.total - self.page_size)
+
+    def find(self, jump_id):
+        """Look up a jump in the visible page."""
+        for j in self.rows:
+            if j['_id'] == jump_id:
+                return j
+        return None
+
+    def sync(self, mode_name):
+        """Request a refetch if the page changed, and push a finished page to the listbox."""
+        family = family_for_mode(mode_name)
+        if self.dirty or family != self.shown_family:
+            with self.lock:
+                if family != self.shown_family:
+                    self.offset = 0
+                    self.anchor = None
+                self.dirty = False
+                self.shown_family = family
+                self.request = (dict(self.filters, family=family), self.offset, self.anchor)
+                self.loaded = None   # stale: fetched for the previous request
+            self.wake.set()
+
+        with self.lock:
+            page = self.loaded
+            self.loaded = None
+        if page is None:
+            return False
+        with self.lock:
+            self.total, self.offset, self.rows = page
+            if self.request is None and not self.dirty:
+                self.anchor = (self.offset, self.db.history_key(self.rows[0])) if self.rows else None
+        self.labels = [format_label(j) for j in self.rows]
+        dpg.configure_item(self.tag, items=self.labels)
+        if self.on_page_changed:
+            self.on_page_changed(self)
+        return True
+
+    def _loader_loop(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                request = self.request
+                self.request = None
+            if request is None:
+                continue
+            filters, offset, anchor = request
+            try:
+                total = self.db.count_history(**filters)
+                offset = max(0, min(offset, total - self.page_size))
+                if anchor is None:
+                    rows = self.db.query_history(offset, self.page_size, **filters)
+                else:
+                    rows = self.db.query_history(offset - anchor[0], self.page_size, start=anchor[1], **filters)
+            except Exception as e:
+                print(f"History load failed: {e}")
+                continue
+            with self.lock:
+                # A newer request supersedes this page (e.g. still scrolling)
+                if self.request is None:
+                    self.loaded = (total, offset, rows)
@@ -1,15 +1,38 @@
 """
 Main menu UI layout.
+
+The menu is drawn before the database and engine are up, so it does not
+import the callbacks module: buttons name their callback, it is looked up
+on click, and a click made before set_menu_ready() is held until then.
 """
+import importlib
+import threading
+
 import dearpygui.dearpygui as dpg
-from .callbacks import (
-    show_single_jump, 
-    show_jump_estimation, 
-    show_contact_time,
-    show_box_drop,
-    show_box_drop_jump,
-    show_push_up
-)
+
+_ready = False
+_pending = None
+_lock = threading.Lock()
+
+
+def _choose(sender, app_data, user_data):
+    global _pending
+    with _lock:
+        if not _ready:
+            _pending = (sender, app_data, user_data)
+            return
+    callbacks = importlib.import_module(".callbacks", __package__)
+    getattr(callbacks, user_data)(sender, app_data)
+
+
+def set_menu_ready():
+    """The app is set up: menu clicks run from now on, a held one runs now."""
+    global _ready, _pending
+    with _lock:
+        _ready = True
+        pending, _pending = _pending, None
+    if pending:
+        _choose(*pending)
 
 
 def create_main_menu():
@@ -27,15 +50,15 @@ def create_main_menu():
                 dpg.add_text("JUMPS", color=(150, 150, 150))
                 dpg.add_spacer(height=10)
                 
-                dpg.add_button(label="SINGLE JUMP", width=180, height=30, callback=show_single_jump)
+                dpg.add_button(label="SINGLE JUMP", width=180, height=30, callback=_choose, user_data="show_single_jump")
                 dpg.add_spacer(height=10)
-                dpg.add_button(label="BOX DROP", width=180, height=30, callback=show_box_drop)
+                dpg.add_button(label="BOX DROP", width=180, height=30, callback=_choose, user_data="show_box_drop")
                 dpg.add_spacer(height=10)
-                dpg.add_button(label="BOX DROP JUMP", width=180, height=30, callback=show_box_drop_jump)
+                dpg.add_button(label="BOX DROP JUMP", width=180, height=30, callback=_choose, user_data="show_box_drop_jump")
                 dpg.add_spacer(height=10)
-                dpg.add_button(label="CONTACT TIME", width=180, height=30, callback=show_contact_time)
+                dpg.add_button(label="CONTACT TIME", width=180, height=30, callback=_choose, user_data="show_contact_time")
                 dpg.add_spacer(height=10)
-                dpg.add_button(label="JUMP EST. (BETA)", width=180, height=30, callback=show_jump_estimation)
+                dpg.add_button(label="JUMP EST. (BETA)", width=180, height=30, callback=_choose, user_data="show_jump_estimation")
                 dpg.add_spacer(height=10)
                 dpg.add_button(label="CONTINUOUS JUMP", width=180, height=30, enabled=False)
 
@@ -46,7 +69,7 @@ def create_main_menu():
                 dpg.add_text("EXERCISES", color=(150, 150, 150))
                 dpg.add_spacer(height=10)
                 
-                dpg.add_button(label="PUSH UP", width=180, height=30, callback=show_push_up)
+                dpg.add_button(label="PUSH UP", width=180, height=30, callback=_choose, user_data="show_push_up")
                 dpg.add_spacer(height=10)
                 dpg.add_button(label="SQUAT", width=180, height=30, enabled=False)
                 dpg.add_spacer(height=10)
@@ -0,0 +1,203 @@
+"""
+Performance HUD - where does a stutter come from?
+
+A floating window (F3, or the "Perf HUD" checkbox) with two plots over the
+last HISTORY_S seconds:
+
+    ms per frame:  frame period, render call, update_live_plot, controller
+                   update, history sync, and GC pauses as points
+    throughput:    samples/s from the link health counters, and the depth
+                   of the queues passed in (DB writes, acquisition events)
+
+The main loop times its steps only while the HUD is visible and stores them
+in preallocated numpy rings; the plots are redrawn REFRESH_HZ times a second
+from those rings. The gc callback is registered on show and removed on hide,
+so a hidden HUD costs one attribute check per frame.
+"""
+import collections
+import gc
+import time
+
+import dearpygui.dearpygui as dpg
+import numpy as np
+
+FRAME_CAPACITY = 2048      # frames kept (~30 s at 60 FPS)
+RATE_CAPACITY = 256        # throughput points, one per refresh
+HISTORY_S = 10.0
+REFRESH_HZ = 4
+TIMED_STEPS = ("frame", "render", "plot", "controller", "history")
+STEP_COLORS = {
+    "frame": (200, 200, 200),
+    "render": (0, 191, 255),
+    "plot": (57, 255, 20),
+    "controller": (255, 165, 0),
+    "history": (255, 0, 255),
+}
+
+
+class PerfHud:
+    def __init__(self, serial_handler, queues=None, tag="perf_hud"):
+        self.serial = serial_handler
+        self.queues = queues or {}            # label -> callable returning a depth
+        self.tag = tag
+        self.visible = False
+
+        self.t = np.zeros(FRAME_CAPACITY)
+        self.steps = np.zeros((FRAME_CAPACITY, len(TIMED_STEPS)))
+        self.idx = 0
+        self.count = 0
+
+        self.rate_t = np.zeros(RATE_CAPACITY)
+        self.rates = np.zeros((RATE_CAPACITY, 1 + len(self.queues)))
+        self.rate_idx = 0
+        self.rate_count = 0
+        self.last_samples = None
+
+        # GC pauses may end on any thread; deque appends are atomic
+        self.gc_pauses = collections.deque(maxlen=256)   # (time.time(), ms, generation)
+        self.gc_start = None
+        self.next_refresh = 0.0
+
+    # --- layout ---
+    def create(self):
+        with dpg.window(label="Performance", tag=self.tag, show=False, width=460, height=430,
+                        pos=(20, 60), on_close=self.hide):
+            dpg.add_text("", tag=f"{self.tag}_text", color=(150, 150, 150))
+            with dpg.plot(height=200, width=-1):
+                dpg.add_plot_legend()
+                dpg.add_plot_axis(dpg.mvXAxis, label="s", tag=f"{self.tag}_x")
+                with dpg.plot_axis(dpg.mvYAxis, label="ms", tag=f"{self.tag}_y"):
+                    for name in TIMED_STEPS:
+                        series = dpg.add_line_series([], [], label=name, tag=f"{self.tag}_{name}")
+                        with dpg.theme() as theme:
+                            with dpg.theme_component(dpg.mvLineSeries):
+                                dpg.add_theme_color(dpg.mvPlotCol_Line, STEP_COLORS[name],
+                                                    category=dpg.mvThemeCat_Plots)
+                        dpg.bind_item_theme(series, theme)
+                    dpg.add_scatter_series([], [], label="gc", tag=f"{self.tag}_gc")
+            with dpg.plot(height=150, width=-1):
+                dpg.add_plot_legend()
+                dpg.add_plot_axis(dpg.mvXAxis, label="s", tag=f"{self.tag}_rx")
+                with dpg.plot_axis(dpg.mvYAxis, label="samples/s", tag=f"{self.tag}_ry"):
+                    dpg.add_line_series([], [], label="samples/s", tag=f"{self.tag}_rate")
+                with dpg.plot_axis(dpg.mvYAxis, label="queued", tag=f"{self.tag}_qy"):
+                    for label in self.queues:
+                        dpg.add_line_series([], [], label=label, tag=f"{self.tag}_q_{label}")
+
+        with dpg.handler_registry():
+            dpg.add_key_press_handler(dpg.mvKey_F3, callback=self.toggle)
+
+    # --- visibility ---
+    def show(self):
+        if self.visible:
+            return
+        self.idx = self.count = 0
+        self.rate_idx = self.rate_count = 0
+        self.last_samples = None
+        self.gc_pauses.clear()
+        gc.callbacks.append(self._on_gc)
+        self.visible = True
+        dpg.configure_item(self.tag, show=True)
+        if dpg.does_item_exist("check_perf_hud"):
+            dpg.set_value("check_perf_hud", True)
+
+    def hide(self, sender=None, app_data=None):
+        if not self.visible:
+            return
+        self.visible = False
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        dpg.configure_item(self.tag, show=False)
+        if dpg.does_item_exist("check_perf_hud"):
+            dpg.set_value("check_perf_hud", False)
+
+    def toggle(self, sender=None, app_data=None):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            ms = (time.perf_counter() - self.gc_start) * 1000
+            self.gc_pauses.append((time.time(), ms, info.get("generation", 0)))
+            self.gc_start = None
+
+    # --- main loop (only while visible) ---
+    def record(self, now, frame, render, plot, controller, history):
+        """One frame's step times in seconds."""
+        i = self.idx
+        self.t[i] = now
+        row = self.steps[i]
+        row[0] = frame
+        row[1] = render
+        row[2] = plot
+        row[3] = controller
+        row[4] = history
+        self.idx = (i + 1) % FRAME_CAPACITY
+        self.count += 1
+        if now >= self.next_refresh:
+            self.next_refresh = now + 1.0 / REFRESH_HZ
+            self._sample_rates(now)
+            self._redraw(now)
+
+    def _sample_rates(self, now):
+        samples = self.serial.health.snapshot()["totals"].get("samples", 0)
+        row = self.rates[self.rate_idx]
+        if self.last_samples is None or samples < self.last_samples[0]:
+            row[0] = 0.0
+        else:
+            row[0] = (samples - self.last_samples[0]) / max(now - self.last_samples[1], 1e-3)
+        self.last_samples = (samples, now)
+        for j, depth in enumerate(self.queues.values(), start=1):
+            try:
+                row[j] = depth()
+            except NotImplementedError:   # multiprocessing qsize on macOS
+                row[j] = 0
+        self.rate_t[self.rate_idx] = now
+        self.rate_idx = (self.rate_idx + 1) % RATE_CAPACITY
+        self.rate_count += 1
+
+    @staticmethod
+    def _ordered(values, idx, count, capacity):
+        if count < capacity:
+            return values[:idx]
+        return np.concatenate((values[idx:], values[:idx]))
+
+    def _redraw(self, now):
+        t = self._ordered(self.t, self.idx, self.count, FRAME_CAPACITY)
+        steps = self._ordered(self.steps, self.idx, self.count, FRAME_CAPACITY)
+        keep = t >= now - HISTORY_S
+        t, steps = t[keep] - now, steps[keep] * 1000
+        xs = t.tolist()
+        for j, name in enumerate(TIMED_STEPS):
+            dpg.set_value(f"{self.tag}_{name}", [xs, steps[:, j].tolist()])
+
+        wall = time.time()
+        pauses = [(w - wall, ms) for w, ms, _ in list(self.gc_pauses) if w >= wall - HISTORY_S]
+        dpg.set_value(f"{self.tag}_gc", [[p[0] for p in pauses], [p[1] for p in pauses]])
+
+        rt = self._ordered(self.rate_t, self.rate_idx, self.rate_count, RATE_CAPACITY)
+        rates = self._ordered(self.rates, self.rate_idx, self.rate_count, RATE_CAPACITY)
+        keep = rt >= now - HISTORY_S
+        rxs = (rt[keep] - now).tolist()
+        rates = rates[keep]
+        dpg.set_value(f"{self.tag}_rate", [rxs, rates[:, 0].tolist()])
+        for j, label in enumerate(self.queues, start=1):
+            dpg.set_value(f"{self.tag}_q_{label}", [rxs, rates[:, j].tolist()])
+
+        for axis in ("x", "y", "rx", "ry", "qy"):
+            dpg.fit_axis_data(f"{self.tag}_{axis}")
+
+        if len(steps):
+            p99 = np.percentile(steps, 99, axis=0)
+            worst = 1 + int(np.argmax(p99[1:]))
+            text = (f"frame p50 {np.median(steps[:, 0]):.1f} ms, p99 {p99[0]:.1f} ms\n"
+                    f"slowest step: {TIMED_STEPS[worst]} ({p99[worst]:.1f} ms p99)")
+        else:
+            text = "no frames"
+        if pauses:
+            text += f"\nGC: {len(pauses)} pauses, max {max(p[1] for p in pauses):.1f} ms"
+        dpg.set_value(f"{self.tag}_text", text)
@@ -1,5 +1,6 @@
 import dearpygui.dearpygui as dpg
 import numpy as np
+from curve_codec import curve_columns, curve_length
 
 class PlotManager:
     """
@@ -97,22 +98,17 @@ class PlotManager:
 
     def update_selected_from_jump(self, jump_data):
         curve = jump_data.get('force_curve')
-        if not curve:
+        if not curve_length(curve):
             return
             
-        xs = [(p['t'] - curve[0]['t'])/1000.0 for p in curve]
-        ys = [p['v'] for p in curve] 
+        cols = curve_columns(curve)
+        has_power = cols['p'] is not None
+        has_vel = cols['vel'] is not None
         
-        has_power = all(p.get('p') is not None for p in curve)
-        has_vel = all(p.get('vel') is not None for p in curve)
-
-        ps = [p.get('p', 0) for p in curve] if has_power else []
-        vs = [p.get('vel', 0) for p in curve] if has_vel else []
-        
-        xs = np.ascontiguousarray(xs)
-        ys = np.ascontiguousarray(ys)
-        ps = np.ascontiguousarray(ps)
-        vs = np.ascontiguousarray(vs)
+        xs = (cols['t'] - cols['t'][0]) / 1000.0
+        ys = np.ascontiguousarray(cols['v'], dtype=np.float64)
+        ps = np.ascontiguousarray(cols['p'], dtype=np.float64) if has_power else np.zeros(0)
+        vs = np.ascontiguousarray(cols['vel'], dtype=np.float64) if has_vel else np.zeros(0)
         
         dpg.set_value("plot_line_series", [xs, ys])
         
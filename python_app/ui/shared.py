@@ -5,15 +5,24 @@ import dearpygui.dearpygui as dpg
 from .callbacks import (
     tare_callback, 
     toggle_autofit, 
+    toggle_perf_hud,
+    toggle_profiler,
     clear_history_callback, 
     delete_selected_jump_callback, 
     history_click_callback,
+    history_wheel_callback,
+    history_scroll_callback,
+    history_filter_callback,
+    history_filter_reset_callback,
+    athlete_select_callback,
+    add_athlete_callback,
     calibrate_callback,
     plot_mouse_move_callback
 )
 from .single_jump import create_single_jump_header
 from .jump_estimation import create_jump_estimation_header
 from .contact_time import create_contact_time_header
+from database import HISTORY_METRICS
 
 
 def create_shared_content():
@@ -82,12 +91,28 @@ def create_shared_content():
                     dpg.add_button(label="TARE", callback=tare_callback, width=60)
                     dpg.add_checkbox(label="AutoY", default_value=True, callback=toggle_autofit)
                 dpg.add_checkbox(label="Sticky Cursor", default_value=True, tag="check_sticky_cursor")
+                dpg.add_checkbox(label="Perf HUD (F3)", default_value=False, tag="check_perf_hud",
+                                 callback=toggle_perf_hud)
+                dpg.add_checkbox(label="Profile", default_value=False, tag="check_profile",
+                                 callback=toggle_profiler)
+                dpg.add_text("", tag="txt_profile", color=(150, 150, 150), wrap=230)
+                dpg.add_text("Link: --", tag="txt_link_health", color=(150, 150, 150), wrap=230)
                 
                 dpg.add_spacer(height=5)
                 with dpg.group(horizontal=True):
                     dpg.add_input_float(tag="input_calib_weight", default_value=20.0, width=80, format="%.1f kg")
                     dpg.add_button(label="CALIBRATE", callback=calibrate_callback, width=80)
                 
+                dpg.add_spacer(height=10)
+                dpg.add_separator()
+                dpg.add_text("Athlete")
+                dpg.add_combo(["(none)"], tag="combo_athlete", default_value="(none)", width=-1,
+                              callback=athlete_select_callback)
+                with dpg.group(horizontal=True):
+                    dpg.add_input_text(tag="input_athlete_name", hint="new athlete", width=150)
+                    dpg.add_button(label="Add", callback=add_athlete_callback, width=-1)
+                dpg.add_text("", tag="txt_summary", color=(150, 150, 150))
+                
                 dpg.add_spacer(height=10)
                 dpg.add_separator()
                 dpg.add_text("History")
@@ -95,4 +120,25 @@ def create_shared_content():
                     dpg.add_button(label="Clr All", callback=clear_history_callback, width=60)
                     dpg.add_button(label="Del", callback=delete_selected_jump_callback, width=60)
                 
-                dpg.add_listbox(tag="list_history", items=[], num_items=15, width=-1, callback=history_click_callback)
+                dpg.add_text("0-0 of 0", tag="txt_history_page", color=(150, 150, 150))
+                
+                # Virtualized list: the listbox only ever holds the visible page,
+                # the slider and mouse wheel move the window over the DB query.
+                with dpg.group(horizontal=True):
+                    dpg.add_listbox(tag="list_history", items=[], num_items=15, width=-25, callback=history_click_callback)
+                    dpg.add_slider_int(tag="slider_history_scroll", vertical=True, width=18, height=265,
+                                       min_value=0, max_value=1, default_value=1, format="",
+                                       callback=history_scroll_callback)
+                with dpg.handler_registry():
+                    dpg.add_mouse_wheel_handler(callback=history_wheel_callback)
+                
+                with dpg.collapsing_header(label="Filter", default_open=False):
+                    dpg.add_input_text(tag="input_hist_from", hint="From YYYY-MM-DD", width=-1)
+                    dpg.add_input_text(tag="input_hist_to", hint="To YYYY-MM-DD", width=-1)
+                    dpg.add_combo(HISTORY_METRICS, tag="combo_hist_metric", default_value="height_flight", width=-1)
+                    with dpg.group(horizontal=True):
+                        dpg.add_input_text(tag="input_hist_min", hint="min", width=70)
+                        dpg.add_input_text(tag="input_hist_max", hint="max", width=70)
+                    with dpg.group(horizontal=True):
+                        dpg.add_button(label="Apply", callback=history_filter_callback, width=60)
+                        dpg.add_button(label="Reset", callback=history_filter_reset_callback, width=60)